@@ -1,6 +1,10 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import User, Skill, SwapRequest, Feedback, SystemMessage, Session
+from .models import (
+    User, Skill, SkillVerification, SwapRequest, Feedback, SystemMessage, Session, BlacklistedRefreshToken,
+    CreditTransaction, CreditBalanceSnapshot, Notification, DiscoveryScore, SkillTag, SkillTagAlias,
+    ArchivedSwapRequest, RequestProfile
+)
 
 @admin.register(User)
 class CustomUserAdmin(UserAdmin):
@@ -26,9 +30,26 @@ class CustomUserAdmin(UserAdmin):
 
 @admin.register(Skill)
 class SkillAdmin(admin.ModelAdmin):
-    list_display = ('name', 'user', 'type', 'is_verified', 'created_at')
+    list_display = ('name', 'tag', 'user', 'type', 'is_verified', 'created_at')
     list_filter = ('type', 'is_verified', 'created_at')
     search_fields = ('name', 'user__email', 'user__name')
+    raw_id_fields = ('tag',)
+
+class SkillTagAliasInline(admin.TabularInline):
+    model = SkillTagAlias
+    extra = 1
+
+@admin.register(SkillTag)
+class SkillTagAdmin(admin.ModelAdmin):
+    list_display = ('name', 'created_at')
+    search_fields = ('name', 'aliases__name')
+    inlines = [SkillTagAliasInline]
+
+@admin.register(SkillVerification)
+class SkillVerificationAdmin(admin.ModelAdmin):
+    list_display = ('skill', 'verifier', 'source', 'created_at')
+    list_filter = ('source', 'created_at')
+    search_fields = ('skill__name', 'verifier__email')
 
 @admin.register(SwapRequest)
 class SwapRequestAdmin(admin.ModelAdmin):
@@ -36,6 +57,12 @@ class SwapRequestAdmin(admin.ModelAdmin):
     list_filter = ('status', 'created_at')
     search_fields = ('sender__email', 'receiver__email', 'offered_skill__name', 'requested_skill__name')
 
+@admin.register(ArchivedSwapRequest)
+class ArchivedSwapRequestAdmin(admin.ModelAdmin):
+    list_display = ('sender', 'receiver', 'offered_skill_name', 'requested_skill_name', 'status', 'updated_at', 'archived_at')
+    list_filter = ('status', 'archived_at')
+    search_fields = ('sender__email', 'receiver__email', 'offered_skill_name', 'requested_skill_name')
+
 @admin.register(Feedback)
 class FeedbackAdmin(admin.ModelAdmin):
     list_display = ('rater', 'rated_user', 'rating', 'expectations_matched', 'created_at')
@@ -50,6 +77,41 @@ class SystemMessageAdmin(admin.ModelAdmin):
 
 @admin.register(Session)
 class SessionAdmin(admin.ModelAdmin):
-    list_display = ('user', 'expires_at', 'created_at')
-    list_filter = ('expires_at', 'created_at')
+    list_display = ('user', 'expires_at', 'revoked_at', 'created_at')
+    list_filter = ('expires_at', 'revoked_at', 'created_at')
+    search_fields = ('user__email',)
+
+@admin.register(BlacklistedRefreshToken)
+class BlacklistedRefreshTokenAdmin(admin.ModelAdmin):
+    list_display = ('session', 'blacklisted_at')
+    search_fields = ('session__user__email',)
+
+@admin.register(CreditTransaction)
+class CreditTransactionAdmin(admin.ModelAdmin):
+    list_display = ('user', 'amount', 'reason', 'swap_request', 'created_at')
+    list_filter = ('reason', 'created_at')
     search_fields = ('user__email',)
+
+@admin.register(CreditBalanceSnapshot)
+class CreditBalanceSnapshotAdmin(admin.ModelAdmin):
+    list_display = ('user', 'balance', 'last_transaction_id', 'as_of')
+    search_fields = ('user__email',)
+
+@admin.register(Notification)
+class NotificationAdmin(admin.ModelAdmin):
+    list_display = ('user', 'kind', 'actor', 'read_at', 'created_at')
+    list_filter = ('kind', 'created_at')
+    search_fields = ('user__email',)
+
+@admin.register(DiscoveryScore)
+class DiscoveryScoreAdmin(admin.ModelAdmin):
+    list_display = ('user', 'score', 'average_rating', 'feedback_count', 'verified_skill_count', 'computed_at')
+    search_fields = ('user__email',)
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    list_display = ('method', 'path', 'status_code', 'duration_ms', 'engine', 'requested_by', 'created_at')
+    list_filter = ('engine', 'view_name', 'created_at')
+    search_fields = ('path', 'request_id')
+    exclude = ('data',)
+    readonly_fields = ('summary',)
@@ -1,6 +1,31 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        from django.db.models.signals import post_delete, post_save
+        from .models import User, Skill, SwapRequest, Feedback
+        from .autocomplete import skill_saved, skill_deleted
+        from .feedback_stats import feedback_saved, feedback_deleted
+        from .ranking import score_new_user
+        from .sync import record_skill_deletion, record_swap_deletion
+        from .versioning import skill_changed, feedback_changed
+        post_delete.connect(record_skill_deletion, sender=Skill, dispatch_uid='api.skill_tombstone')
+        post_delete.connect(record_swap_deletion, sender=SwapRequest, dispatch_uid='api.swap_tombstone')
+        post_save.connect(skill_changed, sender=Skill, dispatch_uid='api.skill_saved_version')
+        post_delete.connect(skill_changed, sender=Skill, dispatch_uid='api.skill_deleted_version')
+        post_save.connect(feedback_changed, sender=Feedback, dispatch_uid='api.feedback_saved_version')
+        post_delete.connect(feedback_changed, sender=Feedback, dispatch_uid='api.feedback_deleted_version')
+        post_save.connect(score_new_user, sender=User, dispatch_uid='api.score_new_user')
+        post_save.connect(skill_saved, sender=Skill, dispatch_uid='api.skill_saved_autocomplete')
+        post_delete.connect(skill_deleted, sender=Skill, dispatch_uid='api.skill_deleted_autocomplete')
+        post_save.connect(feedback_saved, sender=Feedback, dispatch_uid='api.feedback_saved_rollups')
+        post_delete.connect(feedback_deleted, sender=Feedback, dispatch_uid='api.feedback_deleted_rollups')
+
+        if settings.PERFORMANCE_INSTRUMENTATION['ENABLED']:
+            from .instrumentation import install_serialization_timer
+            install_serialization_timer()
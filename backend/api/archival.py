@@ -0,0 +1,83 @@
+import base64
+import time
+import uuid
+from datetime import datetime, timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from .models import SwapRequest, ArchivedSwapRequest
+
+
+def archive_terminal_swaps(older_than_days=None, batch_size=None, pause=0.0):
+    """Move rejected/cancelled/withdrawn swaps untouched for `older_than_days`
+    into ArchivedSwapRequest, one short transaction per batch.
+
+    Deleting from the hot table tombstones the swaps for delta sync like any
+    other deletion; swap_history() still returns them. Returns the number of
+    swaps archived.
+    """
+    config = settings.SWAP_ARCHIVAL
+    if older_than_days is None:
+        older_than_days = config['AFTER_DAYS']
+    if batch_size is None:
+        batch_size = config['BATCH_SIZE']
+    cutoff = timezone.now() - timedelta(days=older_than_days)
+
+    archived = 0
+    while True:
+        with transaction.atomic():
+            batch = list(
+                SwapRequest.objects.select_related('offered_skill', 'requested_skill')
+                .filter(status__in=config['STATUSES'], updated_at__lt=cutoff)
+                .order_by('status', 'updated_at')[:batch_size]
+            )
+            if not batch:
+                return archived
+            now = timezone.now()
+            ArchivedSwapRequest.objects.bulk_create([ArchivedSwapRequest.from_swap(swap, archived_at=now) for swap in batch])
+            SwapRequest.objects.filter(id__in=[swap.id for swap in batch]).delete()
+            archived += len(batch)
+        if pause:
+            time.sleep(pause)
+
+
+def encode_history_cursor(entry):
+    return base64.urlsafe_b64encode(f'{entry.updated_at.isoformat()},{entry.id}'.encode()).decode()
+
+
+def decode_history_cursor(cursor):
+    """(updated_at, id) from encode_history_cursor(); raises ValueError if malformed"""
+    try:
+        updated_at, entry_id = base64.urlsafe_b64decode(cursor.encode()).decode().split(',')
+        return datetime.fromisoformat(updated_at), uuid.UUID(entry_id)
+    except (UnicodeError, TypeError, ValueError) as e:
+        raise ValueError('Invalid cursor') from e
+
+
+def swap_history(user, status=None, cursor=None, limit=20):
+    """Page of `user`'s swaps, live and archived, most recently updated first.
+
+    Both tables are read through their (participant, updated_at) indexes and
+    merged; live swaps come back as unsaved ArchivedSwapRequest copies with
+    archived_at None. Returns (entries, next_cursor).
+    """
+    if limit < 1:
+        raise ValueError('limit must be positive')
+
+    def page_of(queryset):
+        queryset = queryset.filter(Q(sender=user) | Q(receiver=user))
+        if status:
+            queryset = queryset.filter(status=status)
+        if cursor is not None:
+            updated_at, entry_id = decode_history_cursor(cursor)
+            queryset = queryset.filter(Q(updated_at__lt=updated_at) | Q(updated_at=updated_at, id__lt=entry_id))
+        return list(queryset.order_by('-updated_at', '-id')[:limit + 1])
+
+    live = page_of(SwapRequest.objects.select_related('offered_skill', 'requested_skill'))
+    entries = [ArchivedSwapRequest.from_swap(swap) for swap in live] + page_of(ArchivedSwapRequest.objects.all())
+    entries.sort(key=lambda entry: (entry.updated_at, entry.id), reverse=True)
+
+    page = entries[:limit]
+    next_cursor = encode_history_cursor(page[-1]) if len(entries) > limit else None
+    return page, next_cursor
@@ -0,0 +1,125 @@
+import bisect
+import heapq
+import threading
+import time
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+from .models import Skill, SkillTag, SkillTagAlias
+from .taxonomy import normalize_skill_name
+
+# Results for prefixes up to this long are memoized until the next change
+SHORT_PREFIX_LENGTH = 2
+
+
+class SkillSuggestions:
+    """In-process autocomplete over skill tags, most used first.
+
+    Every word-start suffix of every alias is kept in one sorted list, so the
+    tags matching a prefix are a contiguous bisect range, ranked by how many
+    skills use them. A full rebuild (three queries) runs at most once per
+    SKILL_AUTOCOMPLETE['REFRESH_SECONDS'], on the request that finds it stale
+    while others keep reading the previous snapshot; skills saved or deleted
+    by this process adjust the counts in between.
+    """
+
+    def __init__(self):
+        self._keys = []      # sorted suffixes
+        self._tag_ids = []   # tag id of each suffix
+        self._names = {}     # tag id -> display name
+        self._counts = {}    # tag id -> skills using it
+        self._short = {}     # (prefix, limit) -> suggestions, for prefixes too short to narrow the range much
+        self._built_at = None
+        self._rebuild_lock = threading.Lock()
+
+    def rebuild(self):
+        names = dict(SkillTag.objects.values_list('id', 'name'))
+        counts = dict(
+            Skill.objects.filter(tag__isnull=False).order_by().values('tag').annotate(count=Count('id')).values_list('tag', 'count')
+        )
+        entries = set()
+        for alias, tag_id in SkillTagAlias.objects.values_list('name', 'tag_id').iterator():
+            words = alias.split(' ')
+            entries.update((' '.join(words[start:]), tag_id) for start in range(len(words)))
+        entries = sorted(entries)
+        # Swapped in one assignment each; readers never see a half-built index
+        self._names, self._counts, self._short = names, counts, {}
+        self._keys, self._tag_ids = [key for key, _ in entries], [tag_id for _, tag_id in entries]
+        self._built_at = time.monotonic()
+
+    def _refresh_if_stale(self):
+        if self._built_at is None:
+            with self._rebuild_lock:
+                if self._built_at is None:
+                    self.rebuild()
+        elif time.monotonic() - self._built_at >= settings.SKILL_AUTOCOMPLETE['REFRESH_SECONDS']:
+            if self._rebuild_lock.acquire(blocking=False):
+                try:
+                    self.rebuild()
+                finally:
+                    self._rebuild_lock.release()
+
+    def suggest(self, prefix, limit):
+        """Up to `limit` {tag_id, name, count} whose name or an alias has a word starting with `prefix`"""
+        prefix = normalize_skill_name(prefix)
+        if not prefix:
+            return []
+        self._refresh_if_stale()
+        if len(prefix) <= SHORT_PREFIX_LENGTH and (prefix, limit) in self._short:
+            return self._short[(prefix, limit)]
+        keys, tag_ids, names, counts = self._keys, self._tag_ids, self._names, self._counts
+        start = bisect.bisect_left(keys, prefix)
+        end = bisect.bisect_left(keys, prefix + '\U0010ffff', lo=start)
+        matches = {tag_id for tag_id in tag_ids[start:end] if tag_id in names}
+        best = heapq.nsmallest(limit, matches, key=lambda tag_id: (-counts.get(tag_id, 0), names[tag_id]))
+        suggestions = [{'tag_id': tag_id, 'name': names[tag_id], 'count': counts.get(tag_id, 0)} for tag_id in best]
+        if len(prefix) <= SHORT_PREFIX_LENGTH:
+            self._short[(prefix, limit)] = suggestions
+        return suggestions
+
+    @property
+    def built(self):
+        return self._built_at is not None
+
+    def has_tag(self, tag_id):
+        return tag_id in self._names
+
+    def adjust(self, tag_id, delta, name=None):
+        counts = self._counts
+        counts[tag_id] = max(counts.get(tag_id, 0) + delta, 0)
+        self._short = {}
+        if name is not None and tag_id not in self._names:
+            # A tag created since the last rebuild: make it suggestible right away
+            alias = normalize_skill_name(name)
+            keys, tag_ids = list(self._keys), list(self._tag_ids)
+            words = alias.split(' ')
+            for start in range(len(words)):
+                key = ' '.join(words[start:])
+                position = bisect.bisect_left(keys, key)
+                keys.insert(position, key)
+                tag_ids.insert(position, tag_id)
+            self._names = {**self._names, tag_id: name}
+            self._keys, self._tag_ids = keys, tag_ids
+
+    def reset(self):
+        with self._rebuild_lock:
+            self._keys, self._tag_ids, self._names, self._counts, self._short = [], [], {}, {}, {}
+            self._built_at = None
+
+
+skill_suggestions = SkillSuggestions()
+
+
+def skill_saved(sender, instance, created, **kwargs):
+    """post_save receiver for Skill: count new skills once they are committed"""
+    if created and instance.tag_id is not None and skill_suggestions.built:
+        tag_id = instance.tag_id
+        name = None if skill_suggestions.has_tag(tag_id) else instance.tag.name
+        transaction.on_commit(lambda: skill_suggestions.adjust(tag_id, 1, name))
+
+
+def skill_deleted(sender, instance, **kwargs):
+    """post_delete receiver for Skill"""
+    if instance.tag_id is not None and skill_suggestions.built:
+        tag_id = instance.tag_id
+        transaction.on_commit(lambda: skill_suggestions.adjust(tag_id, -1))
@@ -0,0 +1,137 @@
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q, Max, Sum
+from django.utils import timezone
+from .models import User, SwapRequest, CreditTransaction, CreditBalanceSnapshot
+
+
+def complete_swap(swap_id, user):
+    """Mark an accepted swap as completed and pay out credits to both participants.
+
+    Returns the completed swap, or None if the swap is not an accepted swap of `user`.
+    """
+    amount = settings.SWAP_COMPLETION_CREDITS
+    now = timezone.now()
+
+    with transaction.atomic():
+        # The conditional UPDATE is the state transition guard: only one caller
+        # can move the swap out of 'Accepted', so credits are paid out once.
+        updated = SwapRequest.objects.filter(
+            Q(sender=user) | Q(receiver=user),
+            id=swap_id,
+            status='Accepted'
+        ).update(status='Completed', updated_at=now)
+        if not updated:
+            return None
+
+        swap_request = SwapRequest.objects.select_related(
+            'sender', 'receiver', 'offered_skill', 'requested_skill'
+        ).get(id=swap_id)
+        participant_ids = [swap_request.sender_id, swap_request.receiver_id]
+
+        CreditTransaction.objects.bulk_create([
+            CreditTransaction(
+                user_id=participant_id,
+                swap_request=swap_request,
+                amount=amount,
+                reason='SwapCompleted',
+                created_at=now
+            )
+            for participant_id in participant_ids
+        ])
+        User.objects.filter(id__in=participant_ids).update(
+            credits=F('credits') + amount,
+            version=F('version') + 1
+        )
+
+    return swap_request
+
+
+def balance_through(user, transaction_id):
+    """Ledger balance of `user` including every transaction with id <= transaction_id"""
+    snapshot = CreditBalanceSnapshot.objects.filter(
+        user=user,
+        last_transaction_id__lte=transaction_id
+    ).order_by('-last_transaction_id').first()
+
+    base, cursor = (snapshot.balance, snapshot.last_transaction_id) if snapshot else (0, 0)
+    delta = CreditTransaction.objects.filter(
+        user=user,
+        id__gt=cursor,
+        id__lte=transaction_id
+    ).aggregate(total=Sum('amount'))['total'] or 0
+    return base + delta
+
+
+def credit_history(user, before=None, limit=20):
+    """Page of ledger entries (newest first) annotated with the running balance"""
+    transactions = CreditTransaction.objects.filter(user=user)
+    if before is not None:
+        transactions = transactions.filter(id__lt=before)
+    page = list(transactions.order_by('-id')[:limit + 1])
+    has_next = len(page) > limit
+    page = page[:limit]
+
+    if page:
+        balance = balance_through(user, page[0].id)
+        for entry in page:
+            entry.balance_after = balance
+            balance -= entry.amount
+
+    return page, has_next
+
+
+def take_balance_snapshots(settle_seconds=None, batch_size=500):
+    """Snapshot the ledger balance of every user with transactions since the last snapshot run.
+
+    Transactions younger than `settle_seconds` are left for the next run so that a
+    row allocated a lower id but committed late is never skipped by the cursor.
+    Returns the number of snapshots written.
+    """
+    if settle_seconds is None:
+        settle_seconds = settings.CREDIT_SNAPSHOT_SETTLE_SECONDS
+    as_of = timezone.now() - timedelta(seconds=settle_seconds)
+
+    last_id = CreditTransaction.objects.filter(
+        created_at__lte=as_of
+    ).aggregate(last_id=Max('id'))['last_id']
+    previous_cursor = CreditBalanceSnapshot.objects.aggregate(
+        cursor=Max('last_transaction_id')
+    )['cursor'] or 0
+    if last_id is None or last_id <= previous_cursor:
+        return 0
+
+    deltas = list(
+        CreditTransaction.objects.filter(id__gt=previous_cursor, id__lte=last_id)
+        .values('user_id')
+        .annotate(delta=Sum('amount'))
+        .order_by('user_id')
+    )
+
+    # All batches commit together: the snapshot cursor is global, so a partial
+    # run would otherwise hide the remaining users' transactions from later runs.
+    written = 0
+    with transaction.atomic():
+        for start in range(0, len(deltas), batch_size):
+            batch = deltas[start:start + batch_size]
+            user_ids = [row['user_id'] for row in batch]
+
+            previous = {}
+            for snapshot in CreditBalanceSnapshot.objects.filter(
+                user_id__in=user_ids
+            ).order_by('user_id', '-last_transaction_id'):
+                previous.setdefault(snapshot.user_id, snapshot.balance)
+
+            CreditBalanceSnapshot.objects.bulk_create([
+                CreditBalanceSnapshot(
+                    user_id=row['user_id'],
+                    balance=previous.get(row['user_id'], 0) + row['delta'],
+                    last_transaction_id=last_id,
+                    as_of=as_of
+                )
+                for row in batch
+            ])
+            written += len(batch)
+
+    return written
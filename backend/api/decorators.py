@@ -1,4 +1,5 @@
 from functools import wraps
+from django.conf import settings
 from django.http import JsonResponse
 from rest_framework import status
 from rest_framework_simplejwt.tokens import AccessToken
@@ -6,6 +7,10 @@ from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ObjectDoesNotExist
 import json
+from .errors import record_exception
+from .tokens import revocations
+from .replicas import replica_for, use_replica, stop_using_replica
+from .throttling import SlidingWindowCounter, LIMITERS, RATE_LIMIT_KEYS
 
 User = get_user_model()
 
@@ -32,6 +37,13 @@ def jwt_required(view_func):
             
             # Validate token
             access_token = AccessToken(token)
+            session_id = access_token.get('sid')
+            if session_id and revocations.is_revoked(session_id):
+                return JsonResponse(
+                    {'error': 'Session has been revoked'}, 
+                    status=status.HTTP_401_UNAUTHORIZED
+                )
+            
             user_id = access_token['user_id']
             user = User.objects.get(id=user_id)
             
@@ -48,6 +60,7 @@ def jwt_required(view_func):
                 )
             
             request.user = user
+            request.auth_session_id = session_id
             return view_func(request, *args, **kwargs)
             
         except (ValueError, IndexError):
@@ -90,6 +103,91 @@ def admin_required(view_func):
     return wrapper
 
 
+def too_many_requests(retry_after):
+    response = JsonResponse(
+        {'error': 'Too many requests, please try again later'}, 
+        status=status.HTTP_429_TOO_MANY_REQUESTS
+    )
+    response['Retry-After'] = str(retry_after)
+    return response
+
+
+def paginated_queryset(request, queryset, serializer_class):
+    """paginate_response's page, sliced in SQL so only one page of rows is loaded and serialized.
+
+    page and limit come from the query string (limit clamped to 1..100); raises
+    ValueError when they are not integers. The total is counted only when the
+    page does not already show it.
+    """
+    page = max(1, int(request.GET.get('page', 1)))
+    limit = max(1, min(int(request.GET.get('limit', 10)), 100))
+    start = (page - 1) * limit
+    rows = list(queryset[start:start + limit + 1])
+    has_next = len(rows) > limit
+    rows = rows[:limit]
+    total = start + len(rows) if not has_next and (rows or page == 1) else queryset.count()
+    
+    return JsonResponse({
+        'results': serializer_class(rows, many=True).data,
+        'pagination': {
+            'page': page,
+            'limit': limit,
+            'total': total,
+            'has_next': has_next,
+            'has_previous': page > 1
+        }
+    })
+
+
+def rate_limit(scope):
+    """Decorator to throttle the authenticated user per settings.RATE_LIMITS[scope]"""
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            rate = settings.RATE_LIMITS.get(scope)
+            if rate:
+                limiter = SlidingWindowCounter(rate, cache_alias=settings.RATE_LIMIT_CACHE, prefix=f'rl:{scope}')
+                allowed, retry_after = limiter.hit(request.user.id)
+                if not allowed:
+                    return too_many_requests(retry_after)
+            
+            return view_func(request, *args, **kwargs)
+        
+        return wrapper
+    
+    return decorator
+
+
+def throttle(view_func, algorithm='token_bucket', **rates):
+    """Wrap a view with per-route rate limits, e.g. throttle(view, ip='20/m', email='5/m').
+
+    Applied in urls.py around the DRF view, so over-limit requests are
+    rejected before authentication, parsing or password hashing run.
+    """
+    limiters = [
+        (RATE_LIMIT_KEYS[key], LIMITERS[algorithm](
+            rate,
+            cache_alias=settings.RATE_LIMIT_CACHE,
+            prefix=f'rl:{view_func.__name__}:{key}'
+        ))
+        for key, rate in rates.items()
+    ]
+    
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        for key_func, limiter in limiters:
+            key = key_func(request)
+            if key is None:
+                continue
+            allowed, retry_after = limiter.hit(key)
+            if not allowed:
+                return too_many_requests(retry_after)
+        
+        return view_func(request, *args, **kwargs)
+    
+    return wrapper
+
+
 def validate_json(view_func):
     """Decorator to validate JSON request body"""
     @wraps(view_func)
@@ -117,7 +215,11 @@ def validate_json(view_func):
 
 
 def handle_exceptions(view_func):
-    """Decorator to handle common exceptions"""
+    """Decorator to handle common exceptions.
+    
+    Unexpected errors are logged with the request id and counted per view;
+    lock contention, database outages and hashing overload become retryable 503s.
+    """
     @wraps(view_func)
     def wrapper(request, *args, **kwargs):
         try:
@@ -128,8 +230,16 @@ def handle_exceptions(view_func):
                 status=status.HTTP_404_NOT_FOUND
             )
         except Exception as e:
+            kind, retryable = record_exception(request, view_func.__name__, e)
+            if retryable:
+                response = JsonResponse(
+                    {'error': 'Service busy, please try again shortly', 'request_id': getattr(request, 'request_id', None)}, 
+                    status=status.HTTP_503_SERVICE_UNAVAILABLE
+                )
+                response['Retry-After'] = str(settings.RETRY_AFTER_SECONDS.get(kind, 1))
+                return response
             return JsonResponse(
-                {'error': 'Internal server error'}, 
+                {'error': 'Internal server error', 'request_id': getattr(request, 'request_id', None)}, 
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
     
@@ -169,4 +279,24 @@ def paginate_response(view_func):
         
         return response
     
-    return wrapper 
\ No newline at end of file
+    return wrapper
+
+
+def replica_reads(view_func):
+    """Decorator to serve a read-only view's queries from a read replica.
+
+    Place it last (innermost), so authentication still reads the primary.
+    Clients that wrote recently stay on the primary to see their own writes.
+    """
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        alias = replica_for(request)
+        if alias is None:
+            return view_func(request, *args, **kwargs)
+        token = use_replica(alias)
+        try:
+            return view_func(request, *args, **kwargs)
+        finally:
+            stop_using_replica(token)
+    
+    return wrapper
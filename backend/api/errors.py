@@ -0,0 +1,134 @@
+import json
+import logging
+import threading
+import time
+import traceback
+from collections import Counter
+from django.db import OperationalError
+from .hashing import HashingPoolSaturated
+
+logger = logging.getLogger('api.errors')
+
+# Substrings of driver messages that mean "someone else holds the lock", as opposed
+# to the database being unreachable. SQLite, PostgreSQL and MySQL wordings.
+LOCK_MESSAGES = (
+    'database is locked',
+    'database table is locked',
+    'deadlock detected',
+    'could not obtain lock',
+    'could not serialize access',
+    'lock wait timeout',
+    'lock timeout',
+)
+
+# Messages that mean the database cannot be reached right now. Any other
+# OperationalError (bad SQL, missing table or column, ...) is a bug.
+UNAVAILABLE_MESSAGES = (
+    'unable to open database file',
+    'disk i/o error',
+    'could not connect to server',
+    'connection refused',
+    'connection timed out',
+    'server closed the connection unexpectedly',
+    'terminating connection',
+    'the database system is starting up',
+    'the database system is shutting down',
+    'remaining connection slots are reserved',
+    'too many connections',
+    "can't connect to mysql server",
+    'lost connection to mysql server',
+    'mysql server has gone away',
+)
+
+# PostgreSQL SQLSTATE class 08 (connection exception) plus server shutdown,
+# startup and connection limits; MySQL client and server connection codes
+UNAVAILABLE_SQLSTATES = ('08', '57P01', '57P02', '57P03', '53300')
+UNAVAILABLE_MYSQL_CODES = {1040, 1053, 2002, 2003, 2006, 2013}
+
+
+def connection_failed(exc):
+    """Whether an OperationalError says the database is unreachable"""
+    driver_exc = exc.__cause__ or exc
+    sqlstate = getattr(driver_exc, 'sqlstate', None) or getattr(driver_exc, 'pgcode', None)
+    if sqlstate and sqlstate.startswith(UNAVAILABLE_SQLSTATES):
+        return True
+    if driver_exc.args and driver_exc.args[0] in UNAVAILABLE_MYSQL_CODES:
+        return True
+    message = str(exc).lower()
+    return any(fragment in message for fragment in UNAVAILABLE_MESSAGES)
+
+
+def classify(exc):
+    """Return (kind, retryable) for an exception raised by a view"""
+    if isinstance(exc, HashingPoolSaturated):
+        return 'overload', True
+    if isinstance(exc, OperationalError):
+        message = str(exc).lower()
+        if any(fragment in message for fragment in LOCK_MESSAGES):
+            return 'lock_contention', True
+        if connection_failed(exc):
+            return 'database_unavailable', True
+    return 'bug', False
+
+
+class ErrorCounters:
+    """In-memory exception counts by (view, exception class, kind)"""
+
+    def __init__(self):
+        self._counts = Counter()
+        self._lock = threading.Lock()
+
+    def increment(self, view, exc_class, kind):
+        with self._lock:
+            self._counts[(view, exc_class, kind)] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return [
+                {'view': view, 'exception': exc_class, 'kind': kind, 'count': count}
+                for (view, exc_class, kind), count in sorted(self._counts.items())
+            ]
+
+    def render_prometheus(self):
+        lines = [
+            '# HELP api_exceptions_total Exceptions raised by API views.',
+            '# TYPE api_exceptions_total counter',
+        ]
+        for row in self.snapshot():
+            lines.append(
+                f'api_exceptions_total{{view="{row["view"]}",exception="{row["exception"]}",'
+                f'kind="{row["kind"]}"}} {row["count"]}'
+            )
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        with self._lock:
+            self._counts.clear()
+
+
+counters = ErrorCounters()
+
+
+def record_exception(request, view_name, exc):
+    """Count and log a view exception as one JSON line; returns (kind, retryable)"""
+    kind, retryable = classify(exc)
+    exc_class = f'{type(exc).__module__}.{type(exc).__qualname__}'
+    counters.increment(view_name, exc_class, kind)
+
+    started_at = getattr(request, 'started_at', None)
+    record = {
+        'event': 'exception',
+        'request_id': getattr(request, 'request_id', None),
+        'view': view_name,
+        'method': request.method,
+        'path': request.path,
+        'exception': exc_class,
+        'message': str(exc),
+        'kind': kind,
+        'retryable': retryable,
+        'elapsed_ms': round((time.perf_counter() - started_at) * 1000, 2) if started_at else None,
+    }
+    if not retryable:
+        record['traceback'] = traceback.format_exc()
+    logger.log(logging.WARNING if retryable else logging.ERROR, json.dumps(record))
+    return kind, retryable
@@ -0,0 +1,69 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from .models import SwapRequest, Feedback
+from .notifications import notify
+from .verification import record_verification, verified_skill_for_feedback
+
+
+class FeedbackRejected(Exception):
+    """The swap cannot take this feedback; `conflict` when someone else already rated it"""
+
+    def __init__(self, message, conflict=False):
+        super().__init__(message)
+        self.conflict = conflict
+
+
+def submit_feedback(rater, swap_request_id, rating, comment='', expectations_matched=False, skill_verified_by_peer=None):
+    """Record `rater`'s feedback on a completed swap they took part in.
+
+    One transaction: a single fetch locks the swap row and brings its
+    participants, skills and any existing feedback along, so concurrent
+    submissions queue on the lock. A repeat submission by the same rater
+    returns the stored feedback untouched; the rating rollups, notification
+    and peer verification are written only with new feedback.
+    Returns (feedback, created); raises FeedbackRejected.
+    """
+    with transaction.atomic():
+        swap_request = (
+            SwapRequest.objects.select_for_update(of=('self',))
+            .select_related('sender', 'receiver', 'offered_skill', 'requested_skill', 'feedback')
+            .filter(Q(sender=rater) | Q(receiver=rater), id=swap_request_id)
+            .first()
+        )
+        if swap_request is None:
+            raise FeedbackRejected("Swap request not found.")
+        if swap_request.status != 'Completed':
+            raise FeedbackRejected("Can only provide feedback for completed swaps.")
+
+        try:
+            existing = swap_request.feedback
+        except Feedback.DoesNotExist:
+            existing = None
+        if existing is None:
+            try:
+                with transaction.atomic():
+                    feedback = Feedback.objects.create(
+                        swap_request=swap_request,
+                        rater=rater,
+                        rated_user=swap_request.receiver if rater.id == swap_request.sender_id else swap_request.sender,
+                        rating=rating,
+                        comment=comment,
+                        expectations_matched=expectations_matched,
+                        skill_verified_by_peer=skill_verified_by_peer
+                    )
+            except IntegrityError:
+                # Databases without row locks (SQLite) let a concurrent retry through to the unique index
+                existing = Feedback.objects.get(swap_request=swap_request)
+
+        if existing is not None:
+            if existing.rater_id != rater.id:
+                raise FeedbackRejected("Feedback has already been given for this swap.", conflict=True)
+            # Both participants came with the swap; spare the serializer two lookups
+            existing.rater = rater
+            existing.rated_user = swap_request.receiver if rater.id == swap_request.sender_id else swap_request.sender
+            return existing, False
+
+        notify(feedback.rated_user, 'FeedbackReceived', swap_request, actor=rater)
+        if skill_verified_by_peer:
+            record_verification(verified_skill_for_feedback(swap_request, rater), rater, source='Feedback')
+    return feedback, True
@@ -0,0 +1,189 @@
+from collections import defaultdict
+from datetime import timedelta
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+from .models import (
+    Feedback, SwapRequest, UserRatingRollup, UserMonthlyRatingRollup, SkillTagRatingRollup, DailyRatingRollup
+)
+
+ROLLUPS = (UserRatingRollup, UserMonthlyRatingRollup, SkillTagRatingRollup, DailyRatingRollup)
+COUNT_FIELDS = [f'rating_{rating}' for rating in range(1, 6)] + ['expectations_matched', 'peer_verified', 'peer_answered']
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def counts_of(rating, expectations_matched, skill_verified_by_peer):
+    """Rollup increments contributed by one feedback"""
+    return {
+        f'rating_{rating}': 1,
+        'expectations_matched': int(bool(expectations_matched)),
+        'peer_verified': int(skill_verified_by_peer is True),
+        'peer_answered': int(skill_verified_by_peer is not None),
+    }
+
+
+def rated_tag_id(rater_id, sender_id, requested_tag_id, offered_tag_id):
+    """Tag of the rated user's skill in the swap, i.e. the one the rater learned"""
+    return requested_tag_id if rater_id == sender_id else offered_tag_id
+
+
+def swap_tags(feedback):
+    """(sender id, requested skill tag, offered skill tag) of the feedback's swap, from memory when loaded"""
+    swap = feedback.swap_request if Feedback.swap_request.is_cached(feedback) else None
+    if swap is not None and SwapRequest.requested_skill.is_cached(swap) and SwapRequest.offered_skill.is_cached(swap):
+        return swap.sender_id, swap.requested_skill.tag_id, swap.offered_skill.tag_id
+    return SwapRequest.objects.filter(id=feedback.swap_request_id).values_list(
+        'sender_id', 'requested_skill__tag_id', 'offered_skill__tag_id'
+    ).first() or (None, None, None)
+
+
+def rollup_keys(feedback, tag_id):
+    """(rollup model, lookup) pairs one feedback counts towards"""
+    day = timezone.localdate(feedback.created_at)
+    keys = [
+        (UserRatingRollup, {'user_id': feedback.rated_user_id}),
+        (UserMonthlyRatingRollup, {'user_id': feedback.rated_user_id, 'month': month_start(day)}),
+        (DailyRatingRollup, {'day': day}),
+    ]
+    if tag_id is not None:
+        keys.append((SkillTagRatingRollup, {'tag_id': tag_id}))
+    return keys
+
+
+def apply_feedback(feedback, sign):
+    """Add (sign=1) or remove (sign=-1) one feedback from every rollup it counts towards"""
+    if feedback.rating not in range(1, 6):
+        return
+    tag_id = rated_tag_id(feedback.rater_id, *swap_tags(feedback))
+    counts = {name: n for name, n in counts_of(feedback.rating, feedback.expectations_matched, feedback.skill_verified_by_peer).items() if n}
+    changes = {name: F(name) + sign * n for name, n in counts.items()}
+
+    for model, lookup in rollup_keys(feedback, tag_id):
+        if model.objects.filter(**lookup).update(**changes) or sign < 0:
+            continue
+        try:
+            with transaction.atomic():
+                model.objects.create(**lookup, **counts)
+        except IntegrityError:
+            # Another request created the row first
+            model.objects.filter(**lookup).update(**changes)
+
+
+def feedback_saved(sender, instance, created, raw=False, **kwargs):
+    """post_save receiver for Feedback: count new feedback in the rollups, in the same transaction"""
+    if created and not raw:
+        apply_feedback(instance, 1)
+
+
+def feedback_deleted(sender, instance, **kwargs):
+    """post_delete receiver for Feedback"""
+    apply_feedback(instance, -1)
+
+
+def rebuild_feedback_rollups():
+    """Recompute every rollup from the Feedback table in one pass.
+
+    For data inserted without signals (bulk_create, fixtures) or after
+    editing feedback by hand. Returns the number of feedback counted.
+    """
+    totals = {model: defaultdict(lambda: dict.fromkeys(COUNT_FIELDS, 0)) for model in ROLLUPS}
+    rows = Feedback.objects.filter(rating__gte=1, rating__lte=5).values_list(
+        'rating', 'expectations_matched', 'skill_verified_by_peer', 'rated_user_id', 'rater_id', 'created_at',
+        'swap_request__sender_id', 'swap_request__requested_skill__tag_id', 'swap_request__offered_skill__tag_id',
+    )
+    counted = 0
+    for rating, matched, verified, rated_user_id, rater_id, created_at, sender_id, requested_tag, offered_tag in rows.iterator():
+        day = timezone.localdate(created_at)
+        tag_id = rated_tag_id(rater_id, sender_id, requested_tag, offered_tag)
+        keys = [
+            (UserRatingRollup, (('user_id', rated_user_id),)),
+            (UserMonthlyRatingRollup, (('user_id', rated_user_id), ('month', month_start(day)))),
+            (DailyRatingRollup, (('day', day),)),
+        ]
+        if tag_id is not None:
+            keys.append((SkillTagRatingRollup, (('tag_id', tag_id),)))
+        for model, key in keys:
+            row = totals[model][key]
+            for name, n in counts_of(rating, matched, verified).items():
+                row[name] += n
+        counted += 1
+
+    with transaction.atomic():
+        for model in ROLLUPS:
+            model.objects.all().delete()
+            model.objects.bulk_create((model(**dict(key), **counts) for key, counts in totals[model].items()), batch_size=1000)
+    return counted
+
+
+def rating_summary(counts):
+    """Histogram, average and ratios of a rollup row (or an unsaved one holding summed counts)"""
+    count = counts.count
+    return {
+        'count': count,
+        'average': round(counts.average, 2) if count else None,
+        'histogram': counts.histogram,
+        'expectations_matched_ratio': round(counts.expectations_matched / count, 3) if count else None,
+        'peer_verified_ratio': round(counts.peer_verified / counts.peer_answered, 3) if counts.peer_answered else None,
+    }
+
+
+def summed(queryset, model):
+    """Unsaved `model` holding the column sums of rollup rows in `queryset`"""
+    totals = queryset.aggregate(**{name: Sum(name) for name in COUNT_FIELDS})
+    return model(**{name: value or 0 for name, value in totals.items()})
+
+
+def user_rating_stats(user, months=12):
+    """Rating summary of `user` plus one entry per month for the last `months` months (oldest first)"""
+    try:
+        overall = user.rating_rollup
+    except UserRatingRollup.DoesNotExist:
+        overall = UserRatingRollup(user=user)
+    first_month = month_start(timezone.localdate())
+    for _ in range(months - 1):
+        first_month = month_start(first_month - timedelta(days=1))
+    by_month = {
+        rollup.month: rollup
+        for rollup in UserMonthlyRatingRollup.objects.filter(user=user, month__gte=first_month)
+    }
+
+    trend, month = [], first_month
+    for _ in range(months):
+        trend.append({'period': month.isoformat(), **rating_summary(by_month.get(month, UserMonthlyRatingRollup()))})
+        month = (month + timedelta(days=32)).replace(day=1)
+    return {**rating_summary(overall), 'trend': trend}
+
+
+def bucket_start(day, bucket):
+    if bucket == 'week':
+        return day - timedelta(days=day.weekday())
+    if bucket == 'month':
+        return month_start(day)
+    return day
+
+
+def platform_rating_stats(days=90, bucket='day', top_tags=10):
+    """Platform-wide summary, a trend over the last `days` days grouped by `bucket`
+    (day, week or month), and the most rated skill tags. Reads rollups only."""
+    if bucket not in ('day', 'week', 'month'):
+        raise ValueError('bucket must be day, week or month')
+    since = timezone.localdate() - timedelta(days=days - 1)
+
+    grouped = {}
+    for rollup in DailyRatingRollup.objects.filter(day__gte=since).order_by('day'):
+        period = bucket_start(rollup.day, bucket)
+        total = grouped.setdefault(period, DailyRatingRollup(day=period))
+        for name in COUNT_FIELDS:
+            setattr(total, name, getattr(total, name) + getattr(rollup, name))
+
+    tags = SkillTagRatingRollup.objects.select_related('tag').annotate(
+        total=sum((F(name) for name in COUNT_FIELDS[:5]), start=0)
+    ).order_by('-total')[:top_tags]
+    return {
+        **rating_summary(summed(DailyRatingRollup.objects.all(), DailyRatingRollup)),
+        'trend': [{'period': period.isoformat(), **rating_summary(total)} for period, total in grouped.items()],
+        'top_tags': [{'tag_id': rollup.tag_id, 'name': rollup.tag.name, **rating_summary(rollup)} for rollup in tags],
+    }
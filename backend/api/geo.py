@@ -0,0 +1,197 @@
+import csv
+import math
+import re
+import threading
+import unicodedata
+from django.conf import settings
+from django.db.models import F, Q, Value
+from django.db.models.functions import ASin, Cos, Least, Power, Radians, Sin, Sqrt
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = 111.32
+GEOHASH_PRECISION = 9  # ~5m cells; coarser cells are prefixes of the stored hash
+
+_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+
+def geohash_encode(latitude, longitude, precision=GEOHASH_PRECISION):
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, bit_count, even = [], 0, 0, True
+    while len(chars) < precision:
+        interval, value = (lon_range, longitude) if even else (lat_range, latitude)
+        middle = (interval[0] + interval[1]) / 2
+        bits <<= 1
+        if value >= middle:
+            bits |= 1
+            interval[0] = middle
+        else:
+            interval[1] = middle
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_BASE32[bits])
+            bits, bit_count = 0, 0
+    return ''.join(chars)
+
+
+def next_cell(cell):
+    """First geohash after every hash inside `cell`, or None past the last cell.
+
+    Increments the last base32 digit (carrying over "z"), so the range
+    [cell, next_cell(cell)) only compares geohash digits to each other and
+    does not depend on how the column collation orders punctuation.
+    """
+    cell = cell.rstrip(_BASE32[-1])
+    if not cell:
+        return None
+    return cell[:-1] + _BASE32[_BASE32.index(cell[-1]) + 1]
+
+
+def cell_size(precision):
+    """(height, width) in degrees of a geohash cell"""
+    lat_bits = 5 * precision // 2
+    lon_bits = 5 * precision - lat_bits
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lon_bits
+
+
+def covering_cells(latitude, longitude, radius_km):
+    """Geohash prefixes whose cells together cover the circle, or None if it is too large.
+
+    Picks the finest precision whose cells are at least `radius_km` on each
+    side, then takes the cell containing the centre plus its 8 neighbours.
+    """
+    # Cells narrow towards the poles; size them for the circle's most poleward edge
+    edge_latitude = min(90.0, abs(latitude) + radius_km / KM_PER_DEGREE)
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        height, width = cell_size(precision)
+        width_km = width * KM_PER_DEGREE * math.cos(math.radians(edge_latitude))
+        if height * KM_PER_DEGREE >= radius_km and width_km >= radius_km:
+            break
+    else:
+        return None
+
+    cells = set()
+    for row in (-1, 0, 1):
+        cell_latitude = latitude + row * height
+        if not -90.0 <= cell_latitude <= 90.0:
+            continue
+        for column in (-1, 0, 1):
+            cell_longitude = (longitude + column * width + 180.0) % 360.0 - 180.0
+            cells.add(geohash_encode(cell_latitude, cell_longitude, precision))
+    return sorted(cells)
+
+
+def within_radius(queryset, latitude, longitude, radius_km):
+    """Narrow `queryset` to rows within `radius_km`, annotated with distance_km.
+
+    Candidates come from index range scans on `geohash` (portable across SQLite
+    and PostgreSQL); the exact haversine distance is then computed only for them.
+    """
+    cells = covering_cells(latitude, longitude, radius_km)
+    if cells is None:
+        queryset = queryset.filter(geohash__isnull=False)
+    else:
+        ranges = Q()
+        for cell in cells:
+            upper = next_cell(cell)
+            ranges |= Q(geohash__gte=cell, geohash__lt=upper) if upper else Q(geohash__gte=cell)
+        queryset = queryset.filter(ranges)
+
+    latitude_radians = math.radians(latitude)
+    half_chord = (
+        Power(Sin((Radians(F('latitude')) - latitude_radians) / 2), 2)
+        + math.cos(latitude_radians) * Cos(Radians(F('latitude')))
+        * Power(Sin((Radians(F('longitude')) - math.radians(longitude)) / 2), 2)
+    )
+    distance = 2 * EARTH_RADIUS_KM * ASin(Sqrt(Least(half_chord, Value(1.0))))
+    return queryset.annotate(distance_km=distance).filter(distance_km__lte=radius_km)
+
+
+def parse_near(near, radius_km):
+    """Validate the ?near=lat,lon&radius_km= parameters; raises ValueError"""
+    latitude, longitude = (float(part) for part in near.split(','))
+    radius_km = float(radius_km) if radius_km else settings.GEO_SEARCH['DEFAULT_RADIUS_KM']
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        raise ValueError('coordinates out of range')
+    if not 0 < radius_km <= settings.GEO_SEARCH['MAX_RADIUS_KM']:
+        raise ValueError('radius out of range')
+    return latitude, longitude, radius_km
+
+
+def normalize_place(text):
+    text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode()
+    return ' '.join(re.sub(r'[^\w\s]', ' ', text.lower()).split())
+
+
+class Gazetteer:
+    """Offline place-name lookup loaded from a CSV file.
+
+    Rows are `names,countries,latitude,longitude,population`, with alternate
+    spellings separated by `|`. "City, Country" resolves exactly; a bare or
+    unmatched city name resolves to its most populous match.
+    """
+
+    def __init__(self, path):
+        self.by_place = {}
+        self.by_name = {}
+        with open(path, newline='', encoding='utf-8') as f:
+            for row in csv.reader(line for line in f if line.strip() and not line.startswith('#')):
+                names, countries, latitude, longitude, population = row
+                point, population = (float(latitude), float(longitude)), int(population)
+                for name in map(normalize_place, names.split('|')):
+                    for country in map(normalize_place, countries.split('|')):
+                        self.by_place[(name, country)] = point
+                    if population > self.by_name.get(name, (None, -1))[1]:
+                        self.by_name[name] = (point, population)
+
+    def locate(self, location):
+        """(latitude, longitude) for free-text `location`, or None"""
+        parts = [part for part in map(normalize_place, (location or '').split(',')) if part]
+        if not parts:
+            return None
+        if len(parts) > 1 and (parts[0], parts[-1]) in self.by_place:
+            return self.by_place[(parts[0], parts[-1])]
+        match = self.by_name.get(parts[0])
+        return match[0] if match else None
+
+
+_gazetteer = None
+_gazetteer_lock = threading.Lock()
+
+
+def get_gazetteer():
+    global _gazetteer
+    if _gazetteer is None:
+        with _gazetteer_lock:
+            if _gazetteer is None:
+                _gazetteer = Gazetteer(settings.GEO_SEARCH['GAZETTEER_PATH'])
+    return _gazetteer
+
+
+def geocode_users(batch_size=1000):
+    """Re-resolve every user's coordinates from `location`, in primary-key batches.
+
+    For backfills and after replacing the gazetteer file. Returns the number of
+    users whose coordinates changed.
+    """
+    from .models import User
+
+    changed, last_id = 0, None
+    fields = ['latitude', 'longitude', 'geohash']
+    while True:
+        users = User.objects.order_by('id').only('id', 'location', *fields)
+        if last_id is not None:
+            users = users.filter(id__gt=last_id)
+        batch = list(users[:batch_size])
+        if not batch:
+            return changed
+
+        updated = []
+        for user in batch:
+            before = (user.latitude, user.longitude, user.geohash)
+            user.resolve_location()
+            if (user.latitude, user.longitude, user.geohash) != before:
+                updated.append(user)
+        User.objects.bulk_update(updated, fields)
+        changed += len(updated)
+        last_id = batch[-1].id
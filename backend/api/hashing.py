@@ -0,0 +1,84 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, identify_hasher, make_password
+
+
+class HashingPoolSaturated(Exception):
+    """Raised when the hashing pool cannot take more work; shed the request with a 503"""
+
+
+class HashingPool:
+    """Size-bounded thread pool for password hashing.
+
+    hashlib's PBKDF2 releases the GIL, so worker threads hash on separate
+    cores. At most max_workers + max_queue jobs are admitted; anything beyond
+    that fails fast with HashingPoolSaturated instead of queueing behind a
+    login storm.
+    """
+
+    def __init__(self, max_workers, max_queue, timeout):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='password-hash')
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self.timeout = timeout
+
+    def submit(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HashingPoolSaturated()
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def run(self, fn, *args):
+        """Run `fn` in the pool and block until it finishes (sync views)"""
+        try:
+            return self.submit(fn, *args).result(timeout=self.timeout)
+        except FutureTimeoutError:
+            raise HashingPoolSaturated()
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_hashing_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                config = settings.PASSWORD_HASHING_POOL
+                _pool = HashingPool(config['MAX_WORKERS'], config['MAX_QUEUE'], config['TIMEOUT'])
+    return _pool
+
+
+def hash_password(password):
+    """make_password() run in the hashing pool"""
+    return get_hashing_pool().run(make_password, password)
+
+
+def verify_password(user, password):
+    """Check `password` against `user` (which may be None) in the hashing pool.
+
+    Only the pure hash comparison runs in the pool, so worker threads never
+    open database connections. Hashes from an outdated hasher are upgraded
+    on the calling thread after a successful check.
+    """
+    if user is None:
+        # Hash anyway so unknown emails take as long as known ones
+        hash_password(password)
+        return False
+
+    if not get_hashing_pool().run(check_password, password, user.password):
+        return False
+
+    if identify_hasher(user.password).must_update(user.password):
+        user.password = hash_password(password)
+        user.save(update_fields=['password'])
+    return True
@@ -0,0 +1,150 @@
+import bisect
+import threading
+import time
+from contextvars import ContextVar
+
+# Metrics of the request being sampled on this thread/task, or None
+_current = ContextVar('api_request_metrics', default=None)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class RequestMetrics:
+    """Per-request breakdown collected for sampled requests"""
+
+    def __init__(self):
+        self.query_count = 0
+        self.sql_time = 0.0
+        self.serialization_time = 0.0
+        self._serializing = False
+
+    def record_query(self, execute, sql, params, many, context):
+        """connection.execute_wrapper hook"""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_time += time.perf_counter() - started
+            self.query_count += 1
+
+
+def current_metrics():
+    return _current.get()
+
+
+def start_sampling():
+    """Begin collecting metrics for the current request; returns a token for stop_sampling()"""
+    metrics = RequestMetrics()
+    return metrics, _current.set(metrics)
+
+
+def stop_sampling(token):
+    _current.reset(token)
+
+
+def install_serialization_timer():
+    """Time DRF serializer `.data` for sampled requests.
+
+    Every Serializer/ListSerializer `.data` goes through BaseSerializer.data via
+    super(), so wrapping that one property covers all serializers. Nested
+    serializers are only timed at the outermost level.
+    """
+    from rest_framework.serializers import BaseSerializer
+
+    original = BaseSerializer.data.fget
+    if getattr(original, 'is_timed', False):
+        return
+
+    def data(self):
+        metrics = _current.get()
+        if metrics is None or metrics._serializing:
+            return original(self)
+        metrics._serializing = True
+        started = time.perf_counter()
+        try:
+            return original(self)
+        finally:
+            metrics.serialization_time += time.perf_counter() - started
+            metrics._serializing = False
+
+    data.is_timed = True
+    BaseSerializer.data = property(data)
+
+
+class RouteStats:
+    def __init__(self):
+        self.bucket_counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.latency_sum = 0.0
+        self.sampled = 0
+        self.queries = 0
+        self.sql_seconds = 0.0
+        self.serialization_seconds = 0.0
+        self.response_bytes = 0
+
+
+class MetricsRegistry:
+    """In-process per-route latency histograms and sampled breakdown counters"""
+
+    def __init__(self):
+        self._routes = {}
+        self._lock = threading.Lock()
+
+    def observe(self, route, status_code, wall_time, metrics=None, response_bytes=0):
+        key = (route, status_code // 100)
+        bucket = bisect.bisect_left(LATENCY_BUCKETS, wall_time)
+        with self._lock:
+            stats = self._routes.get(key)
+            if stats is None:
+                stats = self._routes[key] = RouteStats()
+            stats.bucket_counts[bucket] += 1
+            stats.count += 1
+            stats.latency_sum += wall_time
+            if metrics is not None:
+                stats.sampled += 1
+                stats.queries += metrics.query_count
+                stats.sql_seconds += metrics.sql_time
+                stats.serialization_seconds += metrics.serialization_time
+                stats.response_bytes += response_bytes
+
+    def render_prometheus(self):
+        """Prometheus text exposition format (version 0.0.4)"""
+        with self._lock:
+            routes = sorted(self._routes.items())
+            snapshot = [(key, list(stats.bucket_counts), vars(stats).copy()) for key, stats in routes]
+
+        lines = [
+            '# HELP api_request_duration_seconds Wall time of API requests.',
+            '# TYPE api_request_duration_seconds histogram',
+        ]
+        for (route, status_class), bucket_counts, stats in snapshot:
+            labels = f'route="{route}",status="{status_class}xx"'
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, bucket_counts):
+                cumulative += count
+                lines.append(f'api_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'api_request_duration_seconds_bucket{{{labels},le="+Inf"}} {stats["count"]}')
+            lines.append(f'api_request_duration_seconds_sum{{{labels}}} {stats["latency_sum"]:.6f}')
+            lines.append(f'api_request_duration_seconds_count{{{labels}}} {stats["count"]}')
+
+        counters = [
+            ('api_sampled_requests_total', 'sampled', 'Requests with a detailed breakdown.'),
+            ('api_sql_queries_total', 'queries', 'SQL queries issued by sampled requests.'),
+            ('api_sql_seconds_total', 'sql_seconds', 'SQL time of sampled requests.'),
+            ('api_serialization_seconds_total', 'serialization_seconds', 'Serializer time of sampled requests.'),
+            ('api_response_bytes_total', 'response_bytes', 'Response body bytes of sampled requests.'),
+        ]
+        for name, field, description in counters:
+            lines.append(f'# HELP {name} {description}')
+            lines.append(f'# TYPE {name} counter')
+            for (route, status_class), _, stats in snapshot:
+                lines.append(f'{name}{{route="{route}",status="{status_class}xx"}} {stats[field]}')
+
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+
+
+registry = MetricsRegistry()
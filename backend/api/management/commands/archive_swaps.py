@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from api.archival import archive_terminal_swaps
+
+
+class Command(BaseCommand):
+    help = 'Move old rejected/cancelled/withdrawn swap requests to the archive table in small batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-days', type=int, default=None, help='Defaults to SWAP_ARCHIVAL["AFTER_DAYS"]')
+        parser.add_argument('--batch-size', type=int, default=None)
+        parser.add_argument('--pause', type=float, default=0.0, help='Seconds to sleep between batches')
+
+    def handle(self, *args, **options):
+        archived = archive_terminal_swaps(
+            older_than_days=options['older_than_days'], batch_size=options['batch_size'], pause=options['pause']
+        )
+        self.stdout.write(self.style.SUCCESS(f'Archived {archived} swap requests'))
@@ -0,0 +1,53 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.contrib.auth.hashers import make_password, check_password
+from django.core.management.base import BaseCommand
+from api.hashing import HashingPool, HashingPoolSaturated
+
+
+class Command(BaseCommand):
+    help = 'Benchmark password-check (login) throughput of the hashing pool against worker count'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=64, help='Logins attempted per worker count')
+        parser.add_argument('--clients', type=int, default=32, help='Concurrent client threads')
+        parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1)
+        parser.add_argument('--max-queue', type=int, default=64)
+
+    def handle(self, *args, **options):
+        encoded = make_password('benchmark-password')
+        self.stdout.write(f"{'workers':>8} {'logins/s':>10} {'p50 ms':>8} {'p99 ms':>8} {'shed':>6}")
+
+        # Powers of two up to the core count, plus the core count itself
+        max_workers = options['max_workers']
+        for workers in sorted({min(2 ** i, max_workers) for i in range(max_workers.bit_length() + 1)}):
+            self.report(workers, encoded, options)
+
+    def report(self, workers, encoded, options):
+        pool = HashingPool(workers, options['max_queue'], timeout=60)
+        latencies = []
+        shed = 0
+
+        def login(_):
+            nonlocal shed
+            started = time.perf_counter()
+            try:
+                pool.run(check_password, 'benchmark-password', encoded)
+            except HashingPoolSaturated:
+                shed += 1
+                return
+            latencies.append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['clients']) as clients:
+            list(clients.map(login, range(options['logins'])))
+        elapsed = time.perf_counter() - started
+        pool.shutdown()
+
+        latencies.sort()
+        p50 = latencies[len(latencies) // 2] if latencies else 0
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] if latencies else 0
+        self.stdout.write(
+            f'{workers:>8} {len(latencies) / elapsed:>10.1f} {p50:>8.1f} {p99:>8.1f} {shed:>6}'
+        )
@@ -0,0 +1,103 @@
+import json
+import os
+import subprocess
+import sys
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Runs in a fresh interpreter under -X importtime: cold start up to a loaded
+# URLconf, then requests that pass every middleware but stop at authentication
+CHILD = '''
+import json, statistics, sys, time
+started = time.perf_counter()
+import django
+django.setup()
+from django.core.wsgi import get_wsgi_application
+from django.urls import get_resolver
+get_wsgi_application()
+get_resolver().url_patterns
+startup = time.perf_counter() - started
+
+from django.test import Client
+client = Client(HTTP_HOST='localhost')
+timings = []
+for _ in range(int(sys.argv[1])):
+    request_started = time.perf_counter()
+    client.get('/api/users/me/')
+    timings.append(time.perf_counter() - request_started)
+print(json.dumps({
+    'startup_ms': startup * 1000,
+    'request_us': statistics.median(timings) * 1e6 if timings else 0,
+    'modules': len(sys.modules),
+}))
+'''
+
+
+def parse_importtime(stderr):
+    """(total self time in ms, [(cumulative ms, top-level module)]) from -X importtime output"""
+    total_us, top_level = 0, []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # Header line
+        total_us += int(fields[0])
+        name = fields[2].rstrip()
+        if not name.startswith('  '):  # importtime indents nested imports by two spaces per level
+            top_level.append((int(fields[1]) / 1000, name.strip()))
+    return total_us / 1000, sorted(top_level, reverse=True)
+
+
+class Command(BaseCommand):
+    help = 'Benchmark worker cold start (-X importtime) and per-request middleware overhead per settings module'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--settings-modules', default='core.settings,core.settings_api',
+            help='Comma-separated settings modules to compare',
+        )
+        parser.add_argument('--runs', type=int, default=3, help='Fresh interpreters per module; the fastest run is reported')
+        parser.add_argument('--requests', type=int, default=200, help='Requests timed per run')
+        parser.add_argument('--top', type=int, default=5, help='Slowest top-level imports to list per module')
+        parser.add_argument('--json', dest='json_path', default=None, help='Also write the results here, for tracking in CI')
+        parser.add_argument(
+            '--max-startup-ms', type=float, default=None,
+            help='Fail if any module starts slower than this (a CI budget)',
+        )
+
+    def handle(self, *args, **options):
+        results = {}
+        self.stdout.write(f"{'settings':<22} {'startup ms':>11} {'imports ms':>11} {'modules':>8} {'req us':>8}")
+        for module in filter(None, (name.strip() for name in options['settings_modules'].split(','))):
+            runs = [self.run_child(module, options['requests']) for _ in range(options['runs'])]
+            best = min(runs, key=lambda run: run['startup_ms'])
+            best['request_us'] = min(run['request_us'] for run in runs)
+            results[module] = best
+            self.stdout.write(
+                f"{module:<22} {best['startup_ms']:>11.1f} {best['import_ms']:>11.1f} "
+                f"{best['modules']:>8} {best['request_us']:>8.0f}"
+            )
+            for cumulative_ms, name in best['slowest_imports'][:options['top']]:
+                self.stdout.write(f'    {cumulative_ms:>9.1f} ms  {name}')
+
+        if options['json_path']:
+            with open(options['json_path'], 'w') as f:
+                json.dump(results, f, indent=2)
+
+        budget = options['max_startup_ms']
+        over = [module for module, result in results.items() if budget is not None and result['startup_ms'] > budget]
+        if over:
+            raise CommandError(f'Startup over {budget:.0f} ms budget: {", ".join(over)}')
+
+    def run_child(self, module, requests):
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': module}
+        completed = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', CHILD, str(requests)],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+        )
+        if completed.returncode != 0:
+            raise CommandError(f'{module} failed to start:\n{completed.stderr[-2000:]}')
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        result['import_ms'], result['slowest_imports'] = parse_importtime(completed.stderr)
+        return result
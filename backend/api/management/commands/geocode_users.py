@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from api.geo import geocode_users
+
+
+class Command(BaseCommand):
+    help = 'Resolve user locations to coordinates with the offline gazetteer (backfill or after updating it)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        changed = geocode_users(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Updated coordinates of {changed} users'))
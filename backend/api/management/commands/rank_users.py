@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from api.ranking import rank_users
+
+
+class Command(BaseCommand):
+    help = 'Recompute the public directory ranking (run periodically, e.g. every 15 minutes)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        scored = rank_users(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Scored {scored} users'))
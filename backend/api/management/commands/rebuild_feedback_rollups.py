@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from api.feedback_stats import rebuild_feedback_rollups
+
+
+class Command(BaseCommand):
+    help = 'Recompute the feedback rating rollups from scratch (after bulk loads or manual feedback edits)'
+
+    def handle(self, *args, **options):
+        counted = rebuild_feedback_rollups()
+        self.stdout.write(self.style.SUCCESS(f'Rolled up {counted} feedback'))
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand, CommandError
+from api.replay import DEFAULT_MIX, HttpClient, InProcessClient, ReplayContext, parse_mix, replay, summarize
+
+
+class Command(BaseCommand):
+    help = 'Replay a weighted mix of API requests and report throughput and latency percentiles per route'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--duration', type=float, default=30.0, help='Seconds to run for')
+        parser.add_argument('--requests', type=int, default=None, help='Stop after this many requests instead')
+        parser.add_argument('--concurrency', type=int, default=8, help='Concurrent client threads')
+        parser.add_argument('--users', type=int, default=50, help='Distinct users to sign in as')
+        parser.add_argument(
+            '--mix', default='',
+            help='Route weights as name=weight,...; 0 drops a route. Routes: ' + ', '.join(
+                f'{route.name}={route.weight}' for route in DEFAULT_MIX
+            ),
+        )
+        parser.add_argument(
+            '--base-url', default=None,
+            help='Send requests to a running server (e.g. http://localhost:8000) instead of in-process; '
+                 'it must use this database and SECRET_KEY',
+        )
+        parser.add_argument('--seed', type=int, default=None, help='Random seed, for a reproducible request sequence')
+
+    def handle(self, *args, **options):
+        try:
+            mix = parse_mix(options['mix'])
+            context = ReplayContext(users=options['users'])
+        except ValueError as e:
+            raise CommandError(str(e))
+        if not mix:
+            raise CommandError('Every route has weight 0')
+
+        base_url = options['base_url']
+        make_client = (lambda: HttpClient(base_url)) if base_url else InProcessClient
+        duration = options['duration'] if options['requests'] is None else float('inf')
+        elapsed, results = replay(
+            make_client, context, mix,
+            concurrency=options['concurrency'],
+            duration=duration,
+            max_requests=options['requests'],
+            seed=options['seed'],
+        )
+
+        self.stdout.write(f"{'route':<24} {'requests':>9} {'errors':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+        for name, count, errors, rate, p50, p95, p99 in summarize(elapsed, results):
+            self.stdout.write(f'{name:<24} {count:>9} {errors:>7} {rate:>8.1f} {p50:>8.1f} {p95:>8.1f} {p99:>8.1f}')
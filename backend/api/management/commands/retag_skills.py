@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from api.taxonomy import retag_skills
+
+
+class Command(BaseCommand):
+    help = 'Re-resolve skill names to taxonomy tags (after adding aliases or merging tags)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        changed = retag_skills(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Updated the tag of {changed} skills'))
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from api.feedback_stats import rebuild_feedback_rollups
+from api.ranking import rank_users
+from api.seeding import SEED_PASSWORD, seed_perf_data
+
+
+class Command(BaseCommand):
+    help = 'Fill the database with synthetic users, skills, swaps and feedback for load testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--skills-per-user', type=int, default=3, help='Average; about a third are Wanted')
+        parser.add_argument('--swaps-per-user', type=int, default=4, help='Average swaps sent per user')
+        parser.add_argument('--days', type=int, default=365, help='Spread sign-ups and activity over this many past days')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Users per transaction')
+        parser.add_argument('--seed', type=int, default=None, help='Random seed, for reproducible data sets')
+        parser.add_argument('--no-rank', action='store_true', help='Skip scoring the new users for the directory')
+
+    def handle(self, *args, **options):
+        counts = seed_perf_data(
+            users=options['users'],
+            skills_per_user=options['skills_per_user'],
+            swaps_per_user=options['swaps_per_user'],
+            days=options['days'],
+            batch_size=options['batch_size'],
+            seed=options['seed'],
+        )
+        for model, count in counts.items():
+            self.stdout.write(f'{model:>18} {count:>9}')
+        # Feedback went in with bulk_create too, bypassing the receivers that keep the rating rollups
+        self.stdout.write(f'Rolled up {rebuild_feedback_rollups()} feedback')
+        if not options['no_rank']:
+            # bulk_create skips the signal that gives new users a directory score
+            self.stdout.write(f'Ranked {rank_users()} users')
+        self.stdout.write(self.style.SUCCESS(f'Seeded {counts["User"]} users (password "{SEED_PASSWORD}")'))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from api.credits import take_balance_snapshots
+
+
+class Command(BaseCommand):
+    help = 'Snapshot credit ledger balances so history queries only read entries after the latest snapshot'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--settle-seconds', type=int, default=None,
+                            help='Skip transactions younger than this (defaults to CREDIT_SNAPSHOT_SETTLE_SECONDS)')
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        written = take_balance_snapshots(
+            settle_seconds=options['settle_seconds'],
+            batch_size=options['batch_size']
+        )
+        self.stdout.write(self.style.SUCCESS(f'Wrote {written} credit balance snapshots'))
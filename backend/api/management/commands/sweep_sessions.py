@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from api.tokens import sweep_expired_sessions
+
+
+class Command(BaseCommand):
+    help = 'Delete expired sessions in small batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--pause', type=float, default=0.0, help='Seconds to sleep between batches')
+
+    def handle(self, *args, **options):
+        deleted = sweep_expired_sessions(batch_size=options['batch_size'], pause=options['pause'])
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} expired sessions'))
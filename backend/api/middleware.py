@@ -0,0 +1,150 @@
+import random
+import re
+import time
+import uuid
+from contextlib import ExitStack
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from .instrumentation import registry, start_sampling, stop_sampling
+from .profiling import capture, profiling_admin, requested_engine, should_sample
+from .querywatch import QueryInspector
+from .replicas import PIN_COOKIE, PIN_HEADER
+
+
+_REQUEST_ID = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+
+
+def route_label(request):
+    """Low-cardinality route name for metrics"""
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match else 'unmatched'
+
+
+class RequestIdMiddleware:
+    """Tag each request with an id (the client's X-Request-ID if well-formed) and
+    its start time, and echo the id back so logs and clients can be correlated."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.started_at = time.perf_counter()
+        supplied = request.headers.get('X-Request-ID', '')
+        request.request_id = supplied if _REQUEST_ID.match(supplied) else uuid.uuid4().hex
+        response = self.get_response(request)
+        response['X-Request-ID'] = request.request_id
+        return response
+
+
+class PerformanceMiddleware:
+    """Record wall time per route for every request, and a query/serialization
+    breakdown (exposed as Server-Timing) for a sampled fraction of them."""
+
+    def __init__(self, get_response):
+        config = settings.PERFORMANCE_INSTRUMENTATION
+        if not config['ENABLED']:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.sample_rate = config['SAMPLE_RATE']
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            response = self.get_response(request)
+            registry.observe(route_label(request), response.status_code, time.perf_counter() - started)
+            return response
+
+        metrics, token = start_sampling()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(metrics.record_query))
+                response = self.get_response(request)
+        finally:
+            stop_sampling(token)
+
+        wall_time = time.perf_counter() - started
+        response_bytes = 0 if response.streaming else len(response.content)
+        registry.observe(route_label(request), response.status_code, wall_time, metrics, response_bytes)
+
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={metrics.sql_time * 1000:.2f};desc="{metrics.query_count} queries"',
+            f'serialize;dur={metrics.serialization_time * 1000:.2f}',
+            f'total;dur={wall_time * 1000:.2f}',
+            f'resp;desc="{response_bytes} bytes"',
+        ])
+        return response
+
+
+class QueryInspectionMiddleware:
+    """Flag repeated query shapes (N+1 patterns) and EXPLAIN slow queries for a
+    sampled fraction of requests, logged as structured JSON to 'api.querywatch'."""
+
+    def __init__(self, get_response):
+        config = settings.QUERY_INSPECTION
+        if not config['ENABLED']:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.sample_rate = config['SAMPLE_RATE']
+        self.repeat_threshold = config['REPEAT_THRESHOLD']
+        self.slow_query_seconds = config['SLOW_QUERY_MS'] / 1000
+        self.explain = config['EXPLAIN']
+
+    def __call__(self, request):
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            return self.get_response(request)
+
+        inspector = QueryInspector(self.repeat_threshold, self.slow_query_seconds)
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(inspector))
+            response = self.get_response(request)
+
+        inspector.report({
+            'method': request.method,
+            'path': request.path,
+            'view': route_label(request),
+            'status': response.status_code,
+        }, explain=self.explain)
+        return response
+
+
+class ReadYourWritesMiddleware:
+    """After a successful write, mark the client (cookie, mirrored in a header for
+    clients without cookies) so its reads skip replicas for STICKY_SECONDS."""
+
+    def __init__(self, get_response):
+        if not settings.READ_REPLICAS['ALIASES']:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.sticky_seconds = settings.READ_REPLICAS['STICKY_SECONDS']
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if request.method not in ('GET', 'HEAD', 'OPTIONS') and response.status_code < 400:
+            pin_until = f'{time.time() + self.sticky_seconds:.3f}'
+            response.set_cookie(PIN_COOKIE, pin_until, max_age=self.sticky_seconds, httponly=True, samesite='Lax')
+            response[PIN_HEADER] = pin_until
+        return response
+
+
+class ProfilingMiddleware:
+    """Profile a whole request on demand: admins send X-Profile (or ?profile=1)
+    and get X-Profile-ID back; the profile is listed and downloaded under
+    /api/admin/profiles/. SAMPLE_RATE also profiles a fraction of all requests."""
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_PROFILING['ENABLED']:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        engine = requested_engine(request)
+        if engine is not None:
+            admin = profiling_admin(request)
+            if admin is not None:
+                return capture(request, self.get_response, engine, requested_by=admin)
+        elif should_sample():
+            return capture(request, self.get_response, 'cprofile')
+        return self.get_response(request)
@@ -0,0 +1,31 @@
+# Generated by Django 5.0.2 on 2026-10-19 09:46
+
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_credit_ledger'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SkillVerification',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('source', models.CharField(choices=[('Peer', 'Peer'), ('Feedback', 'Feedback')], max_length=10)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('skill', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='verifications', to='api.skill')),
+                ('verifier', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='skill_verifications', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='skillverification',
+            constraint=models.UniqueConstraint(fields=('skill', 'verifier'), name='unique_skill_verifier'),
+        ),
+    ]
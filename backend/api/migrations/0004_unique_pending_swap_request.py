@@ -0,0 +1,36 @@
+# Generated by Django 5.0.2 on 2026-10-19 09:47
+
+from django.db import migrations, models
+
+
+def withdraw_duplicate_pending_requests(apps, schema_editor):
+    db_alias = schema_editor.connection.alias
+    # Keep the newest of each identical pending request so the unique index can be built
+    SwapRequest = apps.get_model('api', 'SwapRequest')
+    seen = set()
+    duplicate_ids = []
+    pending = SwapRequest.objects.using(db_alias).filter(status='Pending').order_by('-created_at').values_list(
+        'id', 'sender_id', 'receiver_id', 'offered_skill_id', 'requested_skill_id'
+    )
+    for swap_id, *key in pending.iterator():
+        key = tuple(key)
+        if key in seen:
+            duplicate_ids.append(swap_id)
+        else:
+            seen.add(key)
+    SwapRequest.objects.using(db_alias).filter(id__in=duplicate_ids).update(status='Withdrawn')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_skill_verification'),
+    ]
+
+    operations = [
+        migrations.RunPython(withdraw_duplicate_pending_requests, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='swaprequest',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'Pending')), fields=('sender', 'receiver', 'offered_skill', 'requested_skill'), name='unique_pending_swap_request'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+from django.db import migrations, models
+
+
+def delete_sessions(apps, schema_editor):
+    db_alias = schema_editor.connection.alias
+    # Nothing wrote sessions before this migration; clear any stray rows so the unique hash can be added
+    apps.get_model('api', 'Session').objects.using(db_alias).all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_unique_pending_swap_request'),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_sessions, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='session',
+            name='access_token',
+        ),
+        migrations.RemoveField(
+            model_name='session',
+            name='refresh_token',
+        ),
+        migrations.AddField(
+            model_name='session',
+            name='refresh_jti_hash',
+            field=models.CharField(default='', max_length=64, unique=True),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='session',
+            name='revoked_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='session',
+            name='expires_at',
+            field=models.DateTimeField(db_index=True),
+        ),
+    ]
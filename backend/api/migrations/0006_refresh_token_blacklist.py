@@ -0,0 +1,23 @@
+# Generated by Django 5.0.2 on 2026-10-19 09:56
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_session_jti'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BlacklistedRefreshToken',
+            fields=[
+                ('jti_hash', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('blacklisted_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='blacklisted_tokens', to='api.session')),
+            ],
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.0.2 on 2026-10-19 09:58
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_refresh_token_blacklist'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Notification',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('SwapRequested', 'Swap Requested'), ('SwapAccepted', 'Swap Accepted'), ('SwapRejected', 'Swap Rejected'), ('SwapCancelled', 'Swap Cancelled'), ('FeedbackReceived', 'Feedback Received')], max_length=20)),
+                ('read_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('actor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('swap_request', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='notifications', to='api.swaprequest')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'id'], name='notification_user_cursor_idx'), models.Index(condition=models.Q(('read_at__isnull', True)), fields=['user', 'id'], name='notification_unread_idx')],
+            },
+        ),
+    ]
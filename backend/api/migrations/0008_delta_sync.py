@@ -0,0 +1,53 @@
+# Generated by Django 5.0.2 on 2026-10-19 10:00
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_skill_updated_at(apps, schema_editor):
+    db_alias = schema_editor.connection.alias
+    # Existing rows would otherwise all look changed at migration time
+    apps.get_model('api', 'Skill').objects.using(db_alias).update(updated_at=F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_notifications'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('user_id', models.UUIDField()),
+                ('entity', models.CharField(choices=[('Skill', 'Skill'), ('SwapRequest', 'Swap Request')], max_length=20)),
+                ('object_id', models.UUIDField()),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='skill',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(backfill_skill_updated_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='skill',
+            index=models.Index(fields=['user', 'updated_at'], name='skill_user_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='swaprequest',
+            index=models.Index(fields=['sender', 'updated_at'], name='swap_sender_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='swaprequest',
+            index=models.Index(fields=['receiver', 'updated_at'], name='swap_receiver_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tombstone',
+            index=models.Index(fields=['user_id', 'deleted_at'], name='tombstone_user_deleted_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.2 on 2026-10-19 10:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_delta_sync'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='version',
+            field=models.PositiveBigIntegerField(default=1),
+        ),
+    ]
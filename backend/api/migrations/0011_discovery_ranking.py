@@ -0,0 +1,43 @@
+# Generated by Django 5.0.2 on 2026-10-19 10:07
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def seed_scores(apps, schema_editor):
+    db_alias = schema_editor.connection.alias
+    # Keep existing users in the directory until the first `rank_users` run scores them
+    User = apps.get_model('api', 'User')
+    DiscoveryScore = apps.get_model('api', 'DiscoveryScore')
+    listed = User.objects.using(db_alias).filter(is_public=True, is_active=True, is_banned=False).values_list('id', flat=True)
+    DiscoveryScore.objects.using(db_alias).bulk_create(
+        (DiscoveryScore(user_id=user_id, score=0) for user_id in listed.iterator()), batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_user_geolocation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DiscoveryScore',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='discovery_score', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('score', models.FloatField()),
+                ('average_rating', models.FloatField(blank=True, null=True)),
+                ('feedback_count', models.IntegerField(default=0)),
+                ('verified_skill_count', models.IntegerField(default=0)),
+                ('recent_completions', models.IntegerField(default=0)),
+                ('computed_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-score', 'user'], name='discovery_score_rank_idx')],
+            },
+        ),
+        migrations.RunPython(seed_scores, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,85 @@
+# Generated by Django 5.0.2 on 2026-10-19 10:11
+
+import csv
+import re
+import unicodedata
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+# Frozen copies of api.taxonomy's normalizer and seed reader as of this
+# migration, so later changes to them don't change what it writes
+_SEPARATORS = re.compile(r'[^\w+#./]+')
+
+
+def normalize_skill_name(name):
+    text = unicodedata.normalize('NFKC', name or '').casefold()
+    return ' '.join(word for word in (token.strip('.') for token in _SEPARATORS.split(text)) if word)
+
+
+def read_taxonomy(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.reader((line for line in f if line.strip() and not line.startswith('#')), delimiter='|'):
+            names = [name.strip() for name in row if name.strip()]
+            if names:
+                yield names
+
+
+def seed_taxonomy(apps, schema_editor):
+    db_alias = schema_editor.connection.alias
+    SkillTag = apps.get_model('api', 'SkillTag')
+    SkillTagAlias = apps.get_model('api', 'SkillTagAlias')
+    Skill = apps.get_model('api', 'Skill')
+
+    tag_ids = {}  # alias -> tag id
+    for names in read_taxonomy(settings.TAXONOMY['PATH']):
+        tag = SkillTag.objects.using(db_alias).create(name=names[0])
+        for alias in map(normalize_skill_name, names):
+            if alias and alias not in tag_ids:
+                tag_ids[alias] = tag.id
+                SkillTagAlias.objects.using(db_alias).create(name=alias, tag=tag)
+
+    # Existing names take the tag of a matching alias, or become a tag of their own
+    for name in Skill.objects.using(db_alias).order_by().values_list('name', flat=True).distinct():
+        alias = normalize_skill_name(name)
+        if not alias:
+            continue
+        if alias not in tag_ids:
+            tag = SkillTag.objects.using(db_alias).create(name=name.strip())
+            SkillTagAlias.objects.using(db_alias).create(name=alias, tag=tag)
+            tag_ids[alias] = tag.id
+        Skill.objects.using(db_alias).filter(name=name).update(tag_id=tag_ids[alias])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_discovery_ranking'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SkillTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='skill',
+            name='tag',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='skills', to='api.skilltag'),
+        ),
+        migrations.CreateModel(
+            name='SkillTagAlias',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='aliases', to='api.skilltag')),
+            ],
+        ),
+        migrations.RunPython(seed_taxonomy, migrations.RunPython.noop),
+    ]
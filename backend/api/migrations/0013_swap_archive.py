@@ -0,0 +1,52 @@
+# Generated by Django 5.0.2 on 2026-10-19 10:18
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_skill_taxonomy'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedSwapRequest',
+            fields=[
+                ('id', models.UUIDField(editable=False, primary_key=True, serialize=False)),
+                ('offered_skill_id', models.UUIDField()),
+                ('offered_skill_name', models.CharField(max_length=255)),
+                ('requested_skill_id', models.UUIDField()),
+                ('requested_skill_name', models.CharField(max_length=255)),
+                ('message', models.TextField(blank=True, null=True)),
+                ('status', models.CharField(choices=[('Pending', 'Pending'), ('Accepted', 'Accepted'), ('Rejected', 'Rejected'), ('Completed', 'Completed'), ('Cancelled', 'Cancelled'), ('Withdrawn', 'Withdrawn')], max_length=10)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='swaprequest',
+            index=models.Index(fields=['status', 'updated_at'], name='swap_status_updated_idx'),
+        ),
+        migrations.AddField(
+            model_name='archivedswaprequest',
+            name='receiver',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='archivedswaprequest',
+            name='sender',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='archivedswaprequest',
+            index=models.Index(fields=['sender', 'updated_at'], name='archived_swap_sender_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedswaprequest',
+            index=models.Index(fields=['receiver', 'updated_at'], name='archived_swap_receiver_idx'),
+        ),
+    ]
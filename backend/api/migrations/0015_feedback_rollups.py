@@ -0,0 +1,122 @@
+# Generated by Django 5.0.2 on 2026-10-19 10:30
+
+from collections import defaultdict
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill_rollups(apps, schema_editor):
+    db_alias = schema_editor.connection.alias
+    Feedback = apps.get_model('api', 'Feedback')
+    rollups = {name: apps.get_model('api', name) for name in (
+        'UserRatingRollup', 'UserMonthlyRatingRollup', 'SkillTagRatingRollup', 'DailyRatingRollup'
+    )}
+    totals = {name: defaultdict(lambda: defaultdict(int)) for name in rollups}
+    rows = Feedback.objects.using(db_alias).filter(rating__gte=1, rating__lte=5).values_list(
+        'rating', 'expectations_matched', 'skill_verified_by_peer', 'rated_user_id', 'rater_id', 'created_at',
+        'swap_request__sender_id', 'swap_request__requested_skill__tag_id', 'swap_request__offered_skill__tag_id',
+    )
+    for rating, matched, verified, rated_user_id, rater_id, created_at, sender_id, requested_tag, offered_tag in rows.iterator():
+        day = timezone.localdate(created_at)
+        tag_id = requested_tag if rater_id == sender_id else offered_tag
+        keys = [
+            ('UserRatingRollup', (('user_id', rated_user_id),)),
+            ('UserMonthlyRatingRollup', (('user_id', rated_user_id), ('month', day.replace(day=1)))),
+            ('DailyRatingRollup', (('day', day),)),
+        ]
+        if tag_id is not None:
+            keys.append(('SkillTagRatingRollup', (('tag_id', tag_id),)))
+        for name, key in keys:
+            counts = totals[name][key]
+            counts[f'rating_{rating}'] += 1
+            counts['expectations_matched'] += int(bool(matched))
+            counts['peer_verified'] += int(verified is True)
+            counts['peer_answered'] += int(verified is not None)
+    for name, model in rollups.items():
+        model.objects.using(db_alias).bulk_create(
+            (model(**dict(key), **counts) for key, counts in totals[name].items()), batch_size=1000
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_request_profiles'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyRatingRollup',
+            fields=[
+                ('rating_1', models.IntegerField(default=0)),
+                ('rating_2', models.IntegerField(default=0)),
+                ('rating_3', models.IntegerField(default=0)),
+                ('rating_4', models.IntegerField(default=0)),
+                ('rating_5', models.IntegerField(default=0)),
+                ('expectations_matched', models.IntegerField(default=0)),
+                ('peer_verified', models.IntegerField(default=0)),
+                ('peer_answered', models.IntegerField(default=0)),
+                ('day', models.DateField(primary_key=True, serialize=False)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='SkillTagRatingRollup',
+            fields=[
+                ('rating_1', models.IntegerField(default=0)),
+                ('rating_2', models.IntegerField(default=0)),
+                ('rating_3', models.IntegerField(default=0)),
+                ('rating_4', models.IntegerField(default=0)),
+                ('rating_5', models.IntegerField(default=0)),
+                ('expectations_matched', models.IntegerField(default=0)),
+                ('peer_verified', models.IntegerField(default=0)),
+                ('peer_answered', models.IntegerField(default=0)),
+                ('tag', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rating_rollup', serialize=False, to='api.skilltag')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='UserRatingRollup',
+            fields=[
+                ('rating_1', models.IntegerField(default=0)),
+                ('rating_2', models.IntegerField(default=0)),
+                ('rating_3', models.IntegerField(default=0)),
+                ('rating_4', models.IntegerField(default=0)),
+                ('rating_5', models.IntegerField(default=0)),
+                ('expectations_matched', models.IntegerField(default=0)),
+                ('peer_verified', models.IntegerField(default=0)),
+                ('peer_answered', models.IntegerField(default=0)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rating_rollup', serialize=False, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='UserMonthlyRatingRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rating_1', models.IntegerField(default=0)),
+                ('rating_2', models.IntegerField(default=0)),
+                ('rating_3', models.IntegerField(default=0)),
+                ('rating_4', models.IntegerField(default=0)),
+                ('rating_5', models.IntegerField(default=0)),
+                ('expectations_matched', models.IntegerField(default=0)),
+                ('peer_verified', models.IntegerField(default=0)),
+                ('peer_answered', models.IntegerField(default=0)),
+                ('month', models.DateField()),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='usermonthlyratingrollup',
+            constraint=models.UniqueConstraint(fields=('user', 'month'), name='user_month_rating_rollup_unique'),
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -1,19 +1,26 @@
 import uuid
 from django.db import models
+from django.db.models import F
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 from django.utils import timezone
 from django.core.validators import URLValidator
 from django.core.exceptions import ValidationError # For potential JSONField validation if needed
+from .geo import get_gazetteer, geohash_encode
+from .taxonomy import normalize_skill_name, skill_tags
 
 
 # Custom User Manager for handling user creation
 class CustomUserManager(BaseUserManager):
-    def create_user(self, email, password=None, **extra_fields):
+    def create_user(self, email, password=None, password_hash=None, **extra_fields):
         if not email:
             raise ValueError('The Email field must be set')
         email = self.normalize_email(email)
         user = self.model(email=email, **extra_fields)
-        user.set_password(password)
+        if password_hash is not None:
+            # Already hashed off the request thread (see api.hashing)
+            user.password = password_hash
+        else:
+            user.set_password(password)
         user.save(using=self._db)
         return user
 
@@ -46,6 +53,10 @@ class User(AbstractBaseUser, PermissionsMixin):
     password = models.CharField(max_length=255) # Stores password hash
     name = models.CharField(max_length=255, null=True, blank=True)
     location = models.CharField(max_length=255, null=True, blank=True)
+    # Resolved from `location` with the offline gazetteer on save (see api.geo)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    geohash = models.CharField(max_length=12, null=True, blank=True, db_index=True)
     profile_photo_url = models.URLField(max_length=255, null=True, blank=True)
     is_public = models.BooleanField(default=True)
 
@@ -69,6 +80,8 @@ class User(AbstractBaseUser, PermissionsMixin):
     credits = models.IntegerField(default=0)
     date_joined = models.DateTimeField(default=timezone.now)
     last_login = models.DateTimeField(null=True, blank=True)
+    # Bumped whenever the profile, the user's skills or feedback about them change; feeds ETags
+    version = models.PositiveBigIntegerField(default=1)
 
     # Django specific fields for admin panel and permissions
     is_staff = models.BooleanField(default=False) # Can access Django admin
@@ -82,6 +95,29 @@ class User(AbstractBaseUser, PermissionsMixin):
     def __str__(self):
         return self.email
 
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'location' in update_fields:
+            self.resolve_location()
+            if update_fields is not None:
+                update_fields = kwargs['update_fields'] = {*update_fields, 'latitude', 'longitude', 'geohash'}
+
+        if self._state.adding:
+            super().save(*args, **kwargs)
+            return
+        # Incremented in SQL so concurrent writers never hand out the same version twice
+        self.version = F('version') + 1
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'version'}
+        super().save(*args, **kwargs)
+        self.refresh_from_db(fields=['version'])
+
+    def resolve_location(self):
+        """Set latitude/longitude/geohash from the free-text location"""
+        point = get_gazetteer().locate(self.location)
+        self.latitude, self.longitude = point or (None, None)
+        self.geohash = geohash_encode(*point) if point else None
+
     def get_full_name(self):
         return self.name if self.name else self.email
 
@@ -89,6 +125,28 @@ class User(AbstractBaseUser, PermissionsMixin):
         return self.name if self.name else self.email
 
 
+# SkillTag Model (canonical skill that free-text skill names resolve to)
+class SkillTag(models.Model):
+    name = models.CharField(max_length=255)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return self.name
+
+
+# SkillTagAlias Model (normalized spelling or synonym of a tag; the tag's own name is one too)
+class SkillTagAlias(models.Model):
+    tag = models.ForeignKey(SkillTag, on_delete=models.CASCADE, related_name='aliases')
+    name = models.CharField(max_length=255, unique=True)
+
+    def save(self, *args, **kwargs):
+        self.name = normalize_skill_name(self.name)
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.name} -> {self.tag.name}"
+
+
 # Skill Model
 class Skill(models.Model):
     SKILL_TYPE_CHOICES = [
@@ -104,6 +162,7 @@ class Skill(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='skills')
     name = models.CharField(max_length=255)
+    tag = models.ForeignKey(SkillTag, on_delete=models.PROTECT, null=True, blank=True, related_name='skills')  # Resolved from name on save
     type = models.CharField(max_length=10, choices=SKILL_TYPE_CHOICES)
     description = models.TextField(null=True, blank=True)
     is_verified = models.BooleanField(default=False)
@@ -117,11 +176,47 @@ class Skill(models.Model):
     )
     proof_description = models.TextField(null=True, blank=True)
     created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True)  # Not bumped by .update(); set it explicitly there
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'updated_at'], name='skill_user_updated_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'name' in update_fields:
+            self.tag_id = skill_tags.resolve(self.name)
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'tag'}
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.name} ({self.type}) - {self.user.email}"
 
 
+# SkillVerification Model (one row per verifying user, so repeat verifications are no-ops)
+class SkillVerification(models.Model):
+    SOURCE_CHOICES = [
+        ('Peer', 'Peer'),
+        ('Feedback', 'Feedback'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    skill = models.ForeignKey(Skill, on_delete=models.CASCADE, related_name='verifications')
+    verifier = models.ForeignKey(User, on_delete=models.CASCADE, related_name='skill_verifications')
+    source = models.CharField(max_length=10, choices=SOURCE_CHOICES)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['skill', 'verifier'], name='unique_skill_verifier'),
+        ]
+
+    def __str__(self):
+        return f"{self.skill.name} verified by {self.verifier.email} ({self.source})"
+
+
 # SwapRequest Model
 class SwapRequest(models.Model):
     STATUS_CHOICES = [
@@ -143,10 +238,69 @@ class SwapRequest(models.Model):
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['sender', 'updated_at'], name='swap_sender_updated_idx'),
+            models.Index(fields=['receiver', 'updated_at'], name='swap_receiver_updated_idx'),
+            models.Index(fields=['status', 'updated_at'], name='swap_status_updated_idx'),
+        ]
+        constraints = [
+            # At most one pending request per sender/receiver/skill pair
+            models.UniqueConstraint(
+                fields=['sender', 'receiver', 'offered_skill', 'requested_skill'],
+                condition=models.Q(status='Pending'),
+                name='unique_pending_swap_request'
+            ),
+        ]
+
     def __str__(self):
         return f"Swap from {self.sender.email} to {self.receiver.email} - Status: {self.status}"
 
 
+# ArchivedSwapRequest Model (rejected/cancelled/withdrawn swaps moved out of the hot table by archive_swaps)
+class ArchivedSwapRequest(models.Model):
+    id = models.UUIDField(primary_key=True, editable=False)  # The original SwapRequest id
+    sender = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    receiver = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    # Skills may be deleted after archival; keep their ids and names rather than FKs
+    offered_skill_id = models.UUIDField()
+    offered_skill_name = models.CharField(max_length=255)
+    requested_skill_id = models.UUIDField()
+    requested_skill_name = models.CharField(max_length=255)
+    message = models.TextField(null=True, blank=True)
+    status = models.CharField(max_length=10, choices=SwapRequest.STATUS_CHOICES)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(null=True, blank=True)  # Null on unsaved copies of live swaps
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['sender', 'updated_at'], name='archived_swap_sender_idx'),
+            models.Index(fields=['receiver', 'updated_at'], name='archived_swap_receiver_idx'),
+        ]
+
+    @classmethod
+    def from_swap(cls, swap, archived_at=None):
+        """Archive-shaped copy of a SwapRequest (with its skills loaded)"""
+        return cls(
+            id=swap.id,
+            sender_id=swap.sender_id,
+            receiver_id=swap.receiver_id,
+            offered_skill_id=swap.offered_skill_id,
+            offered_skill_name=swap.offered_skill.name,
+            requested_skill_id=swap.requested_skill_id,
+            requested_skill_name=swap.requested_skill.name,
+            message=swap.message,
+            status=swap.status,
+            created_at=swap.created_at,
+            updated_at=swap.updated_at,
+            archived_at=archived_at,
+        )
+
+    def __str__(self):
+        return f"Archived swap {self.id} - Status: {self.status}"
+
+
 # Feedback Model
 class Feedback(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -163,6 +317,68 @@ class Feedback(models.Model):
         return f"Feedback for {self.rated_user.email} from {self.rater.email} - Rating: {self.rating}"
 
 
+# Feedback rating rollups (kept by api.feedback_stats as feedback is created and deleted)
+class RatingCounts(models.Model):
+    rating_1 = models.IntegerField(default=0)
+    rating_2 = models.IntegerField(default=0)
+    rating_3 = models.IntegerField(default=0)
+    rating_4 = models.IntegerField(default=0)
+    rating_5 = models.IntegerField(default=0)
+    expectations_matched = models.IntegerField(default=0)
+    peer_verified = models.IntegerField(default=0)
+    peer_answered = models.IntegerField(default=0)  # Feedback that answered skill_verified_by_peer either way
+
+    class Meta:
+        abstract = True
+
+    @property
+    def histogram(self):
+        return {str(rating): getattr(self, f'rating_{rating}') for rating in range(1, 6)}
+
+    @property
+    def count(self):
+        return sum(self.histogram.values())
+
+    @property
+    def average(self):
+        count = self.count
+        return sum(int(rating) * n for rating, n in self.histogram.items()) / count if count else None
+
+
+class UserRatingRollup(RatingCounts):
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='rating_rollup')
+
+    def __str__(self):
+        return f"Ratings of {self.user_id}: {self.count}"
+
+
+class UserMonthlyRatingRollup(RatingCounts):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    month = models.DateField()  # First day of the month
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'month'], name='user_month_rating_rollup_unique'),
+        ]
+
+    def __str__(self):
+        return f"Ratings of {self.user_id} in {self.month:%Y-%m}: {self.count}"
+
+
+class SkillTagRatingRollup(RatingCounts):
+    tag = models.OneToOneField(SkillTag, on_delete=models.CASCADE, primary_key=True, related_name='rating_rollup')
+
+    def __str__(self):
+        return f"Ratings of tag {self.tag_id}: {self.count}"
+
+
+class DailyRatingRollup(RatingCounts):
+    day = models.DateField(primary_key=True)
+
+    def __str__(self):
+        return f"Ratings on {self.day}: {self.count}"
+
+
 # SystemMessage Model
 class SystemMessage(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -175,14 +391,189 @@ class SystemMessage(models.Model):
         return self.title
 
 
-# Session Model (for JWT tokens, often handled by a library like DRF Simple JWT, but included for completeness of schema)
+# Session Model (one row per login; tokens carry its id as the `sid` claim so it can be revoked)
 class Session(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='sessions')
-    access_token = models.TextField()
-    refresh_token = models.TextField()
-    expires_at = models.DateTimeField()
+    refresh_jti_hash = models.CharField(max_length=64, unique=True)  # SHA-256 of the current refresh token's jti
+    expires_at = models.DateTimeField(db_index=True)
+    revoked_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"Session for {self.user.email} (Expires: {self.expires_at})"
+
+
+# BlacklistedRefreshToken Model (refresh tokens rotated out of a session; presenting one again means it leaked)
+class BlacklistedRefreshToken(models.Model):
+    jti_hash = models.CharField(max_length=64, primary_key=True)  # SHA-256 of the rotated-out jti
+    session = models.ForeignKey(Session, on_delete=models.CASCADE, related_name='blacklisted_tokens')
+    blacklisted_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"Blacklisted refresh token of session {self.session_id}"
+
+
+# CreditTransaction Model (append-only ledger; the auto-increment id doubles as an ordering cursor)
+class CreditTransaction(models.Model):
+    REASON_CHOICES = [
+        ('SwapCompleted', 'Swap Completed'),
+        ('Adjustment', 'Adjustment'),
+    ]
+
+    id = models.BigAutoField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='credit_transactions')
+    swap_request = models.ForeignKey(
+        SwapRequest,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='credit_transactions'
+    )
+    amount = models.IntegerField()
+    reason = models.CharField(max_length=20, choices=REASON_CHOICES)
     created_at = models.DateTimeField(default=timezone.now)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'id'], name='credit_txn_user_id_idx'),
+        ]
+        constraints = [
+            # A swap pays out each participant at most once
+            models.UniqueConstraint(
+                fields=['user', 'swap_request'],
+                condition=models.Q(swap_request__isnull=False),
+                name='unique_credit_txn_per_swap_user'
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError('Credit transactions are append-only')
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.amount:+d} credits for {self.user.email} ({self.reason})"
+
+
+# CreditBalanceSnapshot Model (balance of a user's ledger up to and including last_transaction_id)
+class CreditBalanceSnapshot(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='credit_snapshots')
+    balance = models.IntegerField()
+    last_transaction_id = models.BigIntegerField()
+    as_of = models.DateTimeField()
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-last_transaction_id'], name='credit_snap_user_cursor_idx'),
+        ]
+
+    def __str__(self):
+        return f"Snapshot for {self.user.email}: {self.balance} (as of {self.as_of})"
+
+
+# Notification Model (the auto-increment id is the delivery cursor for streams and polling)
+class Notification(models.Model):
+    KIND_CHOICES = [
+        ('SwapRequested', 'Swap Requested'),
+        ('SwapAccepted', 'Swap Accepted'),
+        ('SwapRejected', 'Swap Rejected'),
+        ('SwapCancelled', 'Swap Cancelled'),
+        ('FeedbackReceived', 'Feedback Received'),
+    ]
+
+    id = models.BigAutoField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    swap_request = models.ForeignKey(
+        SwapRequest,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='notifications'
+    )
+    actor = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    read_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'id'], name='notification_user_cursor_idx'),
+            # Only unread rows, so unread counts stay cheap however much history piles up
+            models.Index(
+                fields=['user', 'id'],
+                condition=models.Q(read_at__isnull=True),
+                name='notification_unread_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} for {self.user.email}"
+
+
+# Tombstone Model (deleted skills/swaps, kept for a while so delta sync can tell clients to drop them)
+class Tombstone(models.Model):
+    ENTITY_CHOICES = [
+        ('Skill', 'Skill'),
+        ('SwapRequest', 'Swap Request'),
+    ]
+
+    id = models.BigAutoField(primary_key=True)
+    user_id = models.UUIDField()  # Who had the row in their sync set; not a FK so it survives cascades
+    entity = models.CharField(max_length=20, choices=ENTITY_CHOICES)
+    object_id = models.UUIDField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user_id', 'deleted_at'], name='tombstone_user_deleted_idx'),
+        ]
+
+    def __str__(self):
+        return f"Deleted {self.entity} {self.object_id}"
+
+
+# DiscoveryScore Model (precomputed public directory ranking, refreshed by the rank_users command)
+class DiscoveryScore(models.Model):
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='discovery_score')
+    score = models.FloatField()
+    average_rating = models.FloatField(null=True, blank=True)
+    feedback_count = models.IntegerField(default=0)
+    verified_skill_count = models.IntegerField(default=0)
+    recent_completions = models.IntegerField(default=0)
+    computed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            # Keyset pagination of the directory walks this index in order
+            models.Index(fields=['-score', 'user'], name='discovery_score_rank_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.email}: {self.score:.3f}"
+
+
+# RequestProfile Model (profiles captured by ProfilingMiddleware, newest REQUEST_PROFILING['MAX_STORED'] kept)
+class RequestProfile(models.Model):
+    ENGINE_CHOICES = [
+        ('cprofile', 'cProfile'),
+        ('pyinstrument', 'pyinstrument'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    requested_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')  # Null when sampled
+    request_id = models.CharField(max_length=64, blank=True)
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=2048)
+    view_name = models.CharField(max_length=255)
+    status_code = models.IntegerField()
+    duration_ms = models.FloatField()
+    engine = models.CharField(max_length=20, choices=ENGINE_CHOICES)
+    summary = models.TextField(blank=True)
+    data = models.BinaryField()
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
     def __str__(self):
-        return f"Session for {self.user.email} (Expires: {self.expires_at})"
\ No newline at end of file
+        return f"{self.method} {self.path} ({self.duration_ms:.0f} ms)"
@@ -0,0 +1,209 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from .models import Notification
+from .serializers import NotificationSerializer
+
+logger = logging.getLogger('api.notifications')
+
+
+class Subscription:
+    """One open stream: a bounded queue fed from any thread via its event loop"""
+
+    def __init__(self, user_id, queue_size):
+        self.user_id = str(user_id)
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        # Set when the client fell too far behind; the stream then ends so the
+        # client reconnects and catches up from its Last-Event-ID
+        self.overflowed = False
+
+    def put(self, payload):
+        try:
+            self.queue.put_nowait(payload)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+
+class NotificationHub:
+    """In-process pub/sub from notification writers to the streams open on this process"""
+
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_id):
+        """Must be called from the event loop that will consume the subscription"""
+        subscription = Subscription(user_id, settings.NOTIFICATIONS['QUEUE_SIZE'])
+        with self._lock:
+            self._subscribers[subscription.user_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.user_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.user_id]
+
+    def deliver(self, user_id, payload):
+        """Hand `payload` to every local stream of `user_id`; safe from any thread"""
+        with self._lock:
+            subscribers = list(self._subscribers.get(str(user_id), ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.put, payload)
+            except RuntimeError:
+                # The stream's loop has closed; its finally block unsubscribes it
+                pass
+
+    def connection_count(self):
+        with self._lock:
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    def render_prometheus(self):
+        return (
+            '# HELP api_notification_streams Open notification streams on this process.\n'
+            '# TYPE api_notification_streams gauge\n'
+            f'api_notification_streams {self.connection_count()}\n'
+        )
+
+
+hub = NotificationHub()
+
+
+class LocalBroker:
+    """Single-process delivery straight into the hub"""
+
+    def publish(self, user_id, payload):
+        hub.deliver(user_id, payload)
+
+    def start(self):
+        pass
+
+
+class RedisBroker:
+    """Multi-node delivery: publish on a Redis channel that every process relays into its hub"""
+
+    def __init__(self, url, channel):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.channel = channel
+        self._listener = None
+        self._lock = threading.Lock()
+
+    def publish(self, user_id, payload):
+        message = json.dumps({'user_id': str(user_id), 'payload': payload}, cls=DjangoJSONEncoder)
+        self.client.publish(self.channel, message)
+
+    def start(self):
+        """Start the relay thread on first use"""
+        with self._lock:
+            if self._listener is None:
+                self._listener = threading.Thread(target=self._relay, name='notification-relay', daemon=True)
+                self._listener.start()
+
+    def _relay(self):
+        while True:
+            try:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                for message in pubsub.listen():
+                    data = json.loads(message['data'])
+                    hub.deliver(data['user_id'], data['payload'])
+            except Exception:
+                logger.exception('Notification relay lost its Redis subscription; reconnecting')
+                time.sleep(1)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                config = settings.NOTIFICATIONS
+                if config['BROKER'] == 'redis':
+                    _broker = RedisBroker(settings.REDIS_URL, config['REDIS_CHANNEL'])
+                else:
+                    _broker = LocalBroker()
+    return _broker
+
+
+def notify(user, kind, swap_request=None, actor=None):
+    """Store a notification for `user` and push it to their streams once the transaction commits"""
+    notification = Notification.objects.create(user=user, kind=kind, swap_request=swap_request, actor=actor)
+    payload = json.loads(json.dumps(NotificationSerializer(notification).data, cls=DjangoJSONEncoder))
+    transaction.on_commit(lambda: get_broker().publish(user.id, payload))
+    return notification
+
+
+def notifications_after(user_id, cursor, limit):
+    """Payloads of `user_id`'s notifications with id > cursor, oldest first"""
+    notifications = (
+        Notification.objects.filter(user_id=user_id, id__gt=cursor)
+        .select_related('actor')
+        .order_by('id')[:limit]
+    )
+    return json.loads(json.dumps(NotificationSerializer(notifications, many=True).data, cls=DjangoJSONEncoder))
+
+
+def format_event(payload):
+    return f'id: {payload["id"]}\nevent: notification\ndata: {json.dumps(payload)}\n\n'
+
+
+async def stream_events(user_id, cursor, until):
+    """Server-Sent Events body for one user's stream.
+
+    Notifications after `cursor` (if given) are replayed from the table first,
+    then live ones arrive through the hub. An idle stream costs one parked
+    coroutine plus a keep-alive comment every HEARTBEAT_SECONDS. The stream
+    ends at the `until` timestamp (access token expiry) or when the client
+    falls QUEUE_SIZE events behind; either way the client reconnects with its
+    Last-Event-ID and loses nothing.
+    """
+    config = settings.NOTIFICATIONS
+    get_broker().start()
+    # Subscribe before replaying so nothing committed in between is missed
+    subscription = hub.subscribe(user_id)
+    try:
+        yield f'retry: {config["RETRY_MS"]}\n\n'
+
+        if cursor is not None:
+            while True:
+                backlog = await sync_to_async(notifications_after)(user_id, cursor, config['REPLAY_BATCH'])
+                for payload in backlog:
+                    cursor = payload['id']
+                    yield format_event(payload)
+                if len(backlog) < config['REPLAY_BATCH']:
+                    break
+
+        while not subscription.overflowed or not subscription.queue.empty():
+            remaining = until - time.time()
+            if remaining <= 0:
+                return
+            try:
+                payload = await asyncio.wait_for(
+                    subscription.queue.get(), timeout=min(config['HEARTBEAT_SECONDS'], remaining)
+                )
+            except asyncio.TimeoutError:
+                yield ': keep-alive\n\n'
+                continue
+            if cursor is not None and payload['id'] <= cursor:
+                continue  # Already sent during the replay
+            cursor = payload['id']
+            yield format_event(payload)
+    finally:
+        hub.unsubscribe(subscription)
@@ -0,0 +1,128 @@
+import io
+import marshal
+import random
+import time
+from django.conf import settings
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.tokens import AccessToken
+from .tokens import revocations
+
+PROFILE_HEADER = 'X-Profile'
+PROFILE_PARAM = 'profile'
+PROFILE_ID_HEADER = 'X-Profile-ID'
+
+# Download formats by engine: (content type, file extension)
+FORMATS = {
+    'cprofile': ('application/octet-stream', 'prof'),  # pstats dump: python -m pstats, snakeviz
+    'pyinstrument': ('text/html', 'html'),
+}
+
+
+def requested_engine(request):
+    """Profiler asked for with the X-Profile header or ?profile=; None when not asked.
+
+    "pyinstrument" selects pyinstrument when it is installed; any other value means cProfile.
+    """
+    value = request.headers.get(PROFILE_HEADER) or request.GET.get(PROFILE_PARAM)
+    if not value or value in ('0', 'false'):
+        return None
+    if value == 'pyinstrument' and pyinstrument_available():
+        return 'pyinstrument'
+    return 'cprofile'
+
+
+def pyinstrument_available():
+    try:
+        import pyinstrument  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def profiling_admin(request):
+    """The admin behind the request's bearer token, or None.
+
+    Profiling runs around the whole view, before jwt_required sees the
+    request, so the token is checked here; only flagged requests pay for it.
+    """
+    from .models import User
+
+    token_type, _, token = request.headers.get('Authorization', '').partition(' ')
+    if token_type.lower() != 'bearer' or not token:
+        return None
+    try:
+        access_token = AccessToken(token)
+    except TokenError:
+        return None
+    session_id = access_token.get('sid')
+    if session_id and revocations.is_revoked(session_id):
+        return None
+    return User.objects.filter(
+        id=access_token.get('user_id'), is_admin=True, is_active=True, is_banned=False
+    ).first()
+
+
+def should_sample():
+    rate = settings.REQUEST_PROFILING['SAMPLE_RATE']
+    return rate > 0 and random.random() < rate
+
+
+def profile_call(engine, func):
+    """Run `func()` under `engine`; returns (result, profile bytes, text summary)"""
+    if engine == 'pyinstrument':
+        from pyinstrument import Profiler
+
+        profiler = Profiler()
+        profiler.start()
+        try:
+            result = func()
+        finally:
+            profiler.stop()
+        return result, profiler.output_html().encode(), profiler.output_text()
+
+    # Deferred: pstats is slow to import and most workers never profile
+    import cProfile
+    import pstats
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        result = func()
+    finally:
+        profiler.disable()
+    stream = io.StringIO()
+    stats = pstats.Stats(profiler, stream=stream)
+    stats.sort_stats('cumulative').print_stats(settings.REQUEST_PROFILING['SUMMARY_LINES'])
+    # Same bytes as Stats.dump_stats() writes, so pstats and snakeviz can load the download
+    return result, marshal.dumps(stats.stats), stream.getvalue()
+
+
+def save_profile(request, response, engine, data, summary, duration, requested_by=None):
+    """Store a captured profile with its request metadata, keeping the newest MAX_STORED"""
+    from .middleware import route_label
+    from .models import RequestProfile
+
+    profile = RequestProfile.objects.create(
+        requested_by=requested_by,
+        request_id=getattr(request, 'request_id', ''),
+        method=request.method,
+        path=request.get_full_path()[:2048],
+        view_name=route_label(request),
+        status_code=response.status_code,
+        duration_ms=duration * 1000,
+        engine=engine,
+        summary=summary,
+        data=data,
+    )
+    stale = RequestProfile.objects.order_by('-created_at').values_list('id', flat=True)[settings.REQUEST_PROFILING['MAX_STORED']:]
+    RequestProfile.objects.filter(id__in=list(stale)).delete()
+    return profile
+
+
+def capture(request, get_response, engine, requested_by=None):
+    """Serve `request` under the profiler and store the result"""
+    started = time.perf_counter()
+    response, data, summary = profile_call(engine, lambda: get_response(request))
+    profile = save_profile(request, response, engine, data, summary, time.perf_counter() - started, requested_by)
+    response[PROFILE_ID_HEADER] = str(profile.id)
+    return response
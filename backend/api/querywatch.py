@@ -0,0 +1,110 @@
+import json
+import logging
+import os
+import re
+import sys
+import time
+from collections import Counter
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('api.querywatch')
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER_LIST = re.compile(r'\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))*\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+# Frames in these files are instrumentation plumbing, never the origin of a query
+_IGNORED_FILES = {
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), name)
+    for name in ('querywatch.py', 'instrumentation.py', 'middleware.py')
+}
+_PROJECT_ROOT = str(settings.BASE_DIR)
+
+
+def normalize_sql(sql):
+    """Reduce a statement to its shape: literals become ?, IN lists collapse to (...)"""
+    shape = _STRING_LITERAL.sub('?', sql)
+    shape = _NUMBER_LITERAL.sub('?', shape)
+    shape = shape.replace('%s', '?')
+    shape = _PLACEHOLDER_LIST.sub('(...)', shape)
+    return _WHITESPACE.sub(' ', shape).strip()
+
+
+def query_origin():
+    """file:line of the innermost project frame (view, serializer...) that issued the query"""
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if (
+            filename.startswith(_PROJECT_ROOT)
+            and filename not in _IGNORED_FILES
+            and f'{os.sep}site-packages{os.sep}' not in filename
+        ):
+            relative = os.path.relpath(filename, _PROJECT_ROOT)
+            return f'{relative}:{frame.f_lineno} in {frame.f_code.co_name}'
+        frame = frame.f_back
+    return None
+
+
+class QueryInspector:
+    """Counts query shapes for one request and keeps the slow ones for EXPLAIN"""
+
+    def __init__(self, repeat_threshold, slow_query_seconds):
+        self.repeat_threshold = repeat_threshold
+        self.slow_query_seconds = slow_query_seconds
+        self.shapes = Counter()
+        self.origins = {}
+        self.slow_queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        """connection.execute_wrapper hook"""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            shape = normalize_sql(sql)
+            self.shapes[shape] += 1
+            if shape not in self.origins or self.shapes[shape] == self.repeat_threshold + 1:
+                # Remember where the repeats come from, not just the first occurrence
+                self.origins[shape] = query_origin()
+            if duration >= self.slow_query_seconds:
+                self.slow_queries.append(
+                    (context['connection'].alias, sql, params, many, duration, query_origin())
+                )
+
+    def report(self, request_context, explain=True):
+        """Emit one structured JSON log line per repeated shape and per slow query"""
+        for shape, count in self.shapes.items():
+            if count > self.repeat_threshold:
+                logger.warning(json.dumps(dict(
+                    request_context,
+                    event='repeated_query',
+                    shape=shape,
+                    count=count,
+                    origin=self.origins.get(shape),
+                )))
+
+        for alias, sql, params, many, duration, origin in self.slow_queries:
+            record = dict(
+                request_context,
+                event='slow_query',
+                sql=sql,
+                duration_ms=round(duration * 1000, 2),
+                origin=origin,
+            )
+            if explain and not many and sql.lstrip()[:6].upper() == 'SELECT':
+                record['plan'] = explain_query(alias, sql, params)
+            logger.warning(json.dumps(record, default=str))
+
+
+def explain_query(alias, sql, params):
+    connection = connections[alias]
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f'{connection.ops.explain_query_prefix()} {sql}', params)
+            return [' '.join(str(column) for column in row) for row in cursor.fetchall()]
+    except Exception as e:
+        return [f'EXPLAIN failed: {e}']
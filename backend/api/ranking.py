@@ -0,0 +1,151 @@
+import base64
+import math
+import uuid
+from datetime import timedelta
+from django.conf import settings
+from django.db.models import Avg, Count, Q
+from django.utils import timezone
+from .models import User, Skill, SwapRequest, Feedback, DiscoveryScore
+
+SCORE_FIELDS = ['score', 'average_rating', 'feedback_count', 'verified_skill_count', 'recent_completions', 'computed_at']
+
+
+def listed_users():
+    """Users that appear in the public directory"""
+    return User.objects.filter(is_public=True, is_active=True, is_banned=False)
+
+
+def compute_score(average_rating, feedback_count, verified_skill_count, recent_completions, last_active, now):
+    config = settings.DISCOVERY_RANKING
+    weights = config['WEIGHTS']
+    prior, prior_weight = config['RATING_PRIOR'], config['RATING_PRIOR_WEIGHT']
+
+    # Bayesian average: one 5-star rating must not outrank fifty 4.8s
+    rating_total = (average_rating or 0) * feedback_count
+    rating = (prior * prior_weight + rating_total) / (prior_weight + feedback_count) / 5
+    days_idle = max((now - last_active).total_seconds() / 86400, 0)
+    activity = 0.5 ** (days_idle / config['ACTIVITY_HALF_LIFE_DAYS'])
+
+    return (
+        weights['rating'] * rating
+        + weights['feedback_count'] * math.log1p(feedback_count)
+        + weights['verified_skills'] * math.log1p(verified_skill_count)
+        + weights['recent_completions'] * math.log1p(recent_completions)
+        + weights['activity'] * activity
+    )
+
+
+def rank_users(batch_size=1000):
+    """Recompute DiscoveryScore for every listed user in primary-key batches.
+
+    Each batch costs a fixed number of grouped queries plus one upsert, so a
+    full run is linear in the number of users. Scores of users no longer listed
+    are dropped. Returns the number of users scored.
+    """
+    now = timezone.now()
+    recent_since = now - timedelta(days=settings.DISCOVERY_RANKING['RECENT_DAYS'])
+    scored, last_id = 0, None
+
+    while True:
+        users = listed_users().order_by('id').only('id', 'last_login', 'date_joined')
+        if last_id is not None:
+            users = users.filter(id__gt=last_id)
+        batch = list(users[:batch_size])
+        if not batch:
+            break
+        user_ids = [user.id for user in batch]
+
+        ratings = {
+            row['rated_user_id']: row
+            for row in Feedback.objects.filter(rated_user_id__in=user_ids)
+            .values('rated_user_id').annotate(average=Avg('rating'), count=Count('id')).order_by()
+        }
+        verified_skills = dict(
+            Skill.objects.filter(user_id__in=user_ids, type='Offered', is_verified=True)
+            .values('user_id').annotate(count=Count('id')).values_list('user_id', 'count').order_by()
+        )
+        completions = {}
+        completed = SwapRequest.objects.filter(status='Completed', updated_at__gte=recent_since)
+        for field in ('sender_id', 'receiver_id'):
+            for user_id, count in (
+                completed.filter(**{f'{field}__in': user_ids})
+                .values(field).annotate(count=Count('id')).values_list(field, 'count').order_by()
+            ):
+                completions[user_id] = completions.get(user_id, 0) + count
+
+        scores = []
+        for user in batch:
+            rating = ratings.get(user.id, {'average': None, 'count': 0})
+            components = dict(
+                average_rating=rating['average'],
+                feedback_count=rating['count'],
+                verified_skill_count=verified_skills.get(user.id, 0),
+                recent_completions=completions.get(user.id, 0),
+            )
+            scores.append(DiscoveryScore(
+                user_id=user.id,
+                score=compute_score(last_active=user.last_login or user.date_joined, now=now, **components),
+                computed_at=now,
+                **components
+            ))
+        DiscoveryScore.objects.bulk_create(
+            scores, update_conflicts=True, unique_fields=['user'], update_fields=SCORE_FIELDS
+        )
+        scored += len(scores)
+        last_id = batch[-1].id
+
+    DiscoveryScore.objects.exclude(user__in=listed_users()).delete()
+    return scored
+
+
+LISTING_FIELDS = {'is_public', 'is_active', 'is_banned'}
+
+
+def score_new_user(sender, instance, created, update_fields=None, **kwargs):
+    """post_save receiver: list users straight away with their prior-only score when
+    they sign up or become listed (made public, unbanned, reactivated); the next
+    `rank_users` run scores them properly"""
+    if not created and update_fields is not None and LISTING_FIELDS.isdisjoint(update_fields):
+        return
+    if instance.is_public and instance.is_active and not instance.is_banned:
+        now = timezone.now()
+        DiscoveryScore.objects.get_or_create(user=instance, defaults={
+            'score': compute_score(None, 0, 0, 0, instance.last_login or instance.date_joined, now),
+            'computed_at': now,
+        })
+
+
+def encode_cursor(score, user_id):
+    return base64.urlsafe_b64encode(f'{score!r},{user_id}'.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """(score, user id) from a cursor; raises ValueError if malformed"""
+    try:
+        score, user_id = base64.urlsafe_b64decode(cursor.encode()).decode().split(',')
+    except (UnicodeError, TypeError, base64.binascii.Error) as e:
+        raise ValueError('malformed cursor') from e
+    return float(score), uuid.UUID(user_id)
+
+
+def ranked_count(users):
+    """Number of `users` in the ranked directory"""
+    return DiscoveryScore.objects.filter(user__in=users).count()
+
+
+def ranked_page(users, cursor=None, limit=10, offset=0):
+    """Ids of one page of `users` in descending score order, and the next page's cursor (or None).
+
+    With a cursor the scan seeks straight to it in discovery_score_rank_idx, so
+    every page costs about the same as the first. `offset` is only for clients
+    still paging by number.
+    """
+    if limit < 1:
+        raise ValueError('limit must be positive')
+    scores = DiscoveryScore.objects.filter(user__in=users)
+    if cursor is not None:
+        score, user_id = decode_cursor(cursor)
+        scores = scores.filter(Q(score__lt=score) | Q(score=score, user_id__gt=user_id))
+    page = list(scores.order_by('-score', 'user_id').values_list('score', 'user_id')[offset:offset + limit + 1])
+    next_cursor = encode_cursor(*page[limit - 1]) if len(page) > limit else None
+    return [user_id for _, user_id in page[:limit]], next_cursor
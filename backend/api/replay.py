@@ -0,0 +1,184 @@
+import json
+import math
+import random
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import defaultdict, namedtuple
+from django.conf import settings
+from django.db import connections
+from django.test import Client
+from .models import User, SkillTag
+from .tokens import issue_tokens
+
+# `build(context, rng)` returns (path, query params or JSON body)
+Route = namedtuple('Route', 'name weight method auth build')
+
+# Weighted mix of a browsing session: mostly directory, search and autocomplete reads
+DEFAULT_MIX = [
+    Route('public_list', 25, 'GET', False, lambda ctx, rng: ('/api/users/public/', {'limit': 12, 'page': rng.randint(1, 5)})),
+    Route('public_skill_filter', 5, 'GET', False, lambda ctx, rng: ('/api/users/public/', {'search_skill': ctx.prefix(rng, 4)})),
+    Route('search', 15, 'GET', True, lambda ctx, rng: ('/api/users/public/search/', {'q': ctx.prefix(rng, 4), 'limit': 12})),
+    Route('autocomplete', 20, 'GET', True, lambda ctx, rng: ('/api/skills/autocomplete/', {'prefix': ctx.prefix(rng, rng.randint(1, 3))})),
+    Route('profile', 10, 'GET', True, lambda ctx, rng: (f'/api/users/{rng.choice(ctx.public_ids)}/', None)),
+    Route('batch_profiles', 5, 'GET', True, lambda ctx, rng: ('/api/users/batch/', {'ids': ','.join(rng.sample(ctx.public_ids, min(10, len(ctx.public_ids))))})),
+    Route('dashboard', 5, 'GET', True, lambda ctx, rng: ('/api/users/me/dashboard-summary/', None)),
+    Route('sent_swaps', 5, 'GET', True, lambda ctx, rng: ('/api/swap-requests/sent/', None)),
+    Route('swap_history', 5, 'GET', True, lambda ctx, rng: ('/api/swap-requests/history/', None)),
+    Route('unread_notifications', 3, 'GET', True, lambda ctx, rng: ('/api/notifications/unread/', None)),
+    Route('mark_notifications_read', 2, 'PUT', True, lambda ctx, rng: ('/api/notifications/read/', {'up_to': 0})),
+]
+
+
+def parse_mix(spec, mix=DEFAULT_MIX):
+    """Override route weights from 'name=weight,...'; weight 0 drops a route"""
+    weights = {route.name: route.weight for route in mix}
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        name, _, weight = item.partition('=')
+        if name not in weights:
+            raise ValueError(f'Unknown route {name!r}; choose from {", ".join(weights)}')
+        weights[name] = int(weight)
+    return [route._replace(weight=weights[route.name]) for route in mix if weights[route.name] > 0]
+
+
+class ReplayContext:
+    """Ids, search prefixes and access tokens drawn from the database being replayed against"""
+
+    def __init__(self, users=50):
+        listed = User.objects.filter(is_public=True, is_active=True, is_banned=False)
+        self.public_ids = [str(user_id) for user_id in listed.order_by('?').values_list('id', flat=True)[:1000]]
+        self.tag_names = list(SkillTag.objects.values_list('name', flat=True)[:1000])
+        if not self.public_ids or not self.tag_names:
+            raise ValueError('Nothing to replay against; run `manage.py seed_perf` first')
+        self.users = list(User.objects.filter(is_active=True, is_banned=False).order_by('?')[:users])
+        self._lock = threading.Lock()
+        self._tokens, self._issued_at = [], 0.0
+
+    def prefix(self, rng, length):
+        return rng.choice(self.tag_names)[:length]
+
+    def token(self, rng):
+        # Access tokens are short-lived; re-issue them before they expire during long runs
+        lifetime = settings.SIMPLE_JWT['ACCESS_TOKEN_LIFETIME'].total_seconds()
+        with self._lock:
+            if not self._tokens or time.monotonic() - self._issued_at > lifetime * 0.8:
+                self._tokens = [issue_tokens(user)['access'] for user in self.users]
+                self._issued_at = time.monotonic()
+            return rng.choice(self._tokens)
+
+
+class InProcessClient:
+    """Requests through Django's test client: the whole stack minus the HTTP server"""
+
+    def __init__(self):
+        self.client = Client(HTTP_HOST='localhost')
+
+    def request(self, method, path, data, token):
+        headers = {'HTTP_AUTHORIZATION': f'Bearer {token}'} if token else {}
+        if method == 'GET':
+            return self.client.get(path, data, **headers).status_code
+        return self.client.generic(method, path, json.dumps(data), content_type='application/json', **headers).status_code
+
+    def close(self):
+        connections.close_all()
+
+
+class HttpClient:
+    """Requests over HTTP to a running server sharing this database and SECRET_KEY"""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+
+    def request(self, method, path, data, token):
+        url, body = self.base_url + path, None
+        if method == 'GET' and data:
+            url += '?' + urllib.parse.urlencode(data)
+        elif data is not None:
+            body = json.dumps(data).encode()
+        request = urllib.request.Request(url, data=body, method=method)
+        request.add_header('Content-Type', 'application/json')
+        if token:
+            request.add_header('Authorization', f'Bearer {token}')
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as e:
+            return e.code
+        except OSError:
+            return 0  # Connection refused/reset or timeout
+
+    def close(self):
+        pass
+
+
+def percentile(ordered, p):
+    """Nearest-rank percentile of an ascending list"""
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(p / 100 * len(ordered)) - 1))]
+
+
+def replay(make_client, context, mix, concurrency=8, duration=30.0, max_requests=None, seed=None):
+    """Fire requests drawn from the weighted `mix` from `concurrency` threads until
+    `duration` seconds pass or `max_requests` are sent.
+
+    Returns (elapsed seconds, {route name: [(status, seconds), ...]}).
+    """
+    weights = [route.weight for route in mix]
+    results = defaultdict(list)
+    results_lock = threading.Lock()
+    remaining = [max_requests]
+    deadline = time.monotonic() + duration
+
+    def take_slot():
+        with results_lock:
+            if remaining[0] is None:
+                return True
+            if remaining[0] <= 0:
+                return False
+            remaining[0] -= 1
+            return True
+
+    def worker(index):
+        rng = random.Random(None if seed is None else seed + index)
+        client = make_client()
+        local = defaultdict(list)
+        try:
+            while time.monotonic() < deadline and take_slot():
+                route = rng.choices(mix, weights)[0]
+                path, data = route.build(context, rng)
+                token = context.token(rng) if route.auth else None
+                started = time.perf_counter()
+                status_code = client.request(route.method, path, data, token)
+                local[route.name].append((status_code, time.perf_counter() - started))
+        finally:
+            client.close()
+            with results_lock:
+                for name, samples in local.items():
+                    results[name].extend(samples)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(index,), daemon=True) for index in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - started, dict(results)
+
+
+def summarize(elapsed, results):
+    """Rows of (route, requests, errors, req/s, p50 ms, p95 ms, p99 ms), busiest route first, then the total"""
+    def row(name, samples):
+        latencies = sorted(seconds * 1000 for _, seconds in samples)
+        errors = sum(1 for status_code, _ in samples if not 200 <= status_code < 400)
+        return (
+            name, len(samples), errors, len(samples) / elapsed,
+            percentile(latencies, 50), percentile(latencies, 95), percentile(latencies, 99),
+        )
+
+    rows = [row(name, samples) for name, samples in sorted(results.items(), key=lambda item: -len(item[1])) if samples]
+    everything = [sample for samples in results.values() for sample in samples]
+    if everything:
+        rows.append(row('TOTAL', everything))
+    return rows
@@ -0,0 +1,57 @@
+import random
+import time
+from contextvars import ContextVar
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+# Database alias reads of the current request are routed to, or None for `default`
+_read_alias = ContextVar('api_read_alias', default=None)
+
+PIN_COOKIE = 'db_pin_until'
+PIN_HEADER = 'X-DB-Pin-Until'
+
+
+class ReplicaRouter:
+    """Send reads to the replica chosen for the current request (see
+    decorators.replica_reads) and everything else to `default`."""
+
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        # Explicit, so saving an object that was loaded from a replica still writes to the primary
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return None
+
+
+def pinned_until(request):
+    """Epoch seconds until which `request`'s client reads its own writes from the primary"""
+    for value in (request.COOKIES.get(PIN_COOKIE), request.headers.get(PIN_HEADER)):
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            continue
+    return 0.0
+
+
+def replica_for(request):
+    """Replica alias to serve `request`'s reads from, or None to stay on the primary"""
+    aliases = settings.READ_REPLICAS['ALIASES']
+    if not aliases or pinned_until(request) > time.time():
+        return None
+    return random.choice(aliases)
+
+
+def use_replica(alias):
+    """Route reads on this thread/task to `alias`; returns a token for stop_using_replica()"""
+    return _read_alias.set(alias)
+
+
+def stop_using_replica(token):
+    _read_alias.reset(token)
@@ -0,0 +1,186 @@
+import random
+import uuid
+from datetime import timedelta
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.db.models import OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from .geo import get_gazetteer
+from .models import User, Skill, SwapRequest, Feedback, CreditTransaction
+from .taxonomy import read_taxonomy, skill_tags
+
+SEED_PASSWORD = 'perf-password'
+
+# (value, weight) distributions, loosely modelled on what users pick in the profile form
+AVAILABILITY = [
+    (['Weekends'], 30), (['Weekdays'], 20), (['Weekdays', 'Weekends'], 15), (['Saturday', 'Sunday'], 10),
+    (['Monday', 'Wednesday', 'Friday'], 8), (['Tuesday', 'Thursday'], 7), ([], 10),
+]
+TIMESLOTS = [(['Evening'], 35), (['Morning'], 20), (['Morning', 'Evening'], 15), (['Afternoon'], 10), (['Night'], 10), ([], 10)]
+SWAP_STATUSES = [('Completed', 40), ('Pending', 15), ('Rejected', 15), ('Accepted', 10), ('Cancelled', 10), ('Withdrawn', 10)]
+RATINGS = [(5, 45), (4, 30), (3, 13), (2, 7), (1, 5)]
+
+
+def weighted(rng, choices):
+    values, weights = zip(*choices)
+    return rng.choices(values, weights)[0]
+
+
+class SeedPlan:
+    """Builds one batch of users with their skills, swaps, feedback and credits in memory"""
+
+    def __init__(self, rng, run, skills_per_user, swaps_per_user, days):
+        self.rng = rng
+        self.run = run
+        self.skills_per_user = skills_per_user
+        self.swaps_per_user = swaps_per_user
+        self.now = timezone.now()
+        self.days = days
+        self.password = make_password(SEED_PASSWORD)
+        # Popularity of skills and places falls off with rank (Zipf-like)
+        self.skill_names = list(read_taxonomy(settings.TAXONOMY['PATH']))
+        self.skill_weights = [1 / rank for rank in range(1, len(self.skill_names) + 1)]
+        places = sorted(get_gazetteer().by_name.items(), key=lambda item: -item[1][1])
+        self.places = [name.title() for name, _ in places]
+        self.place_weights = [population for _, (_, population) in places]
+        self.offered = []  # (user, offered skill) of every seeded user so far, swap partners for later batches
+        self.pending_keys = set()
+
+    def skill_name(self):
+        names = self.rng.choices(self.skill_names, self.skill_weights)[0]
+        # Mostly the canonical spelling, sometimes an alias, as users type them
+        return names[0] if self.rng.random() < 0.8 else self.rng.choice(names)
+
+    def moment_after(self, start):
+        return start + (self.now - start) * self.rng.random()
+
+    def build(self, first_index, count):
+        rng = self.rng
+        users, skills, swaps, feedback, ledger = [], [], [], [], []
+
+        batch_offered = []
+        for index in range(first_index, first_index + count):
+            user = User(
+                email=f'perf-{self.run}-{index}@example.com',
+                name=f'Perf User {index}',
+                password=self.password,
+                location=rng.choices(self.places, self.place_weights)[0] if rng.random() < 0.85 else None,
+                is_public=rng.random() < 0.9,
+                availability=weighted(rng, AVAILABILITY),
+                timeslot=weighted(rng, TIMESLOTS),
+                date_joined=self.now - timedelta(days=self.days * rng.random()),
+            )
+            user.resolve_location()
+            users.append(user)
+
+            for skill_index in range(max(1, round(rng.gauss(self.skills_per_user, 1)))):
+                name = self.skill_name()
+                skill_type = 'Offered' if skill_index % 3 != 2 else 'Wanted'
+                verified = skill_type == 'Offered' and rng.random() < 0.25
+                skill = Skill(
+                    user=user,
+                    name=name,
+                    tag_id=skill_tags.resolve(name),
+                    type=skill_type,
+                    is_verified=verified,
+                    verification_count=settings.SKILL_VERIFICATION_THRESHOLD if verified else 0,
+                    created_at=self.moment_after(user.date_joined),
+                )
+                skill.updated_at = skill.created_at
+                skills.append(skill)
+                if skill_type == 'Offered':
+                    batch_offered.append((user, skill))
+
+        partners = self.offered + batch_offered
+        offered_by_user = {}
+        for user, skill in batch_offered:
+            offered_by_user.setdefault(user, []).append(skill)
+        for sender, sender_skills in offered_by_user.items():
+            for _ in range(rng.randint(0, 2 * self.swaps_per_user)):
+                offered_skill = rng.choice(sender_skills)
+                receiver, requested_skill = rng.choice(partners)
+                if receiver is sender:
+                    continue
+                swap_status = weighted(rng, SWAP_STATUSES)
+                if swap_status == 'Pending':
+                    key = (sender.id, receiver.id, offered_skill.id, requested_skill.id)
+                    if key in self.pending_keys:
+                        continue
+                    self.pending_keys.add(key)
+                created_at = self.moment_after(max(offered_skill.created_at, requested_skill.created_at))
+                swap = SwapRequest(
+                    sender=sender,
+                    receiver=receiver,
+                    offered_skill=offered_skill,
+                    requested_skill=requested_skill,
+                    message=rng.choice([None, 'Happy to swap!', 'Would love to learn from you.']),
+                    status=swap_status,
+                    created_at=created_at,
+                )
+                swap.updated_at = self.moment_after(created_at)
+                swaps.append(swap)
+
+                if swap_status == 'Completed':
+                    for participant in (sender, receiver):
+                        ledger.append(CreditTransaction(
+                            user=participant, swap_request=swap, amount=settings.SWAP_COMPLETION_CREDITS,
+                            reason='SwapCompleted', created_at=swap.updated_at,
+                        ))
+                    if rng.random() < 0.7:
+                        rater, rated = (sender, receiver) if rng.random() < 0.5 else (receiver, sender)
+                        feedback.append(Feedback(
+                            swap_request=swap, rater=rater, rated_user=rated, rating=weighted(rng, RATINGS),
+                            expectations_matched=rng.random() < 0.8, created_at=self.moment_after(swap.updated_at),
+                        ))
+
+        self.offered.extend(batch_offered)
+        return users, skills, swaps, feedback, ledger
+
+
+def seed_perf_data(users=1000, skills_per_user=3, swaps_per_user=4, days=365, batch_size=1000, seed=None):
+    """Insert `users` synthetic users with skills, swaps in every status, feedback
+    and credit ledger entries, `batch_size` users per transaction. Emails are
+    perf-<run>-<n>@example.com (password SEED_PASSWORD) with a fresh run id, so
+    runs add up; `seed` makes the rest of the data reproducible.
+
+    Rows go in with bulk_create, so model save() and signals are bypassed; the
+    values they would derive (geolocation, skill tags, credits) are filled in
+    here. Returns row counts by model name.
+    """
+    rng = random.Random(seed)
+    plan = SeedPlan(rng, uuid.uuid4().hex[:8], skills_per_user, swaps_per_user, days)
+    counts = dict.fromkeys(['User', 'Skill', 'SwapRequest', 'Feedback', 'CreditTransaction'], 0)
+
+    for first_index in range(0, users, batch_size):
+        batch = plan.build(first_index, min(batch_size, users - first_index))
+        # bulk_create stamps auto_now fields with the current time, on the instances too
+        simulated = {model: [(row.pk, row.updated_at) for row in rows] for model, rows in ((Skill, batch[1]), (SwapRequest, batch[2]))}
+        with transaction.atomic():
+            for model, rows in zip((User, Skill, SwapRequest, Feedback, CreditTransaction), batch):
+                model.objects.bulk_create(rows, batch_size=500)
+                counts[model.__name__] += len(rows)
+            for model, updated in simulated.items():
+                restore_updated_at(model, updated)
+
+    # Swaps of later batches pay users of earlier ones, so settle balances from the ledger once at the end
+    ledger_total = CreditTransaction.objects.filter(user=OuterRef('pk')).order_by().values('user').annotate(
+        total=Sum('amount')
+    ).values('total')
+    User.objects.filter(email__startswith=f'perf-{plan.run}-').update(credits=Coalesce(Subquery(ledger_total), 0))
+    return counts
+
+
+def restore_updated_at(model, updated):
+    """Write back simulated `updated_at` values, given as (pk, updated_at) pairs.
+
+    One executemany instead of bulk_update, whose CASE expressions dominate seeding time.
+    """
+    quote = connection.ops.quote_name
+    pk, updated_at = model._meta.pk, model._meta.get_field('updated_at')
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'UPDATE {quote(model._meta.db_table)} SET {quote(updated_at.column)} = %s WHERE {quote(pk.column)} = %s',
+            [(updated_at.get_db_prep_value(value, connection), pk.get_db_prep_value(row_pk, connection)) for row_pk, value in updated]
+        )
@@ -1,8 +1,12 @@
 from rest_framework import serializers
-from django.contrib.auth import authenticate
 from django.core.validators import URLValidator
 from django.core.exceptions import ValidationError
-from .models import User, Skill, SwapRequest, Feedback, SystemMessage, Session
+from django.db.models import Prefetch
+from .hashing import hash_password, verify_password
+from .models import (
+    User, Skill, SwapRequest, ArchivedSwapRequest, Feedback, SystemMessage, Session, CreditTransaction, Notification,
+    RequestProfile, UserRatingRollup
+)
 
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
@@ -33,6 +37,7 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
     
     def create(self, validated_data):
         validated_data.pop('password_confirm')
+        validated_data['password_hash'] = hash_password(validated_data.pop('password'))
         user = User.objects.create_user(**validated_data)
         return user
 
@@ -46,8 +51,8 @@ class UserLoginSerializer(serializers.Serializer):
         password = data.get('password')
         
         if email and password:
-            user = authenticate(email=email, password=password)
-            if user:
+            user = User.objects.filter(email=email).first()
+            if verify_password(user, password):
                 if not user.is_active:
                     raise serializers.ValidationError("User account is disabled.")
                 if user.is_banned:
@@ -60,6 +65,10 @@ class UserLoginSerializer(serializers.Serializer):
             raise serializers.ValidationError("Must include email and password.")
 
 
+class TokenRefreshSerializer(serializers.Serializer):
+    refresh = serializers.CharField()
+
+
 class UserProfileSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
@@ -75,24 +84,39 @@ class UserProfileSerializer(serializers.ModelSerializer):
 class PublicUserSerializer(serializers.ModelSerializer):
     skills = serializers.SerializerMethodField()
     average_rating = serializers.SerializerMethodField()
+    distance_km = serializers.SerializerMethodField()
     
     class Meta:
         model = User
         fields = [
             'id', 'name', 'location', 'profile_photo_url', 'availability', 
             'timeslot', 'linkedin', 'instagram', 'youtube', 'facebook', 'x', 
-            'github', 'personal_portfolio', 'skills', 'average_rating'
+            'github', 'personal_portfolio', 'skills', 'average_rating', 'distance_km'
         ]
     
+    @staticmethod
+    def optimize(queryset):
+        """Prefetch skills and join rating rollups so serializing many users takes a fixed number of queries"""
+        return queryset.select_related('rating_rollup').prefetch_related(
+            Prefetch('skills', queryset=Skill.objects.filter(type='Offered', is_verified=True), to_attr='public_skills')
+        )
+    
     def get_skills(self, obj):
+        if hasattr(obj, 'public_skills'):
+            return SkillSerializer(obj.public_skills, many=True).data
         skills = Skill.objects.filter(user=obj, type='Offered', is_verified=True)
         return SkillSerializer(skills, many=True).data
     
+    def get_distance_km(self, obj):
+        # Only set by location searches; exact coordinates are never exposed
+        distance = getattr(obj, 'distance_km', None)
+        return round(distance, 1) if distance is not None else None
+    
     def get_average_rating(self, obj):
-        feedbacks = Feedback.objects.filter(rated_user=obj)
-        if feedbacks.exists():
-            return sum(f.rating for f in feedbacks) / feedbacks.count()
-        return 0
+        try:
+            return obj.rating_rollup.average or 0
+        except UserRatingRollup.DoesNotExist:
+            return 0
 
 
 class SkillSerializer(serializers.ModelSerializer):
@@ -101,11 +125,11 @@ class SkillSerializer(serializers.ModelSerializer):
     class Meta:
         model = Skill
         fields = [
-            'id', 'user', 'name', 'type', 'description', 'is_verified',
+            'id', 'user', 'name', 'tag', 'type', 'description', 'is_verified',
             'verification_count', 'proof_file_url', 'proof_file_type',
-            'proof_description', 'created_at'
+            'proof_description', 'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'user', 'verification_count', 'created_at']
+        read_only_fields = ['id', 'user', 'tag', 'verification_count', 'created_at', 'updated_at']
 
 
 class SkillCreateSerializer(serializers.ModelSerializer):
@@ -115,6 +139,8 @@ class SkillCreateSerializer(serializers.ModelSerializer):
             'name', 'type', 'description', 'is_verified', 'proof_file_url',
             'proof_file_type', 'proof_description'
         ]
+        # Set only by peer verifications (api/verification.py) and admins
+        read_only_fields = ['is_verified']
     
     def validate_type(self, value):
         if value not in ['Offered', 'Wanted']:
@@ -143,6 +169,10 @@ class SwapRequestSerializer(serializers.ModelSerializer):
 
 
 class SwapRequestCreateSerializer(serializers.ModelSerializer):
+    receiver_id = serializers.UUIDField()
+    offered_skill_id = serializers.UUIDField()
+    requested_skill_id = serializers.UUIDField()
+    
     class Meta:
         model = SwapRequest
         fields = ['receiver_id', 'offered_skill_id', 'requested_skill_id', 'message']
@@ -150,30 +180,33 @@ class SwapRequestCreateSerializer(serializers.ModelSerializer):
     def validate(self, data):
         user = self.context['request'].user
         
-        # Check if receiver exists
-        try:
-            receiver = User.objects.get(id=data['receiver_id'])
-            if receiver == user:
-                raise serializers.ValidationError("Cannot send swap request to yourself.")
-        except User.DoesNotExist:
-            raise serializers.ValidationError("Receiver not found.")
+        if data['receiver_id'] == user.id:
+            raise serializers.ValidationError("Cannot send swap request to yourself.")
+        
+        # Resolve both skills and their owners in one joined query
+        skills = {
+            skill.id: skill
+            for skill in Skill.objects.select_related('user').filter(
+                id__in=[data['offered_skill_id'], data['requested_skill_id']]
+            )
+        }
         
         # Check if offered skill belongs to sender
-        try:
-            offered_skill = Skill.objects.get(id=data['offered_skill_id'], user=user)
-            if offered_skill.type != 'Offered':
-                raise serializers.ValidationError("Offered skill must be of type 'Offered'.")
-        except Skill.DoesNotExist:
+        offered_skill = skills.get(data['offered_skill_id'])
+        if offered_skill is None or offered_skill.user_id != user.id:
             raise serializers.ValidationError("Offered skill not found or doesn't belong to you.")
+        if offered_skill.type != 'Offered':
+            raise serializers.ValidationError("Offered skill must be of type 'Offered'.")
         
         # Check if requested skill belongs to receiver
-        try:
-            requested_skill = Skill.objects.get(id=data['requested_skill_id'], user=receiver)
-            if requested_skill.type != 'Offered':
-                raise serializers.ValidationError("Requested skill must be of type 'Offered'.")
-        except Skill.DoesNotExist:
+        requested_skill = skills.get(data['requested_skill_id'])
+        if requested_skill is None or requested_skill.user_id != data['receiver_id']:
             raise serializers.ValidationError("Requested skill not found or doesn't belong to receiver.")
+        if requested_skill.type != 'Offered':
+            raise serializers.ValidationError("Requested skill must be of type 'Offered'.")
         
+        data['offered_skill'] = offered_skill
+        data['requested_skill'] = requested_skill
         return data
 
 
@@ -196,24 +229,60 @@ class FeedbackSerializer(serializers.ModelSerializer):
 
 
 class FeedbackCreateSerializer(serializers.ModelSerializer):
+    swap_request_id = serializers.UUIDField()
+    
     class Meta:
         model = Feedback
         fields = ['swap_request_id', 'rating', 'comment', 'expectations_matched', 'skill_verified_by_peer']
     
-    def validate(self, data):
-        user = self.context['request'].user
-        
-        # Check if swap request exists and user is involved
-        try:
-            swap_request = SwapRequest.objects.get(id=data['swap_request_id'])
-            if swap_request.sender != user and swap_request.receiver != user:
-                raise serializers.ValidationError("You can only provide feedback for swaps you're involved in.")
-            if swap_request.status != 'Completed':
-                raise serializers.ValidationError("Can only provide feedback for completed swaps.")
-        except SwapRequest.DoesNotExist:
-            raise serializers.ValidationError("Swap request not found.")
-        
-        return data
+    def validate_rating(self, value):
+        if value < 1 or value > 5:
+            raise serializers.ValidationError("Rating must be between 1 and 5.")
+        return value
+
+
+class CreditTransactionSerializer(serializers.ModelSerializer):
+    balance_after = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = CreditTransaction
+        fields = ['id', 'swap_request', 'amount', 'reason', 'created_at', 'balance_after']
+        read_only_fields = fields
+
+
+class SwapHistorySerializer(serializers.ModelSerializer):
+    archived = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ArchivedSwapRequest
+        fields = [
+            'id', 'sender', 'receiver', 'offered_skill_id', 'offered_skill_name',
+            'requested_skill_id', 'requested_skill_name', 'message', 'status',
+            'created_at', 'updated_at', 'archived', 'archived_at'
+        ]
+        read_only_fields = fields
+
+    def get_archived(self, obj):
+        return obj.archived_at is not None
+
+
+class RequestProfileSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = RequestProfile
+        fields = [
+            'id', 'requested_by', 'request_id', 'method', 'path', 'view_name',
+            'status_code', 'duration_ms', 'engine', 'created_at'
+        ]
+        read_only_fields = fields
+
+
+class NotificationSerializer(serializers.ModelSerializer):
+    actor_name = serializers.CharField(source='actor.name', read_only=True, default=None)
+
+    class Meta:
+        model = Notification
+        fields = ['id', 'kind', 'swap_request', 'actor', 'actor_name', 'read_at', 'created_at']
+        read_only_fields = fields
 
 
 class SystemMessageSerializer(serializers.ModelSerializer):
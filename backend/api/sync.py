@@ -0,0 +1,68 @@
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from .models import Skill, SwapRequest, Tombstone
+
+
+def record_skill_deletion(sender, instance, **kwargs):
+    """post_delete receiver: tombstone a skill for its owner"""
+    Tombstone.objects.create(user_id=instance.user_id, entity='Skill', object_id=instance.id)
+
+
+def record_swap_deletion(sender, instance, **kwargs):
+    """post_delete receiver: tombstone a swap for both participants"""
+    Tombstone.objects.bulk_create([
+        Tombstone(user_id=instance.sender_id, entity='SwapRequest', object_id=instance.id),
+        Tombstone(user_id=instance.receiver_id, entity='SwapRequest', object_id=instance.id),
+    ])
+
+
+def changes_since(user, since):
+    """Skills and swaps of `user` changed after `since`, plus ids deleted since then.
+
+    `since` is the watermark returned by the previous call. None, or a watermark
+    older than the tombstone retention, yields a full snapshot with full=True so
+    the client replaces its copy instead of merging.
+    """
+    config = settings.DELTA_SYNC
+    now = timezone.now()
+    full = since is None or since < now - timedelta(days=config['TOMBSTONE_RETENTION_DAYS'])
+
+    skills = Skill.objects.filter(user=user).select_related('user')
+    swap_requests = SwapRequest.objects.filter(Q(sender=user) | Q(receiver=user)).select_related(
+        'sender', 'receiver', 'offered_skill__user', 'requested_skill__user'
+    )
+    deleted = {'skills': [], 'swap_requests': []}
+
+    if not full:
+        # Re-read a short overlap: a transaction can commit after a later one
+        # with an earlier timestamp. Clients apply changes idempotently.
+        lower = since - timedelta(seconds=config['WATERMARK_OVERLAP_SECONDS'])
+        skills = skills.filter(updated_at__gt=lower)
+        swap_requests = swap_requests.filter(updated_at__gt=lower)
+        tombstones = Tombstone.objects.filter(user_id=user.id, deleted_at__gt=lower)
+        for entity, object_id in tombstones.values_list('entity', 'object_id'):
+            deleted['skills' if entity == 'Skill' else 'swap_requests'].append(object_id)
+
+    return {
+        'watermark': now,
+        'full': full,
+        'skills': list(skills),
+        'swap_requests': list(swap_requests),
+        'deleted': deleted,
+    }
+
+
+def prune_tombstones(batch_size=1000, pause=0.0):
+    """Delete tombstones past the retention window in small batches; returns the number deleted"""
+    cutoff = timezone.now() - timedelta(days=settings.DELTA_SYNC['TOMBSTONE_RETENTION_DAYS'])
+    deleted = 0
+    while True:
+        batch = list(Tombstone.objects.filter(deleted_at__lt=cutoff).values_list('id', flat=True)[:batch_size])
+        if not batch:
+            return deleted
+        deleted += Tombstone.objects.filter(id__in=batch).delete()[0]
+        if pause:
+            time.sleep(pause)
@@ -0,0 +1,192 @@
+import csv
+import re
+import threading
+import time
+import unicodedata
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+# Anything but word characters and the punctuation that tells skills apart (C++, C#, Node.js, UI/UX)
+_SEPARATORS = re.compile(r'[^\w+#./]+')
+
+
+def normalize_skill_name(name):
+    """Matching form of a skill name: case-folded, separators collapsed to single spaces"""
+    text = unicodedata.normalize('NFKC', name or '').casefold()
+    return ' '.join(word for word in (token.strip('.') for token in _SEPARATORS.split(text)) if word)
+
+
+def read_taxonomy(path):
+    """Rows of `name|alias|...` from the seed file; the first entry is the display name"""
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.reader((line for line in f if line.strip() and not line.startswith('#')), delimiter='|'):
+            names = [name.strip() for name in row if name.strip()]
+            if names:
+                yield names
+
+
+class _Node:
+    __slots__ = ('children', 'tag_ids')
+
+    def __init__(self):
+        self.children = {}
+        self.tag_ids = None
+
+
+class TagIndex:
+    """In-process map of normalized skill names and aliases to SkillTag ids.
+
+    Exact lookups (write-time resolution) are a dict hit. Prefix lookups
+    (search) walk a character trie of every word-start suffix of every alias,
+    so "learn" finds "machine learning". The index is topped up from the alias
+    table by id at most once per TAXONOMY['SYNC_SECONDS'], so tags created by
+    other workers show up within that window; it is rebuilt from scratch when
+    aliases have been deleted.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clear()
+
+    def _clear(self):
+        self._exact = {}
+        self._root = _Node()
+        self._last_alias_id = 0
+        self._alias_count = 0
+        self._next_sync = 0.0
+
+    def _insert(self, alias, tag_id):
+        # Caller holds the lock
+        self._exact[alias] = tag_id
+        words = alias.split(' ')
+        for start in range(len(words)):
+            node = self._root
+            for char in ' '.join(words[start:]):
+                node = node.children.setdefault(char, _Node())
+            if node.tag_ids is None:
+                node.tag_ids = set()
+            node.tag_ids.add(tag_id)
+
+    def sync(self):
+        from .models import SkillTagAlias
+
+        with self._lock:
+            if time.monotonic() < self._next_sync:
+                return
+            self._next_sync = time.monotonic() + settings.TAXONOMY['SYNC_SECONDS']
+            alias_count = SkillTagAlias.objects.count()
+            if alias_count < self._alias_count:
+                self._clear()
+            aliases = SkillTagAlias.objects.filter(id__gt=self._last_alias_id).order_by('id')
+            for alias_id, alias, tag_id in aliases.values_list('id', 'name', 'tag_id'):
+                self._insert(alias, tag_id)
+                self._last_alias_id = alias_id
+            self._alias_count = alias_count
+
+    def resolve(self, name):
+        """SkillTag id for free-text `name`, creating the tag on first sight; None for blank names"""
+        alias = normalize_skill_name(name)
+        if not alias:
+            return None
+        if time.monotonic() >= self._next_sync:
+            self.sync()
+        tag_id = self._exact.get(alias)
+        if tag_id is None:
+            tag_id = get_or_create_tag(name, alias)
+            with self._lock:
+                self._insert(alias, tag_id)
+        return tag_id
+
+    def search(self, text):
+        """Tags with an alias that has a word starting with `text`, for `tag__in` filters.
+
+        A set of ids while it holds at most TAXONOMY['SEARCH_MAX_TAGS'] tags;
+        past that (short prefixes such as "p") the same match as a SkillTagAlias
+        subquery, so the database sees no huge id list and no tag is dropped.
+        """
+        from .models import SkillTagAlias
+
+        prefix = normalize_skill_name(text)
+        if not prefix:
+            return set()
+        if time.monotonic() >= self._next_sync:
+            self.sync()
+        limit = settings.TAXONOMY['SEARCH_MAX_TAGS']
+        found = set()
+        with self._lock:
+            node = self._root
+            for char in prefix:
+                node = node.children.get(char)
+                if node is None:
+                    return found
+            stack = [node]
+            while stack:
+                node = stack.pop()
+                if node.tag_ids:
+                    found.update(node.tag_ids)
+                    if len(found) > limit:
+                        break
+                stack.extend(node.children.values())
+            else:
+                return found
+        return SkillTagAlias.objects.filter(
+            Q(name__startswith=prefix) | Q(name__contains=f' {prefix}')
+        ).values('tag_id')
+
+    def reset(self):
+        with self._lock:
+            self._clear()
+
+
+skill_tags = TagIndex()
+
+
+def get_or_create_tag(name, alias):
+    """Id of the tag `alias` (a normalized name) resolves to, creating a tag named `name` if none does"""
+    from .models import SkillTag, SkillTagAlias
+
+    tag_id = SkillTagAlias.objects.filter(name=alias).values_list('tag_id', flat=True).first()
+    if tag_id is not None:
+        return tag_id
+    try:
+        with transaction.atomic():
+            tag = SkillTag.objects.create(name=name.strip())
+            SkillTagAlias.objects.create(name=alias, tag=tag)
+            return tag.id
+    except IntegrityError:
+        # Another request created it first
+        return SkillTagAlias.objects.get(name=alias).tag_id
+
+
+def retag_skills(batch_size=1000):
+    """Re-resolve every skill's tag from its name, in primary-key batches.
+
+    For after adding aliases or merging tags. Returns the number of skills
+    whose tag changed.
+    """
+    from .models import Skill
+    from .versioning import bump_user_version
+
+    changed, last_id = 0, None
+    while True:
+        skills = Skill.objects.order_by('id').only('id', 'user_id', 'name', 'tag_id')
+        if last_id is not None:
+            skills = skills.filter(id__gt=last_id)
+        batch = list(skills[:batch_size])
+        if not batch:
+            return changed
+
+        now = timezone.now()
+        updated = []
+        for skill in batch:
+            tag_id = skill_tags.resolve(skill.name)
+            if tag_id != skill.tag_id:
+                skill.tag_id, skill.updated_at = tag_id, now
+                updated.append(skill)
+        with transaction.atomic():
+            Skill.objects.bulk_update(updated, ['tag', 'updated_at'])
+            bump_user_version({skill.user_id for skill in updated})
+        changed += len(updated)
+        last_id = batch[-1].id
@@ -1,3 +1,1136 @@
-from django.test import TestCase
+import asyncio
+import json
+import marshal
+import threading
+import time
+import uuid
+from datetime import timedelta
+from unittest import mock
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.db import connection, IntegrityError, OperationalError
+from django.db.models import Sum
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from .models import (
+    User, Skill, SwapRequest, Feedback, CreditTransaction, Session, Notification, Tombstone,
+    DiscoveryScore, SkillTagAlias, ArchivedSwapRequest, RequestProfile, UserRatingRollup, UserMonthlyRatingRollup,
+    SkillTagRatingRollup, DailyRatingRollup
+)
+from .credits import complete_swap, credit_history, take_balance_snapshots
+from .verification import record_verification
+from .throttling import SlidingWindowCounter, TokenBucket
+from .hashing import HashingPool, HashingPoolSaturated
+from .instrumentation import registry
+from .querywatch import normalize_sql
+from .errors import classify, counters as error_counters
+from .tokens import issue_tokens, revocations, blacklist, sweep_expired_sessions
+from .notifications import hub as notification_hub, notify, stream_events
+from .geo import covering_cells, geohash_encode, get_gazetteer, next_cell
+from .ranking import rank_users
+from .taxonomy import normalize_skill_name, skill_tags
+from .autocomplete import skill_suggestions
+from .archival import archive_terminal_swaps
+from .replicas import PIN_COOKIE, PIN_HEADER, ReplicaRouter, replica_for
+from .seeding import seed_perf_data
+from .replay import parse_mix, summarize
+from .feedback_stats import COUNT_FIELDS, rebuild_feedback_rollups
+from .feedback import submit_feedback
 
-# Create your tests here.
+
+def make_user(email, **extra_fields):
+    # Skip password hashing: these tests never log in
+    return User.objects.create(email=email, name=email.split('@')[0], **extra_fields)
+
+
+def make_accepted_swap(sender, receiver):
+    offered = Skill.objects.create(user=sender, name='Python', type='Offered')
+    requested = Skill.objects.create(user=receiver, name='Guitar', type='Offered')
+    return SwapRequest.objects.create(
+        sender=sender, receiver=receiver,
+        offered_skill=offered, requested_skill=requested,
+        status='Accepted'
+    )
+
+
+def run_concurrently(fn, workers):
+    """Call fn(i) for i in range(workers) on as many threads, released together.
+
+    SQLite serialises writers, so lock errors are retried with backoff.
+    Returns (results, errors).
+    """
+    barrier = threading.Barrier(workers)
+    results, errors = [], []
+
+    def worker(i):
+        try:
+            barrier.wait()
+            for attempt in range(200):
+                try:
+                    results.append(fn(i))
+                    break
+                except OperationalError as e:
+                    if 'locked' not in str(e):
+                        raise
+                    time.sleep(0.001 * (attempt + 1))
+            else:
+                errors.append(f'worker {i} never acquired the write lock')
+        except Exception as e:
+            errors.append(e)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, errors
+
+@override_settings(SWAP_COMPLETION_CREDITS=2)
+class CreditLedgerTests(TestCase):
+    def setUp(self):
+        self.alice = make_user('alice@example.com')
+        self.bob = make_user('bob@example.com')
+
+    def test_complete_swap_pays_both_participants_once(self):
+        swap = make_accepted_swap(self.alice, self.bob)
+
+        self.assertIsNotNone(complete_swap(swap.id, self.bob))
+        self.assertIsNone(complete_swap(swap.id, self.alice))
+
+        swap.refresh_from_db()
+        self.assertEqual(swap.status, 'Completed')
+        for user in (self.alice, self.bob):
+            user.refresh_from_db()
+            self.assertEqual(user.credits, 2)
+            self.assertEqual(user.credit_transactions.count(), 1)
+
+    def test_complete_swap_rejects_non_participant(self):
+        swap = make_accepted_swap(self.alice, self.bob)
+        carol = make_user('carol@example.com')
+
+        self.assertIsNone(complete_swap(swap.id, carol))
+        swap.refresh_from_db()
+        self.assertEqual(swap.status, 'Accepted')
+
+    def test_history_balances_match_across_snapshots(self):
+        carol = make_user('carol@example.com')
+        for _ in range(3):
+            complete_swap(make_accepted_swap(self.alice, self.bob).id, self.alice)
+        take_balance_snapshots(settle_seconds=0)
+        for _ in range(2):
+            complete_swap(make_accepted_swap(carol, self.alice).id, carol)
+
+        entries, has_next = credit_history(self.alice, limit=10)
+        self.assertFalse(has_next)
+        self.assertEqual([entry.balance_after for entry in entries], [10, 8, 6, 4, 2])
+
+        entries, has_next = credit_history(self.alice, before=entries[1].id, limit=2)
+        self.assertTrue(has_next)
+        self.assertEqual([entry.balance_after for entry in entries], [6, 4])
+
+    def test_history_endpoint_clamps_limit(self):
+        complete_swap(make_accepted_swap(self.alice, self.bob).id, self.alice)
+        complete_swap(make_accepted_swap(self.alice, self.bob).id, self.alice)
+        auth = {'HTTP_AUTHORIZATION': f'Bearer {issue_tokens(self.alice)["access"]}'}
+
+        for limit in (0, -5):
+            response = self.client.get('/api/users/me/credits/history/', {'limit': limit}, **auth)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.json()['results']), 1)
+            self.assertIsNotNone(response.json()['next_before'])
+
+
+@override_settings(SKILL_VERIFICATION_THRESHOLD=2)
+class SkillVerificationTests(TestCase):
+    def test_verifications_are_idempotent_and_promote_at_threshold(self):
+        owner = make_user('owner@example.com')
+        skill = Skill.objects.create(user=owner, name='Python', type='Offered')
+        peer, other = make_user('peer@example.com'), make_user('other@example.com')
+
+        self.assertTrue(record_verification(skill.id, peer))
+        self.assertFalse(record_verification(skill.id, peer, source='Feedback'))
+        skill.refresh_from_db()
+        self.assertEqual((skill.verification_count, skill.is_verified), (1, False))
+
+        self.assertTrue(record_verification(skill.id, other, source='Feedback'))
+        skill.refresh_from_db()
+        self.assertEqual((skill.verification_count, skill.is_verified), (2, True))
+
+    def test_owner_cannot_mark_own_skill_verified(self):
+        owner = make_user('owner@example.com')
+        auth = {'HTTP_AUTHORIZATION': f'Bearer {issue_tokens(owner)["access"]}'}
+
+        response = self.client.post(
+            '/api/skills/', {'name': 'Python', 'type': 'Offered', 'is_verified': True},
+            content_type='application/json', **auth
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertFalse(response.json()['is_verified'])
+
+        skill_id = response.json()['id']
+        self.client.put(f'/api/skills/{skill_id}/', {'is_verified': True}, content_type='application/json', **auth)
+        self.assertFalse(Skill.objects.get(id=skill_id).is_verified)
+
+
+class SwapRequestGuardTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_identical_pending_requests_are_rejected_by_the_index(self):
+        swap = make_accepted_swap(make_user('alice@example.com'), make_user('bob@example.com'))
+        swap.status = 'Pending'
+        swap.save()
+        duplicate = dict(
+            sender=swap.sender, receiver=swap.receiver,
+            offered_skill=swap.offered_skill, requested_skill=swap.requested_skill
+        )
+
+        SwapRequest.objects.create(status='Rejected', **duplicate)
+        with self.assertRaises(IntegrityError):
+            SwapRequest.objects.create(**duplicate)
+
+    def test_sliding_window_counter_blocks_over_limit(self):
+        limiter = SlidingWindowCounter('3/m', prefix='test')
+
+        self.assertEqual([limiter.hit('user')[0] for _ in range(4)], [True, True, True, False])
+        self.assertTrue(limiter.hit('other-user')[0])
+        self.assertGreater(limiter.hit('user')[1], 0)
+
+    def test_token_bucket_allows_burst_then_rejects(self):
+        bucket = TokenBucket('2/m', prefix='test')
+
+        self.assertEqual([bucket.hit('203.0.113.7')[0] for _ in range(3)], [True, True, False])
+        self.assertEqual(bucket.hit('203.0.113.7')[1], 30)
+
+    def test_login_over_limit_is_rejected_before_hashing(self):
+        caches[settings.RATE_LIMIT_CACHE].clear()
+        credentials = {'email': 'alice@example.com', 'password': 'wrong'}
+
+        with mock.patch('api.serializers.verify_password', return_value=False) as verify:
+            responses = [
+                self.client.post('/api/auth/login/', credentials, content_type='application/json')
+                for _ in range(6)
+            ]
+
+        self.assertEqual([response.status_code for response in responses], [400] * 5 + [429])
+        self.assertGreater(int(responses[-1]['Retry-After']), 0)
+        self.assertEqual(verify.call_count, 5)
+
+
+class HashingPoolTests(TestCase):
+    def test_work_beyond_workers_and_queue_is_shed(self):
+        pool = HashingPool(max_workers=1, max_queue=1, timeout=5)
+        release = threading.Event()
+        try:
+            running = pool.submit(release.wait)
+            queued = pool.submit(release.wait)
+            with self.assertRaises(HashingPoolSaturated):
+                pool.submit(release.wait)
+        finally:
+            release.set()
+        running.result()
+        queued.result()
+        pool.shutdown()
+        self.assertEqual(HashingPool(1, 0, timeout=5).run(len, 'abc'), 3)
+
+
+class PerformanceInstrumentationTests(TestCase):
+    def test_sampled_request_reports_server_timing_and_metrics(self):
+        registry.reset()
+        with self.settings(PERFORMANCE_INSTRUMENTATION={
+            'ENABLED': True, 'SAMPLE_RATE': 1.0, 'METRICS_ALLOWED_IPS': ['127.0.0.1'],
+        }):
+            response = self.client.get('/api/users/public/')
+            self.assertIn('db;dur=', response['Server-Timing'])
+
+            metrics = self.client.get('/api/metrics/', REMOTE_ADDR='127.0.0.1').content.decode()
+        self.assertIn('api_request_duration_seconds_count{route="get_public_user_list",status="2xx"} 1', metrics)
+        self.assertIn('api_sql_queries_total{route="get_public_user_list",status="2xx"} 1', metrics)
+
+
+class QueryInspectionTests(TestCase):
+    def test_normalize_sql_collapses_literals_and_in_lists(self):
+        self.assertEqual(
+            normalize_sql("SELECT * FROM t WHERE a = 'x''y' AND b IN (%s, %s, %s)  LIMIT 21"),
+            normalize_sql('SELECT * FROM t WHERE a = %s AND b IN (%s) LIMIT 1'),
+        )
+
+    def test_repeated_shapes_are_logged_with_their_origin(self):
+        for i in range(3):
+            Skill.objects.create(user=make_user(f'user{i}@example.com'), name='Python', type='Offered', is_verified=True)
+        token = issue_tokens(make_user('viewer@example.com'))['access']
+
+        with self.settings(QUERY_INSPECTION={
+            'ENABLED': True, 'SAMPLE_RATE': 1.0, 'REPEAT_THRESHOLD': 2, 'SLOW_QUERY_MS': 10000, 'EXPLAIN': False,
+        }):
+            with self.assertLogs('api.querywatch', level='WARNING') as logs:
+                self.client.get('/api/users/public/search/', {'q': 'python'}, HTTP_AUTHORIZATION=f'Bearer {token}')
+
+        records = [json.loads(line.split(':', 2)[2]) for line in logs.output]
+        self.assertTrue(any(
+            record['event'] == 'repeated_query' and record['count'] == 3
+            and record['origin'].startswith('api/serializers.py')
+            for record in records
+        ))
+
+
+class ErrorHandlingTests(TestCase):
+    def setUp(self):
+        error_counters.reset()
+
+    def test_lock_errors_become_retryable_503s(self):
+        with mock.patch('api.views.SystemMessage.objects.filter', side_effect=OperationalError('database is locked')):
+            with self.assertLogs('api.errors', level='WARNING'):
+                response = self.client.get('/api/system-messages/active/', HTTP_X_REQUEST_ID='req-1')
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertEqual(response.json()['request_id'], 'req-1')
+        self.assertEqual(error_counters.snapshot()[0]['kind'], 'lock_contention')
+
+    def test_only_connection_failures_count_as_unavailable(self):
+        self.assertEqual(classify(OperationalError('unable to open database file')), ('database_unavailable', True))
+        self.assertEqual(classify(OperationalError(2006, 'MySQL server has gone away')), ('database_unavailable', True))
+        self.assertEqual(classify(OperationalError('no such column: api_user.nickname')), ('bug', False))
+        self.assertEqual(classify(OperationalError('near "SELEC": syntax error')), ('bug', False))
+
+    def test_bugs_are_logged_and_counted_by_view(self):
+        with mock.patch('api.views.SystemMessage.objects.filter', side_effect=KeyError('boom')):
+            with self.assertLogs('api.errors', level='ERROR') as logs:
+                response = self.client.get('/api/system-messages/active/')
+
+        self.assertEqual(response.status_code, 500)
+        record = json.loads(logs.output[0].split(':', 2)[2])
+        self.assertEqual((record['view'], record['exception']), ('get_active_system_messages', 'builtins.KeyError'))
+        self.assertIn('Traceback', record['traceback'])
+
+
+class SessionTests(TestCase):
+    def setUp(self):
+        revocations.reset()
+        blacklist.reset()
+        self.alice = make_user('alice@example.com')
+
+    def test_refresh_token_is_stored_hashed(self):
+        tokens = issue_tokens(self.alice)
+        session = Session.objects.get(user=self.alice)
+        self.assertEqual(len(session.refresh_jti_hash), 64)
+        self.assertNotIn(session.refresh_jti_hash, tokens['refresh'])
+
+    def test_refresh_rotates_and_reuse_revokes_the_session(self):
+        tokens = issue_tokens(self.alice)
+        response = self.client.post('/api/auth/token/refresh/', {'refresh': tokens['refresh']}, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        rotated = response.json()['tokens']
+        self.assertNotEqual(rotated['refresh'], tokens['refresh'])
+        self.assertEqual(self.client.get('/api/users/me/', HTTP_AUTHORIZATION=f'Bearer {rotated["access"]}').status_code, 200)
+
+        # Replaying the old refresh token kills the session, including the rotated tokens
+        blacklist.reset()
+        response = self.client.post('/api/auth/token/refresh/', {'refresh': tokens['refresh']}, content_type='application/json')
+        self.assertEqual(response.status_code, 401)
+        self.assertIsNotNone(Session.objects.get(user=self.alice).revoked_at)
+        response = self.client.post('/api/auth/token/refresh/', {'refresh': rotated['refresh']}, content_type='application/json')
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(self.client.get('/api/users/me/', HTTP_AUTHORIZATION=f'Bearer {rotated["access"]}').status_code, 401)
+
+    def test_login_and_refresh_stamp_last_login(self):
+        tokens = issue_tokens(self.alice)
+        self.alice.refresh_from_db()
+        self.assertIsNotNone(self.alice.last_login)
+
+        stale = timezone.now() - timedelta(days=3)
+        User.objects.filter(id=self.alice.id).update(last_login=stale)
+        self.client.post('/api/auth/token/refresh/', {'refresh': tokens['refresh']}, content_type='application/json')
+        self.alice.refresh_from_db()
+        self.assertGreater(self.alice.last_login, stale)
+
+        # Seen within the hour: nothing to write
+        stamped, version = self.alice.last_login, self.alice.version
+        issue_tokens(self.alice)
+        self.alice.refresh_from_db()
+        self.assertEqual((self.alice.last_login, self.alice.version), (stamped, version))
+
+    def test_authenticated_request_loads_the_user_once(self):
+        tokens = issue_tokens(self.alice)
+        revocations.is_revoked('warm-up')
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/api/users/me/', HTTP_AUTHORIZATION=f'Bearer {tokens["access"]}')
+        user_queries = [q for q in queries.captured_queries if f'FROM "{User._meta.db_table}"' in q['sql']]
+        self.assertEqual(len(user_queries), 1)
+
+    def test_logout_revokes_access_and_refresh_tokens(self):
+        tokens = issue_tokens(self.alice)
+        headers = {'HTTP_AUTHORIZATION': f'Bearer {tokens["access"]}'}
+        self.assertEqual(self.client.get('/api/users/me/', **headers).status_code, 200)
+
+        self.assertEqual(self.client.post('/api/auth/logout/', **headers).status_code, 200)
+        self.assertEqual(self.client.get('/api/users/me/', **headers).status_code, 401)
+        response = self.client.post('/api/auth/token/refresh/', {'refresh': tokens['refresh']}, content_type='application/json')
+        self.assertEqual(response.status_code, 401)
+
+    def test_revocations_from_other_workers_are_synced(self):
+        issue_tokens(self.alice)
+        session = Session.objects.get(user=self.alice)
+        self.assertFalse(revocations.is_revoked(str(session.id)))
+
+        Session.objects.filter(id=session.id).update(revoked_at=timezone.now())
+        self.assertFalse(revocations.is_revoked(str(session.id)))
+        revocations._next_sync = 0.0
+        self.assertTrue(revocations.is_revoked(str(session.id)))
+
+    def test_sweeper_deletes_only_expired_sessions(self):
+        for _ in range(5):
+            issue_tokens(self.alice)
+        Session.objects.filter(id__in=list(Session.objects.values_list('id', flat=True)[:3])).update(
+            expires_at=timezone.now() - timedelta(minutes=1)
+        )
+        self.assertEqual(sweep_expired_sessions(batch_size=2), 3)
+        self.assertEqual(Session.objects.count(), 2)
+
+
+class NotificationTests(TestCase):
+    def setUp(self):
+        revocations.reset()
+        self.swap = make_accepted_swap(make_user('alice@example.com'), make_user('bob@example.com'))
+        self.swap.status = 'Pending'
+        self.swap.save()
+
+    def test_swap_events_are_stored_and_listed_after_cursor(self):
+        receiver_auth = {'HTTP_AUTHORIZATION': f'Bearer {issue_tokens(self.swap.receiver)["access"]}'}
+        sender_auth = {'HTTP_AUTHORIZATION': f'Bearer {issue_tokens(self.swap.sender)["access"]}'}
+        self.assertEqual(self.client.put(f'/api/swap-requests/{self.swap.id}/accept/', **receiver_auth).status_code, 200)
+
+        response = self.client.get('/api/notifications/unread/', **sender_auth).json()
+        self.assertEqual(response['unread_count'], 1)
+        self.assertEqual(response['results'][0]['kind'], 'SwapAccepted')
+        self.assertEqual(response['results'][0]['actor_name'], 'bob')
+
+        cursor = response['cursor']
+        self.assertEqual(self.client.get(f'/api/notifications/unread/?since={cursor}', **sender_auth).json()['results'], [])
+        response = self.client.put('/api/notifications/read/', {'up_to': cursor}, content_type='application/json', **sender_auth)
+        self.assertEqual(response.json()['marked'], 1)
+        self.assertEqual(self.client.get('/api/notifications/unread/', **sender_auth).json()['unread_count'], 0)
+
+    def test_unread_limit_is_clamped_and_validated(self):
+        notify(self.swap.receiver, 'SwapRequested', self.swap, actor=self.swap.sender)
+        notify(self.swap.receiver, 'SwapCancelled', self.swap, actor=self.swap.sender)
+        auth = {'HTTP_AUTHORIZATION': f'Bearer {issue_tokens(self.swap.receiver)["access"]}'}
+
+        for limit in (0, -1):
+            response = self.client.get('/api/notifications/unread/', {'limit': limit}, **auth)
+            self.assertEqual(len(response.json()['results']), 1)
+        self.assertEqual(self.client.get('/api/notifications/unread/', {'limit': 'all'}, **auth).status_code, 400)
+
+    def test_stream_replays_after_cursor_then_delivers_live_events(self):
+        receiver = self.swap.receiver
+        first = notify(receiver, 'SwapRequested', self.swap, actor=self.swap.sender)
+        second = notify(receiver, 'SwapCancelled', self.swap, actor=self.swap.sender)
+
+        async def read_stream():
+            events = stream_events(receiver.id, first.id, until=time.time() + 60)
+            chunks = [await events.__anext__(), await events.__anext__()]
+            self.assertEqual(notification_hub.connection_count(), 1)
+            notification_hub.deliver(receiver.id, {'id': second.id})  # Already replayed
+            notification_hub.deliver(receiver.id, {'id': second.id + 1})
+            chunks.append(await asyncio.wait_for(events.__anext__(), timeout=1))
+            await events.aclose()
+            return chunks
+
+        retry, replayed, live = async_to_sync(read_stream)()
+        self.assertTrue(retry.startswith('retry:'))
+        self.assertTrue(replayed.startswith(f'id: {second.id}\n'))
+        self.assertTrue(live.startswith(f'id: {second.id + 1}\n'))
+        self.assertEqual(notification_hub.connection_count(), 0)
+
+    def test_stream_rejects_missing_token(self):
+        self.assertEqual(self.client.get('/api/notifications/stream/').status_code, 401)
+
+    def test_stream_is_refused_under_wsgi(self):
+        token = issue_tokens(self.swap.receiver)['access']
+        response = self.client.get('/api/notifications/stream/', {'token': token})
+        self.assertEqual(response.status_code, 501)
+        self.assertEqual(notification_hub.connection_count(), 0)
+
+
+class DeltaSyncTests(TestCase):
+    def setUp(self):
+        revocations.reset()
+        self.swap = make_accepted_swap(make_user('alice@example.com'), make_user('bob@example.com'))
+        self.auth = {'HTTP_AUTHORIZATION': f'Bearer {issue_tokens(self.swap.sender)["access"]}'}
+
+    def changes(self, since=None):
+        query = {'since': since} if since else {}
+        return self.client.get('/api/users/me/changes/', query, **self.auth).json()
+
+    def test_full_snapshot_then_only_changed_rows(self):
+        first = self.changes()
+        self.assertTrue(first['full'])
+        self.assertEqual(len(first['skills']), 1)
+        self.assertEqual(len(first['swap_requests']), 1)
+
+        # Push existing rows out of the overlap window
+        old = timezone.now() - timedelta(minutes=5)
+        Skill.objects.update(updated_at=old)
+        SwapRequest.objects.update(updated_at=old)
+        self.assertEqual(self.changes(first['watermark'])['swap_requests'], [])
+
+        self.swap.status = 'Completed'
+        self.swap.save()
+        delta = self.changes(first['watermark'])
+        self.assertFalse(delta['full'])
+        self.assertEqual(delta['skills'], [])
+        self.assertEqual([row['status'] for row in delta['swap_requests']], ['Completed'])
+
+    def test_deletions_are_reported_as_tombstones(self):
+        watermark = self.changes()['watermark']
+        self.swap.offered_skill.delete()  # Cascades to the swap
+
+        delta = self.changes(watermark)
+        self.assertEqual(delta['deleted']['skills'], [str(self.swap.offered_skill_id)])
+        self.assertEqual(delta['deleted']['swap_requests'], [str(self.swap.id)])
+        self.assertTrue(Tombstone.objects.filter(user_id=self.swap.receiver_id, object_id=self.swap.id).exists())
+
+    def test_rejects_malformed_watermark(self):
+        response = self.client.get('/api/users/me/changes/', {'since': 'yesterday'}, **self.auth)
+        self.assertEqual(response.status_code, 400)
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        revocations.reset()
+        self.alice = make_user('alice@example.com')
+        self.bob = make_user('bob@example.com')
+        self.auth = {'HTTP_AUTHORIZATION': f'Bearer {issue_tokens(self.alice)["access"]}'}
+
+    def get(self, url, etag=None):
+        headers = dict(self.auth, HTTP_IF_NONE_MATCH=etag) if etag else self.auth
+        return self.client.get(url, **headers)
+
+    def test_unchanged_profile_is_a_304_without_extra_queries(self):
+        etag = self.get('/api/users/me/')['ETag']
+        with CaptureQueriesContext(connection) as queries:
+            response = self.get('/api/users/me/', etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(len(queries), 1)  # jwt_required's user lookup
+
+    def test_profile_skill_and_feedback_changes_change_the_etag(self):
+        profile_url = f'/api/users/{self.bob.id}/'
+        etag = self.get(profile_url)['ETag']
+        self.assertEqual(self.get(profile_url, etag).status_code, 304)
+
+        skill = Skill.objects.create(user=self.bob, name='Guitar', type='Offered', is_verified=True)
+        self.assertEqual(self.get(profile_url, etag).status_code, 200)
+        etag = self.get(profile_url)['ETag']
+
+        self.bob.location = 'Berlin'
+        self.bob.save()
+        self.assertEqual(self.get(profile_url, etag).status_code, 200)
+        etag = self.get(profile_url)['ETag']
+
+        record_verification(skill.id, self.alice)
+        self.assertEqual(self.get(profile_url, etag).status_code, 200)
+
+    def test_own_and_public_representations_have_different_etags(self):
+        own = self.get(f'/api/users/{self.alice.id}/')['ETag']
+        self.assertNotEqual(own, self.get(f'/api/users/{self.bob.id}/')['ETag'])
+        self.assertEqual(self.get(f'/api/users/{self.alice.id}/', own).status_code, 304)
+
+
+class UserBatchTests(TestCase):
+    def setUp(self):
+        revocations.reset()
+        self.alice = make_user('alice@example.com')
+        self.auth = {'HTTP_AUTHORIZATION': f'Bearer {issue_tokens(self.alice)["access"]}'}
+
+    def batch(self, ids):
+        return self.client.get('/api/users/batch/', {'ids': ','.join(str(i) for i in ids)}, **self.auth)
+
+    def test_query_count_does_not_grow_with_ids(self):
+        users = [make_user(f'user{i}@example.com') for i in range(10)]
+        for user in users:
+            swap = make_accepted_swap(self.alice, user)
+            Skill.objects.filter(id=swap.requested_skill_id).update(is_verified=True)
+            swap.status = 'Completed'
+            swap.save()
+            Feedback.objects.create(swap_request=swap, rater=self.alice, rated_user=user, rating=4)
+
+        self.batch([users[0].id])  # Warm the revocation index
+        with CaptureQueriesContext(connection) as few:
+            self.batch([u.id for u in users[:2]])
+        with CaptureQueriesContext(connection) as many:
+            response = self.batch([u.id for u in users])
+
+        self.assertEqual(len(many), len(few))
+        results = response.json()['results']
+        self.assertEqual([r['id'] for r in results], [str(u.id) for u in users])
+        self.assertEqual(results[0]['average_rating'], 4)
+        self.assertEqual(len(results[0]['skills']), 1)
+
+    def test_respects_visibility_and_reports_missing_ids(self):
+        hidden = make_user('hidden@example.com', is_public=False)
+        missing = uuid.uuid4()
+        body = self.batch([self.alice.id, hidden.id, missing]).json()
+
+        self.assertEqual([r['email'] for r in body['results']], ['alice@example.com'])  # Own, full profile
+        self.assertEqual(body['forbidden'], [str(hidden.id)])
+        self.assertEqual(body['not_found'], [str(missing)])
+
+    @override_settings(USER_BATCH_MAX_IDS=2)
+    def test_rejects_too_many_or_malformed_ids(self):
+        self.assertEqual(self.batch([uuid.uuid4() for _ in range(3)]).status_code, 400)
+        self.assertEqual(self.batch(['not-a-uuid']).status_code, 400)
+
+
+class LocationSearchTests(TestCase):
+    def setUp(self):
+        revocations.reset()
+        self.viewer = make_user('viewer@example.com')
+        self.auth = {'HTTP_AUTHORIZATION': f'Bearer {issue_tokens(self.viewer)["access"]}'}
+
+    def test_geohash_and_gazetteer(self):
+        self.assertEqual(geohash_encode(57.64911, 10.40744, 11), 'u4pruydqqvj')
+        self.assertEqual([next_cell(cell) for cell in ('u4p', 'u49', 'u4z', 'zz')], ['u4q', 'u4b', 'u5', None])
+        gazetteer = get_gazetteer()
+        self.assertEqual(gazetteer.locate('Bengaluru, India'), gazetteer.locate('bangalore'))
+        self.assertEqual(gazetteer.locate('  São Paulo , Brazil'), (-23.55, -46.63))
+        self.assertIsNone(gazetteer.locate('Atlantis'))
+
+    def test_location_is_resolved_on_save(self):
+        user = make_user('pune@example.com', location='Pune, India')
+        self.assertEqual((user.latitude, user.longitude), (18.52, 73.86))
+        self.assertTrue(user.geohash.startswith('te'))
+
+        user.location = 'Nowhere'
+        user.save(update_fields=['location'])
+        user.refresh_from_db()
+        self.assertIsNone(user.geohash)
+
+    def test_near_filter_orders_by_distance_within_radius(self):
+        for city in ('Delhi', 'Noida', 'Gurugram', 'Mumbai'):
+            user = make_user(f'{city.lower()}@example.com', location=f'{city}, India')
+            Skill.objects.create(user=user, name='Python', type='Offered')
+
+        response = self.client.get('/api/users/public/search/', {'q': 'python', 'near': '28.61,77.21', 'radius_km': '30'}, **self.auth)
+        results = response.json()['results']
+        self.assertEqual([r['name'] for r in results], ['delhi', 'noida', 'gurugram'])
+        self.assertEqual(results[0]['distance_km'], 0.0)
+        self.assertNotIn('latitude', results[0])
+
+        response = self.client.get('/api/users/public/search/', {'q': 'python', 'near': '95,0'}, **self.auth)
+        self.assertEqual(response.status_code, 400)
+
+    def test_near_results_are_paged_in_sql(self):
+        def near_page(**params):
+            with CaptureQueriesContext(connection) as queries:
+                body = self.client.get('/api/users/public/', {'near': '28.61,77.21', 'radius_km': '30', **params}).json()
+            return body, len(queries)
+
+        for city in ('Delhi', 'Noida', 'Gurugram'):
+            Skill.objects.create(user=make_user(f'{city.lower()}@example.com', location=f'{city}, India'), name='Python', type='Offered')
+        body, query_count = near_page(limit=2)
+        self.assertEqual([r['name'] for r in body['results']], ['delhi', 'noida'])
+        self.assertEqual((body['pagination']['total'], body['pagination']['has_next']), (3, True))
+        body, _ = near_page(limit=2, page=2)
+        self.assertEqual(([r['name'] for r in body['results']], body['pagination']['total']), (['gurugram'], 3))
+
+        for i in range(5):
+            make_user(f'delhi{i}@example.com', location='Delhi, India')
+        self.assertEqual(near_page(limit=2)[1], query_count)
+
+    def test_covering_cells_handle_the_antimeridian(self):
+        cells = covering_cells(0.0, 179.99, 50)
+        self.assertTrue(any(cell.startswith('8') for cell in cells))  # East of 180
+        self.assertTrue(any(cell.startswith('x') for cell in cells))  # West of 180
+
+
+class SkillTaxonomyTests(TestCase):
+    def setUp(self):
+        revocations.reset()
+        skill_tags.reset()  # Tags created by a test are rolled back with it
+        self.addCleanup(skill_tags.reset)
+        self.viewer = make_user('viewer@example.com')
+        self.auth = {'HTTP_AUTHORIZATION': f'Bearer {issue_tokens(self.viewer)["access"]}'}
+
+    def test_spellings_and_synonyms_resolve_to_one_tag(self):
+        self.assertEqual(normalize_skill_name('  Node.JS '), 'node.js')
+        self.assertEqual(normalize_skill_name('C++, C#'), 'c++ c#')
+
+        owner = make_user('owner@example.com')
+        skills = [Skill.objects.create(user=owner, name=name, type='Offered') for name in ('Python', 'python3', 'Python  Programming')]
+        self.assertEqual({skill.tag_id for skill in skills}, {SkillTagAlias.objects.get(name='python').tag_id})
+
+        weaving = Skill.objects.create(user=owner, name='Underwater Basket-Weaving', type='Offered')
+        self.assertEqual(weaving.tag.name, 'Underwater Basket-Weaving')
+        self.assertEqual(Skill.objects.create(user=owner, name='underwater basket weaving', type='Wanted').tag_id, weaving.tag_id)
+
+        weaving.name = 'Python'
+        weaving.save(update_fields=['name'])
+        weaving.refresh_from_db()
+        self.assertEqual(weaving.tag_id, skills[0].tag_id)
+
+        admin = make_user('admin@example.com', is_admin=True)
+        response = self.client.get('/api/admin/stats/', HTTP_AUTHORIZATION=f'Bearer {issue_tokens(admin)["access"]}')
+        self.assertEqual(response.json()['skill_popularity'][0], {'tag_id': skills[0].tag_id, 'name': 'Python', 'count': 4})
+
+    def test_search_matches_tag_words_by_prefix(self):
+        ml = make_user('ml@example.com')
+        Skill.objects.create(user=ml, name='ML', type='Offered')
+        py = make_user('py@example.com')
+        Skill.objects.create(user=py, name='python3', type='Offered')
+
+        def search(q):
+            response = self.client.get('/api/users/public/search/', {'q': q}, **self.auth)
+            return [row['name'] for row in response.json()['results']]
+
+        self.assertEqual(search('learn'), ['ml'])
+        self.assertEqual(search('PYTH'), ['py'])
+        self.assertEqual(search('zzz'), [])
+
+        # A short prefix matching more tags than the cap still finds every user
+        uncapped = sorted(search('p'))
+        self.assertIn('py', uncapped)
+        with self.settings(TAXONOMY={**settings.TAXONOMY, 'SEARCH_MAX_TAGS': 1}):
+            self.assertNotIsInstance(skill_tags.search('p'), set)
+            self.assertEqual(sorted(search('p')), uncapped)
+            self.assertEqual(search('learn'), ['ml'])
+
+
+class SkillAutocompleteTests(TestCase):
+    def setUp(self):
+        skill_tags.reset()
+        skill_suggestions.reset()
+        self.addCleanup(skill_tags.reset)
+        self.addCleanup(skill_suggestions.reset)
+        self.auth = {'HTTP_AUTHORIZATION': f'Bearer {issue_tokens(make_user("viewer@example.com"))["access"]}'}
+
+    def suggest(self, prefix, **params):
+        response = self.client.get('/api/skills/autocomplete/', {'prefix': prefix, **params}, **self.auth)
+        return [(row['name'], row['count']) for row in response.json()['results']]
+
+    def test_suggestions_rank_by_popularity_without_queries(self):
+        for i, name in enumerate(['Photography', 'photography', 'PHP', 'python3', 'Python']):
+            Skill.objects.create(user=make_user(f'user{i}@example.com'), name=name, type='Offered')
+
+        self.assertEqual(self.suggest('ph', limit=3), [('Photography', 2), ('PHP', 1), ('Photoshop', 0)])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.suggest('PY', limit=1), [('Python', 2)])
+            self.assertEqual(self.suggest('learn', limit=2), [('Deep Learning', 0), ('Machine Learning', 0)])
+            self.assertEqual(self.suggest('  '), [])
+
+    def test_new_skills_are_suggested_before_the_next_rebuild(self):
+        self.suggest('x')
+        with self.captureOnCommitCallbacks(execute=True):
+            Skill.objects.create(user=make_user('weaver@example.com'), name='Underwater Basket Weaving', type='Offered')
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.suggest('bask'), [('Underwater Basket Weaving', 1)])
+
+
+@override_settings(READ_REPLICAS={'ALIASES': ['replica_1'], 'STICKY_SECONDS': 5})
+class ReplicaRoutingTests(TestCase):
+    def test_writes_pin_the_client_to_the_primary(self):
+        request = RequestFactory().get('/api/admin/stats/')
+        self.assertEqual(replica_for(request), 'replica_1')
+        self.assertEqual(ReplicaRouter().db_for_write(User, instance=User(id=uuid.uuid4())), 'default')
+
+        revocations.reset()
+        auth = {'HTTP_AUTHORIZATION': f'Bearer {issue_tokens(make_user("writer@example.com"))["access"]}'}
+        response = self.client.put('/api/notifications/read/', {'up_to': 0}, content_type='application/json', **auth)
+        self.assertEqual(response.status_code, 200)
+        pin_until = float(response[PIN_HEADER])
+        self.assertAlmostEqual(pin_until, time.time() + 5, delta=1)
+        self.assertEqual(response.cookies[PIN_COOKIE].value, response[PIN_HEADER])
+
+        request = RequestFactory().get('/api/admin/stats/', HTTP_X_DB_PIN_UNTIL=str(pin_until))
+        self.assertIsNone(replica_for(request))
+        request.COOKIES[PIN_COOKIE] = str(time.time() - 1)
+        request.META.pop('HTTP_X_DB_PIN_UNTIL')
+        self.assertEqual(replica_for(request), 'replica_1')
+
+
+@override_settings(READ_REPLICAS={'ALIASES': ['test_replica'], 'STICKY_SECONDS': 5})
+class ReplicaReadTests(TestCase):
+    databases = {'default', 'test_replica'}
+
+    def test_admin_stats_read_the_replica_until_the_client_writes(self):
+        revocations.reset()
+        admin = make_user('admin@example.com', is_admin=True)
+        auth = {'HTTP_AUTHORIZATION': f'Bearer {issue_tokens(admin)["access"]}'}
+        # Rows only the replica has, as if replication had run ahead of the primary
+        User.objects.using('test_replica').bulk_create(
+            User(email=f'replica{i}@example.com', name=f'replica{i}') for i in range(3)
+        )
+
+        self.assertEqual(self.client.get('/api/admin/stats/', **auth).json()['total_users'], 3)
+        self.client.put('/api/notifications/read/', {'up_to': 0}, content_type='application/json', **auth)
+        self.assertEqual(self.client.get('/api/admin/stats/', **auth).json()['total_users'], 1)
+
+
+class SwapArchivalTests(TestCase):
+    def setUp(self):
+        revocations.reset()
+        self.alice = make_user('alice@example.com')
+        self.bob = make_user('bob@example.com')
+        self.auth = {'HTTP_AUTHORIZATION': f'Bearer {issue_tokens(self.alice)["access"]}'}
+
+    def make_swap(self, status, days_ago):
+        swap = make_accepted_swap(self.alice, self.bob)
+        SwapRequest.objects.filter(id=swap.id).update(status=status, updated_at=timezone.now() - timedelta(days=days_ago))
+        return swap
+
+    def test_old_terminal_swaps_move_to_the_archive(self):
+        old = [self.make_swap(status, 100) for status in ('Rejected', 'Cancelled', 'Withdrawn')]
+        recent = self.make_swap('Rejected', 10)
+        completed = self.make_swap('Completed', 400)
+
+        with override_settings(SWAP_ARCHIVAL={**settings.SWAP_ARCHIVAL, 'AFTER_DAYS': 90}):
+            self.assertEqual(archive_terminal_swaps(batch_size=2), 3)
+
+        self.assertEqual(set(SwapRequest.objects.values_list('id', flat=True)), {recent.id, completed.id})
+        archived = ArchivedSwapRequest.objects.get(id=old[0].id)
+        self.assertEqual((archived.status, archived.offered_skill_name, archived.sender_id), ('Rejected', 'Python', self.alice.id))
+        self.assertTrue(Tombstone.objects.filter(entity='SwapRequest', object_id=old[0].id, user_id=self.bob.id).exists())
+
+    def test_history_pages_through_live_and_archived_swaps(self):
+        swaps = [self.make_swap('Withdrawn', days_ago) for days_ago in (200, 150)] + [self.make_swap('Pending', 1)]
+        archive_terminal_swaps(older_than_days=90)
+
+        seen, cursor = [], None
+        while True:
+            params = {'limit': 2, **({'cursor': cursor} if cursor else {})}
+            body = self.client.get('/api/swap-requests/history/', params, **self.auth).json()
+            seen += [(row['id'], row['archived']) for row in body['results']]
+            cursor = body['next_cursor']
+            if cursor is None:
+                break
+
+        self.assertEqual(seen, [(str(swaps[2].id), False), (str(swaps[1].id), True), (str(swaps[0].id), True)])
+        response = self.client.get('/api/swap-requests/history/', {'status': 'Withdrawn'}, **self.auth)
+        self.assertEqual(len(response.json()['results']), 2)
+        self.assertEqual(self.client.get('/api/swap-requests/history/', {'cursor': '!'}, **self.auth).status_code, 400)
+
+        response = self.client.get('/api/swap-requests/history/', {'limit': 0}, **self.auth)
+        self.assertEqual(len(response.json()['results']), 1)
+        self.assertIsNotNone(response.json()['next_cursor'])
+
+
+class PerfSeedingTests(TestCase):
+    def test_seeded_data_is_consistent(self):
+        counts = seed_perf_data(users=40, swaps_per_user=6, batch_size=15, seed=7)
+
+        self.assertEqual(counts['User'], User.objects.count())
+        self.assertEqual(counts['SwapRequest'], SwapRequest.objects.count())
+        self.assertFalse(Skill.objects.filter(tag__isnull=True).exists())
+        self.assertGreater(len(set(SwapRequest.objects.values_list('status', flat=True))), 3)
+        # updated_at keeps the simulated history instead of the insert time
+        self.assertTrue(SwapRequest.objects.filter(updated_at__lt=timezone.now() - timedelta(days=1)).exists())
+        for user in User.objects.all():
+            self.assertEqual(user.credits, sum(CreditTransaction.objects.filter(user=user).values_list('amount', flat=True)))
+
+    def test_replay_report(self):
+        mix = parse_mix('search=0,autocomplete=5')
+        self.assertNotIn('search', [route.name for route in mix])
+        self.assertEqual(next(route.weight for route in mix if route.name == 'autocomplete'), 5)
+        with self.assertRaises(ValueError):
+            parse_mix('nope=1')
+
+        samples = [(200, ms / 1000) for ms in range(1, 101)]
+        rows = summarize(2.0, {'profile': samples, 'search': [(500, 0.5)]})
+        self.assertEqual(rows[0], ('profile', 100, 0, 50.0, 50.0, 95.0, 99.0))
+        self.assertEqual(rows[-1][:3], ('TOTAL', 101, 1))
+
+
+class RequestProfilingTests(TestCase):
+    def setUp(self):
+        revocations.reset()
+        self.admin = make_user('admin@example.com', is_admin=True)
+        self.alice = make_user('alice@example.com')
+        self.admin_auth = {'HTTP_AUTHORIZATION': f'Bearer {issue_tokens(self.admin)["access"]}'}
+
+    def test_admin_profiles_a_request_on_demand(self):
+        response = self.client.get('/api/users/me/', HTTP_X_PROFILE='1', **self.admin_auth)
+        self.assertEqual(response.status_code, 200)
+
+        profile = RequestProfile.objects.get(id=response['X-Profile-ID'])
+        self.assertEqual((profile.view_name, profile.status_code, profile.requested_by_id), ('get_my_profile', 200, self.admin.id))
+        self.assertIn('get_my_profile', profile.summary)
+
+        listed = self.client.get('/api/admin/profiles/', **self.admin_auth).json()['results']
+        self.assertEqual([entry['id'] for entry in listed], [str(profile.id)])
+        download = self.client.get(f'/api/admin/profiles/{profile.id}/download/', **self.admin_auth)
+        self.assertEqual(download['Content-Type'], 'application/octet-stream')
+        self.assertIsInstance(marshal.loads(download.content), dict)
+
+    def test_flag_is_ignored_for_everyone_else(self):
+        alice_auth = {'HTTP_AUTHORIZATION': f'Bearer {issue_tokens(self.alice)["access"]}'}
+        response = self.client.get('/api/users/me/?profile=1', **alice_auth)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('X-Profile-ID', response)
+        self.assertFalse(RequestProfile.objects.exists())
+        self.assertEqual(self.client.get('/api/admin/profiles/', **alice_auth).status_code, 403)
+
+    def test_only_the_newest_profiles_are_kept(self):
+        with override_settings(REQUEST_PROFILING={**settings.REQUEST_PROFILING, 'MAX_STORED': 2}):
+            ids = [self.client.get('/api/users/me/', HTTP_X_PROFILE='1', **self.admin_auth)['X-Profile-ID'] for _ in range(3)]
+        self.assertEqual(set(str(pk) for pk in RequestProfile.objects.values_list('id', flat=True)), set(ids[1:]))
+
+
+class ApiSettingsTests(TestCase):
+    def test_api_profile_drops_admin_only_apps_and_middleware(self):
+        from core import settings_api
+
+        self.assertTrue(settings_api.ADMIN_ONLY_APPS.isdisjoint(settings_api.INSTALLED_APPS))
+        self.assertTrue(settings_api.ADMIN_ONLY_MIDDLEWARE.isdisjoint(settings_api.MIDDLEWARE))
+        self.assertIn('api', settings_api.INSTALLED_APPS)
+        self.assertIn('corsheaders.middleware.CorsMiddleware', settings_api.MIDDLEWARE)
+        self.assertEqual(settings_api.ROOT_URLCONF, 'core.urls_api')
+
+    def test_importtime_parsing(self):
+        from .management.commands.bench_startup import parse_importtime
+
+        stderr = (
+            'import time: self [us] | cumulative | imported package\n'
+            'import time:       200 |        200 |     _weakrefset\n'
+            'import time:      1000 |       1200 |   abc\n'
+            'import time:      3000 |       4200 | django\n'
+            'import time:       500 |        500 | json\n'
+            '{"event": "unrelated log line"}\n'
+        )
+        self.assertEqual(parse_importtime(stderr), (4.7, [(4.2, 'django'), (0.5, 'json')]))
+
+
+class FeedbackRollupTests(TestCase):
+    def setUp(self):
+        revocations.reset()
+        self.alice = make_user('alice@example.com')
+        self.bob = make_user('bob@example.com', is_public=True)
+        self.admin = make_user('admin@example.com', is_admin=True)
+
+    def auth(self, user):
+        return {'HTTP_AUTHORIZATION': f'Bearer {issue_tokens(user)["access"]}'}
+
+    def rate_bob(self, rating, matched=True, verified=None, days_ago=0):
+        swap = make_accepted_swap(self.alice, self.bob)
+        SwapRequest.objects.filter(id=swap.id).update(status='Completed')
+        return Feedback.objects.create(
+            swap_request=swap, rater=self.alice, rated_user=self.bob, rating=rating,
+            expectations_matched=matched, skill_verified_by_peer=verified,
+            created_at=timezone.now() - timedelta(days=days_ago),
+        )
+
+    def rollup_rows(self):
+        # Rows whose feedback was all deleted linger with zero counts; a rebuild drops them
+        keys = {UserRatingRollup: ['user'], UserMonthlyRatingRollup: ['user', 'month'], SkillTagRatingRollup: ['tag'], DailyRatingRollup: ['day']}
+        return {
+            model.__name__: sorted(row for row in model.objects.values_list(*key, *COUNT_FIELDS) if any(row[len(key):]))
+            for model, key in keys.items()
+        }
+
+    def test_submitted_feedback_updates_the_rollups(self):
+        swap = make_accepted_swap(self.alice, self.bob)
+        SwapRequest.objects.filter(id=swap.id).update(status='Completed')
+        response = self.client.post('/api/feedback/', {
+            'swap_request_id': str(swap.id), 'rating': 4, 'expectations_matched': True, 'skill_verified_by_peer': True,
+        }, content_type='application/json', **self.auth(self.alice))
+        self.assertEqual(response.status_code, 201)
+        self.rate_bob(2, matched=False, verified=False, days_ago=40)
+
+        rollup = UserRatingRollup.objects.get(user=self.bob)
+        self.assertEqual(rollup.histogram, {'1': 0, '2': 1, '3': 0, '4': 1, '5': 0})
+        self.assertEqual((rollup.expectations_matched, rollup.peer_verified, rollup.peer_answered), (1, 1, 2))
+        # Bob taught Guitar in both swaps
+        self.assertEqual(SkillTagRatingRollup.objects.get().tag_id, skill_tags.resolve('Guitar'))
+        self.assertEqual(SkillTagRatingRollup.objects.get().count, 2)
+
+        with self.assertNumQueries(4):  # Auth (user, session) + user with rollup + monthly rollups
+            data = self.client.get(f'/api/users/{self.bob.id}/ratings/?months=3', **self.auth(self.alice)).json()
+        self.assertEqual((data['count'], data['average'], data['expectations_matched_ratio']), (2, 3.0, 0.5))
+        self.assertEqual(data['peer_verified_ratio'], 0.5)
+        self.assertEqual([entry['count'] for entry in data['trend']][-1], 1)
+        self.assertEqual(len(data['trend']), 3)
+
+    def test_deleting_feedback_and_rebuilding_agree(self):
+        self.rate_bob(5, verified=True)
+        removed = self.rate_bob(1, matched=False, days_ago=3)
+        self.rate_bob(3, days_ago=70)
+        removed.delete()
+        incremental = self.rollup_rows()
+
+        self.assertEqual(rebuild_feedback_rollups(), 2)
+        self.assertEqual(self.rollup_rows(), incremental)
+        self.assertEqual(UserRatingRollup.objects.get(user=self.bob).average, 4.0)
+
+    def test_platform_statistics_read_the_rollups(self):
+        for rating, days_ago in ((5, 0), (4, 1), (2, 8)):
+            self.rate_bob(rating, days_ago=days_ago)
+
+        stats = self.client.get('/api/admin/stats/', **self.auth(self.admin)).json()
+        self.assertEqual((stats['total_feedback'], stats['average_rating']), (3, 3.67))
+
+        feedback_stats = self.client.get('/api/admin/feedback-stats/?days=30&bucket=month', **self.auth(self.admin)).json()
+        self.assertEqual(feedback_stats['histogram'], {'1': 0, '2': 1, '3': 0, '4': 1, '5': 1})
+        self.assertEqual(sum(entry['count'] for entry in feedback_stats['trend']), 3)
+        self.assertEqual(feedback_stats['top_tags'][0]['name'], 'Guitar')
+        self.assertEqual(self.client.get('/api/admin/feedback-stats/?bucket=year', **self.auth(self.admin)).status_code, 400)
+        self.assertEqual(self.client.get('/api/admin/feedback-stats/', **self.auth(self.alice)).status_code, 403)
+
+
+class FeedbackSubmissionTests(TestCase):
+    def setUp(self):
+        revocations.reset()
+        self.alice = make_user('alice@example.com')
+        self.bob = make_user('bob@example.com')
+        self.swap = make_accepted_swap(self.alice, self.bob)
+        SwapRequest.objects.filter(id=self.swap.id).update(status='Completed')
+
+    def submit(self, user, **fields):
+        body = {'swap_request_id': str(self.swap.id), 'rating': 5, 'expectations_matched': True, **fields}
+        return self.client.post(
+            '/api/feedback/', body, content_type='application/json',
+            HTTP_AUTHORIZATION=f'Bearer {issue_tokens(user)["access"]}'
+        )
+
+    def test_resubmission_returns_the_stored_feedback(self):
+        first = self.submit(self.alice, skill_verified_by_peer=True)
+        self.assertEqual(first.status_code, 201)
+
+        auth = {'HTTP_AUTHORIZATION': f'Bearer {issue_tokens(self.alice)["access"]}'}
+        body = {'swap_request_id': str(self.swap.id), 'rating': 1}
+        with self.assertNumQueries(4):  # Auth user, then the locked swap fetch in a savepoint; no writes
+            retry = self.client.post('/api/feedback/', body, content_type='application/json', **auth)
+        self.assertEqual(retry.status_code, 200)
+        self.assertEqual((retry.json()['id'], retry.json()['rating']), (first.json()['id'], 5))
+        self.assertEqual(UserRatingRollup.objects.get(user=self.bob).count, 1)
+        self.assertEqual(Notification.objects.filter(user=self.bob, kind='FeedbackReceived').count(), 1)
+
+    def test_the_other_participant_gets_a_conflict(self):
+        self.submit(self.alice)
+        response = self.submit(self.bob)
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(Feedback.objects.get().rater_id, self.alice.id)
+
+    def test_invalid_feedback_is_rejected_before_any_write(self):
+        outsider = make_user('mallory@example.com')
+        self.assertEqual(self.submit(self.alice, rating=9).status_code, 400)
+        self.assertEqual(self.submit(outsider).status_code, 400)
+        SwapRequest.objects.filter(id=self.swap.id).update(status='Accepted')
+        self.assertEqual(self.submit(self.alice).json()['errors']['non_field_errors'], ['Can only provide feedback for completed swaps.'])
+        self.assertFalse(Feedback.objects.exists())
+        self.assertFalse(UserRatingRollup.objects.exists())
+
+
+class DiscoveryRankingTests(TestCase):
+    def test_rank_users_scores_listed_users_by_reputation(self):
+        star = make_user('star@example.com')
+        newcomer = make_user('newcomer@example.com')
+        hidden = make_user('hidden@example.com', is_public=False)
+        rater = make_user('rater@example.com')
+        for _ in range(3):
+            swap = make_accepted_swap(rater, star)
+            SwapRequest.objects.filter(id=swap.id).update(status='Completed', updated_at=timezone.now())
+            Feedback.objects.create(swap_request=swap, rater=rater, rated_user=star, rating=5)
+            Skill.objects.filter(id=swap.requested_skill_id).update(is_verified=True)
+
+        self.assertEqual(rank_users(batch_size=2), 3)
+
+        scores = {score.user_id: score for score in DiscoveryScore.objects.all()}
+        self.assertNotIn(hidden.id, scores)
+        self.assertGreater(scores[star.id].score, scores[newcomer.id].score)
+        self.assertEqual((scores[star.id].feedback_count, scores[star.id].recent_completions), (3, 3))
+
+    def test_directory_pages_follow_the_ranking_by_cursor(self):
+        users = [make_user(f'user{i}@example.com') for i in range(5)]
+        for rank, user in enumerate(users):
+            DiscoveryScore.objects.filter(user=user).update(score=10 - rank // 2)  # Ties broken by id
+
+        seen, cursor = [], None
+        while True:
+            response = self.client.get('/api/users/public/', {'limit': 2, **({'cursor': cursor} if cursor else {})}).json()
+            seen += [row['id'] for row in response['results']]
+            cursor = response['pagination']['next_cursor']
+            if cursor is None:
+                break
+
+        expected = sorted(users, key=lambda u: (-DiscoveryScore.objects.get(user=u).score, u.id))
+        self.assertEqual(seen, [str(u.id) for u in expected])
+        self.assertEqual(self.client.get('/api/users/public/', {'cursor': 'nonsense'}).status_code, 400)
+
+    def test_users_who_become_listed_join_the_directory(self):
+        private = make_user('private@example.com', is_public=False)
+        banned = make_user('banned@example.com', is_banned=True)
+        rank_users()
+        self.assertFalse(DiscoveryScore.objects.filter(user__in=[private, banned]).exists())
+
+        private.is_public = True
+        private.save()
+        banned.is_banned = False
+        banned.save(update_fields=['is_banned'])
+
+        response = self.client.get('/api/users/public/').json()
+        self.assertEqual({row['id'] for row in response['results']}, {str(private.id), str(banned.id)})
+        self.assertEqual(response['pagination']['total'], 2)
+
+    def test_limit_defaults_to_ten_and_is_at_least_one(self):
+        for i in range(12):
+            make_user(f'user{i}@example.com')
+
+        self.assertEqual(len(self.client.get('/api/users/public/').json()['results']), 10)
+        response = self.client.get('/api/users/public/', {'limit': 0}).json()
+        self.assertEqual((len(response['results']), response['pagination']['limit']), (1, 1))
+        self.assertEqual(response['pagination']['total'], 12)
+        for page in (2, 3):
+            response = self.client.get('/api/users/public/', {'page': page}).json()
+            self.assertEqual(response['pagination']['total'], 12)
+
+
+class CreditLedgerConcurrencyTests(TransactionTestCase):
+    """Load test: concurrent completions for the same user must not lose credit updates"""
+
+    WORKERS = 16
+
+    def test_concurrent_completions_have_no_lost_updates(self):
+        hub = make_user('hub@example.com')
+        swaps = [
+            make_accepted_swap(hub, make_user(f'peer{i}@example.com'))
+            for i in range(self.WORKERS)
+        ]
+        _, errors = run_concurrently(lambda i: complete_swap(swaps[i].id, swaps[i].receiver), self.WORKERS)
+
+        self.assertEqual(errors, [])
+        hub.refresh_from_db()
+        expected = self.WORKERS * settings.SWAP_COMPLETION_CREDITS
+        self.assertEqual(hub.credits, expected)
+        ledger_total = CreditTransaction.objects.filter(user=hub).aggregate(total=Sum('amount'))['total']
+        self.assertEqual(ledger_total, expected)
+        self.assertEqual(SwapRequest.objects.filter(status='Completed').count(), self.WORKERS)
+
+
+class FeedbackSubmissionConcurrencyTests(TransactionTestCase):
+    """Load test: a burst of retried submissions stores one feedback and counts it once"""
+
+    WORKERS = 8
+
+    def setUp(self):
+        # Flushes between transactional tests drop the seeded tags the in-process index remembers
+        skill_tags.reset()
+
+    def test_concurrent_retries_create_one_feedback(self):
+        alice, bob = make_user('alice@example.com'), make_user('bob@example.com')
+        swap = make_accepted_swap(alice, bob)
+        SwapRequest.objects.filter(id=swap.id).update(status='Completed')
+        created, errors = run_concurrently(
+            lambda i: submit_feedback(alice, swap.id, rating=4, expectations_matched=True)[1], self.WORKERS
+        )
+
+        self.assertEqual(errors, [])
+        self.assertEqual(sorted(created), [False] * (self.WORKERS - 1) + [True])
+        self.assertEqual(Feedback.objects.count(), 1)
+        self.assertEqual(UserRatingRollup.objects.get(user=bob).histogram['4'], 1)
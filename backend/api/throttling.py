@@ -0,0 +1,115 @@
+import hashlib
+import json
+import math
+import time
+from django.conf import settings
+from django.core.cache import caches
+
+
+def parse_rate(rate):
+    """Parse a DRF-style rate such as '20/h' into (limit, window_seconds)"""
+    count, period = rate.split('/')
+    window = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}[period[0].lower()]
+    return int(count), window
+
+
+class SlidingWindowCounter:
+    """Approximate sliding-window rate limit kept in the cache.
+
+    Only two counters live per key: the current fixed window and the previous
+    one. The previous count is weighted by how much of it still overlaps the
+    sliding window, which bounds memory and makes each check O(1).
+    """
+
+    def __init__(self, rate, cache_alias='default', prefix='rl'):
+        self.limit, self.window = parse_rate(rate)
+        self.cache = caches[cache_alias]
+        self.prefix = prefix
+
+    def hit(self, key):
+        """Count one request for `key`; returns (allowed, retry_after_seconds)"""
+        now = time.time()
+        window_index = int(now // self.window)
+        elapsed = now - window_index * self.window
+        current_key = f'{self.prefix}:{key}:{window_index}'
+        previous_key = f'{self.prefix}:{key}:{window_index - 1}'
+
+        counts = self.cache.get_many([current_key, previous_key])
+        weight = 1 - elapsed / self.window
+        estimated = counts.get(previous_key, 0) * weight + counts.get(current_key, 0)
+        if estimated + 1 > self.limit:
+            return False, max(1, math.ceil(self.window - elapsed))
+
+        # add() only succeeds for the first request of a window; incr() is atomic afterwards
+        if not self.cache.add(current_key, 1, timeout=self.window * 2):
+            try:
+                self.cache.incr(current_key)
+            except ValueError:
+                self.cache.set(current_key, 1, timeout=self.window * 2)
+        return True, 0
+
+
+class TokenBucket:
+    """Token bucket kept in the cache: bursts up to `limit`, refilled at limit/window per second.
+
+    State is a (tokens, timestamp) pair read and written without a lock, so
+    concurrent hits on the same key may occasionally over-admit by a request;
+    that is acceptable for shedding abusive traffic.
+    """
+
+    def __init__(self, rate, cache_alias='default', prefix='tb'):
+        self.limit, self.window = parse_rate(rate)
+        self.refill_rate = self.limit / self.window
+        self.cache = caches[cache_alias]
+        self.prefix = prefix
+
+    def hit(self, key):
+        """Take one token for `key`; returns (allowed, retry_after_seconds)"""
+        now = time.time()
+        cache_key = f'{self.prefix}:{key}'
+        tokens, updated = self.cache.get(cache_key, (self.limit, now))
+        tokens = min(self.limit, tokens + (now - updated) * self.refill_rate)
+        if tokens < 1:
+            return False, max(1, math.ceil((1 - tokens) / self.refill_rate))
+
+        # An untouched bucket is full again after one window, so it can simply expire
+        self.cache.set(cache_key, (tokens - 1, now), timeout=self.window)
+        return True, 0
+
+
+LIMITERS = {
+    'token_bucket': TokenBucket,
+    'sliding_window': SlidingWindowCounter,
+}
+
+
+def client_ip(request):
+    """Client address; X-Forwarded-For is only honoured behind a trusted proxy"""
+    if settings.RATE_LIMIT_TRUST_X_FORWARDED_FOR:
+        forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+        if forwarded:
+            return forwarded.split(',')[0].strip()
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def request_email(request):
+    """Normalised email from a JSON or form body, hashed to keep cache keys safe"""
+    email = None
+    if request.content_type == 'application/json':
+        try:
+            payload = json.loads(request.body or b'{}')
+        except ValueError:
+            payload = {}
+        if isinstance(payload, dict):
+            email = payload.get('email')
+    else:
+        email = request.POST.get('email')
+    if not isinstance(email, str) or not email.strip():
+        return None
+    return hashlib.sha256(email.strip().lower().encode()).hexdigest()
+
+
+RATE_LIMIT_KEYS = {
+    'ip': client_ip,
+    'email': request_email,
+}
@@ -0,0 +1,240 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+from .models import User, Session, BlacklistedRefreshToken
+
+# How stale last_login may get before a login or token refresh rewrites it
+LAST_LOGIN_RESOLUTION = timedelta(hours=1)
+
+
+class SessionInvalid(Exception):
+    """The refresh token's session is unknown, revoked or expired"""
+
+
+def hash_jti(jti):
+    return hashlib.sha256(jti.encode()).hexdigest()
+
+
+def touch_last_login(user_id, last_login=None):
+    """Stamp `last_login`, the activity signal of the discovery ranking.
+
+    Users stamped within LAST_LOGIN_RESOLUTION (per `last_login` when the
+    caller has it, else per the row) are skipped, so token refreshes every
+    few minutes do not each become a write. Returns the new stamp or None.
+    """
+    now = timezone.now()
+    if last_login is not None and last_login >= now - LAST_LOGIN_RESOLUTION:
+        return None
+    updated = User.objects.filter(
+        Q(last_login__isnull=True) | Q(last_login__lt=now - LAST_LOGIN_RESOLUTION), id=user_id
+    ).update(last_login=now, version=F('version') + 1)
+    return now if updated else None
+
+
+def issue_tokens(user):
+    """Start a session for `user` and return its access/refresh token pair"""
+    refresh = RefreshToken.for_user(user)
+    session = Session(
+        user=user,
+        refresh_jti_hash=hash_jti(refresh['jti']),
+        expires_at=datetime.fromtimestamp(refresh['exp'], tz=dt_timezone.utc)
+    )
+    # Copied into the access token too, so every request can be checked against revocations
+    refresh['sid'] = str(session.id)
+    session.save()
+    user.last_login = touch_last_login(user.id, user.last_login) or user.last_login
+    return {
+        'access': str(refresh.access_token),
+        'refresh': str(refresh)
+    }
+
+
+def refresh_access_token(raw_refresh):
+    """Rotate a refresh token of a live session: returns a new access/refresh pair
+    and blacklists the presented refresh token.
+
+    Presenting a refresh token that was already rotated out means it leaked (or
+    was replayed), so the whole session is revoked. Raises rest_framework_simplejwt
+    TokenError for malformed/expired tokens and SessionInvalid otherwise.
+    """
+    refresh = RefreshToken(raw_refresh)
+    old_hash = hash_jti(refresh['jti'])
+    session_id = refresh.get('sid')
+    if old_hash in blacklist:
+        revoke_session(session_id)
+        raise SessionInvalid()
+
+    # Same claims (user, sid), fresh jti and lifetime
+    refresh.set_jti()
+    refresh.set_exp()
+    refresh.set_iat()
+    new_hash = hash_jti(refresh['jti'])
+
+    with transaction.atomic():
+        # Conditional on the current hash, so of two concurrent rotations of one token only one wins
+        rotated = Session.objects.filter(
+            id=session_id,
+            refresh_jti_hash=old_hash,
+            revoked_at__isnull=True,
+            expires_at__gt=timezone.now()
+        ).update(
+            refresh_jti_hash=new_hash,
+            expires_at=datetime.fromtimestamp(refresh['exp'], tz=dt_timezone.utc)
+        )
+        if rotated:
+            BlacklistedRefreshToken.objects.create(jti_hash=old_hash, session_id=session_id)
+    if rotated:
+        blacklist.add(old_hash)
+        touch_last_login(refresh[settings.SIMPLE_JWT['USER_ID_CLAIM']])
+        return {
+            'access': str(refresh.access_token),
+            'refresh': str(refresh)
+        }
+
+    if BlacklistedRefreshToken.objects.filter(jti_hash=old_hash).exists():
+        blacklist.add(old_hash)
+        revoke_session(session_id)
+    raise SessionInvalid()
+
+
+def authenticate_access_token(raw_access):
+    """Return (user, access token) for a valid access token of a live session.
+
+    For callers outside jwt_required (the notification stream). Raises
+    TokenError, SessionInvalid, or User.DoesNotExist for inactive/banned users.
+    """
+    access_token = AccessToken(raw_access)
+    session_id = access_token.get('sid')
+    if session_id and revocations.is_revoked(session_id):
+        raise SessionInvalid()
+    user = User.objects.get(id=access_token['user_id'], is_active=True, is_banned=False)
+    return user, access_token
+
+
+def revoke_session(session_id):
+    """Revoke a session; its tokens are rejected from the next request on"""
+    revoked = Session.objects.filter(id=session_id, revoked_at__isnull=True).update(revoked_at=timezone.now())
+    if revoked:
+        revocations.add(str(session_id))
+    return bool(revoked)
+
+
+# Re-read revocations this far back on each sync, so a revoke committed just
+# after the previous sync read past its timestamp is still picked up
+REVOCATION_SYNC_OVERLAP = timedelta(seconds=30)
+
+
+class RevocationIndex:
+    """In-process set of revoked, unexpired session ids.
+
+    Membership checks are O(1) and never touch the database. The set is
+    topped up incrementally from the indexed `revoked_at` column at most once
+    per SESSION_REVOCATION_SYNC_SECONDS, so revocations made by other workers
+    take effect within that window.
+    """
+
+    def __init__(self):
+        self._revoked = {}  # session id -> expires_at
+        self._synced_until = None
+        self._next_sync = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, session_id, expires_at=None):
+        with self._lock:
+            self._revoked[session_id] = expires_at
+
+    def is_revoked(self, session_id):
+        if time.monotonic() >= self._next_sync:
+            self.sync()
+        return session_id in self._revoked
+
+    def sync(self):
+        with self._lock:
+            if time.monotonic() < self._next_sync:
+                return
+            self._next_sync = time.monotonic() + settings.SESSION_REVOCATION_SYNC_SECONDS
+            now = timezone.now()
+            since = self._synced_until
+
+            sessions = Session.objects.filter(revoked_at__isnull=False, expires_at__gt=now)
+            if since is not None:
+                sessions = sessions.filter(revoked_at__gte=since - REVOCATION_SYNC_OVERLAP)
+            for session_id, expires_at in sessions.values_list('id', 'expires_at'):
+                self._revoked[str(session_id)] = expires_at
+
+            # Tokens of expired sessions fail signature checks anyway; forget them
+            self._revoked = {
+                session_id: expires_at for session_id, expires_at in self._revoked.items()
+                if expires_at is None or expires_at > now
+            }
+            self._synced_until = now
+
+    def reset(self):
+        with self._lock:
+            self._revoked.clear()
+            self._synced_until = None
+            self._next_sync = 0.0
+
+
+revocations = RevocationIndex()
+
+
+class BlacklistCache:
+    """Bounded LRU of blacklisted refresh-token hashes seen by this process.
+
+    Only positive entries are cached: a hit rejects a replayed token without a
+    query, a miss falls through to the conditional UPDATE and the indexed table.
+    """
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._hashes = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, jti_hash):
+        with self._lock:
+            self._hashes[jti_hash] = None
+            self._hashes.move_to_end(jti_hash)
+            while len(self._hashes) > self.max_entries:
+                self._hashes.popitem(last=False)
+
+    def __contains__(self, jti_hash):
+        with self._lock:
+            if jti_hash not in self._hashes:
+                return False
+            self._hashes.move_to_end(jti_hash)
+            return True
+
+    def reset(self):
+        with self._lock:
+            self._hashes.clear()
+
+
+blacklist = BlacklistCache(settings.REFRESH_TOKEN_BLACKLIST_CACHE_SIZE)
+
+
+def sweep_expired_sessions(batch_size=1000, pause=0.0):
+    """Delete expired sessions in small batches so no statement holds locks for long.
+
+    Returns the number of rows deleted.
+    """
+    deleted = 0
+    while True:
+        with transaction.atomic():
+            batch = list(
+                Session.objects.filter(expires_at__lt=timezone.now())
+                .order_by('expires_at')
+                .values_list('id', flat=True)[:batch_size]
+            )
+            if not batch:
+                return deleted
+            deleted += Session.objects.filter(id__in=batch).delete()[0]
+        if pause:
+            time.sleep(pause)
@@ -1,11 +1,15 @@
 from django.urls import path
 from . import views
+from .decorators import throttle
 
 urlpatterns = [
     # Authentication endpoints
-    path('auth/register/', views.register_user, name='register_user'),
-    path('auth/login/', views.login_user, name='login_user'),
-    path('auth/request-password-reset/', views.request_password_reset, name='request_password_reset'),
+    # Auth routes are throttled before password hashing runs
+    path('auth/register/', throttle(views.register_user, ip='10/h'), name='register_user'),
+    path('auth/login/', throttle(views.login_user, ip='30/m', email='5/m'), name='login_user'),
+    path('auth/token/refresh/', throttle(views.refresh_token, ip='60/m'), name='refresh_token'),
+    path('auth/logout/', views.logout_user, name='logout_user'),
+    path('auth/request-password-reset/', throttle(views.request_password_reset, ip='10/h', email='3/h'), name='request_password_reset'),
     path('auth/reset-password/', views.reset_password, name='reset_password'),
     
     # User endpoints
@@ -15,10 +19,16 @@ urlpatterns = [
     path('users/me/dashboard-summary/', views.get_my_dashboard_summary, name='get_my_dashboard_summary'),
     path('users/me/verified-skills/', views.get_my_verified_skills, name='get_my_verified_skills'),
     path('users/me/skill-proofs/', views.get_my_skill_proofs, name='get_my_skill_proofs'),
+    path('users/me/credits/history/', views.get_my_credit_history, name='get_my_credit_history'),
+    path('users/me/changes/', views.get_my_changes, name='get_my_changes'),
+    path('users/batch/', views.get_user_profiles_batch, name='get_user_profiles_batch'),
     path('users/<str:user_id>/', views.get_user_profile_by_id, name='get_user_profile_by_id'),
+    path('users/<str:user_id>/ratings/', views.get_user_ratings, name='get_user_ratings'),
     
     # Skill endpoints
     path('skills/', views.add_skill, name='add_skill'),
+    path('skills/autocomplete/', views.autocomplete_skills, name='autocomplete_skills'),
+    path('skills/tags/<int:tag_id>/ratings/', views.get_skill_tag_ratings, name='get_skill_tag_ratings'),
     path('skills/<str:skill_id>/', views.update_skill, name='update_skill'),
     path('skills/<str:skill_id>/delete/', views.delete_skill, name='delete_skill'),
     path('skills/<str:skill_id>/upload-proof/', views.upload_skill_proof_file, name='upload_skill_proof_file'),
@@ -29,22 +39,36 @@ urlpatterns = [
     path('swap-requests/sent/', views.get_sent_swap_requests, name='get_sent_swap_requests'),
     path('swap-requests/received/', views.get_received_swap_requests, name='get_received_swap_requests'),
     path('swap-requests/completed/', views.get_my_completed_swaps, name='get_my_completed_swaps'),
+    path('swap-requests/history/', views.get_my_swap_history, name='get_my_swap_history'),
     path('swap-requests/<str:swap_id>/accept/', views.accept_swap_request, name='accept_swap_request'),
     path('swap-requests/<str:swap_id>/reject/', views.reject_swap_request, name='reject_swap_request'),
     path('swap-requests/<str:swap_id>/cancel/', views.cancel_swap_request, name='cancel_swap_request'),
+    path('swap-requests/<str:swap_id>/complete/', views.complete_swap_request, name='complete_swap_request'),
     
     # Feedback endpoints
     path('feedback/', views.submit_swap_feedback, name='submit_swap_feedback'),
     
+    # Notification endpoints
+    path('notifications/stream/', views.stream_notifications, name='stream_notifications'),
+    path('notifications/unread/', views.get_unread_notifications, name='get_unread_notifications'),
+    path('notifications/read/', views.mark_notifications_read, name='mark_notifications_read'),
+    
     # System Messages endpoints
     path('system-messages/active/', views.get_active_system_messages, name='get_active_system_messages'),
     
+    # Monitoring endpoints
+    path('metrics/', views.get_performance_metrics, name='get_performance_metrics'),
+    
     # Admin endpoints
     path('admin/users/', views.get_all_users_admin, name='get_all_users_admin'),
     path('admin/users/<str:user_id>/ban/', views.ban_user, name='ban_user'),
     path('admin/users/<str:user_id>/unban/', views.unban_user, name='unban_user'),
     path('admin/users/<str:user_id>/', views.delete_user_admin, name='delete_user_admin'),
     path('admin/stats/', views.get_platform_statistics, name='get_platform_statistics'),
+    path('admin/feedback-stats/', views.get_feedback_statistics, name='get_feedback_statistics'),
+    path('admin/errors/', views.get_error_statistics, name='get_error_statistics'),
+    path('admin/profiles/', views.get_request_profiles, name='get_request_profiles'),
+    path('admin/profiles/<str:profile_id>/download/', views.download_request_profile, name='download_request_profile'),
     path('admin/swap-requests/', views.get_all_swap_requests_admin, name='get_all_swap_requests_admin'),
     path('admin/system-messages/', views.create_system_message, name='create_system_message'),
     path('admin/system-messages/<str:message_id>/', views.update_system_message_admin, name='update_system_message_admin'),
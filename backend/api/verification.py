@@ -0,0 +1,43 @@
+from django.conf import settings
+from django.db import transaction, IntegrityError
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+from .models import Skill, SkillVerification
+from .versioning import bump_user_version
+
+
+def record_verification(skill_id, verifier, source='Peer'):
+    """Record `verifier` vouching for a skill.
+
+    Each user counts once per skill. The counter is bumped and `is_verified`
+    promoted past SKILL_VERIFICATION_THRESHOLD in a single UPDATE.
+    Returns True if this was a new verification.
+    """
+    threshold = settings.SKILL_VERIFICATION_THRESHOLD
+
+    with transaction.atomic():
+        try:
+            with transaction.atomic():
+                SkillVerification.objects.create(skill_id=skill_id, verifier=verifier, source=source)
+        except IntegrityError:
+            return False
+
+        # The CASE sees the pre-update count, hence `threshold - 1`
+        Skill.objects.filter(id=skill_id).update(
+            verification_count=F('verification_count') + 1,
+            is_verified=Case(
+                When(verification_count__gte=threshold - 1, then=Value(True)),
+                default=F('is_verified')
+            ),
+            updated_at=timezone.now()
+        )
+        bump_user_version(Skill.objects.filter(id=skill_id).values('user_id'))
+
+    return True
+
+
+def verified_skill_for_feedback(swap_request, rater):
+    """The rated user's skill that `rater` learned in the swap"""
+    if rater.id == swap_request.sender_id:
+        return swap_request.requested_skill_id
+    return swap_request.offered_skill_id
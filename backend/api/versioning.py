@@ -0,0 +1,29 @@
+from django.db.models import F
+from .models import User
+
+
+def bump_user_version(user_ids):
+    """Invalidate the ETags of these users' profile and skill representations.
+
+    `user_ids` may be a list or a values() queryset (run as a subquery).
+    """
+    User.objects.filter(id__in=user_ids).update(version=F('version') + 1)
+
+
+def user_etag(user_id, version, variant):
+    """Strong ETag for a representation derived from one user's data.
+
+    `variant` tells apart representations served from the same URL (a user's
+    own profile vs. what others see).
+    """
+    return f'"{user_id.hex}-{version}-{variant}"'
+
+
+def skill_changed(sender, instance, **kwargs):
+    """post_save/post_delete receiver for Skill"""
+    bump_user_version([instance.user_id])
+
+
+def feedback_changed(sender, instance, **kwargs):
+    """post_save/post_delete receiver for Feedback: the rated user's average rating moved"""
+    bump_user_version([instance.rated_user_id])
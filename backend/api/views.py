@@ -1,20 +1,53 @@
-from django.http import JsonResponse
+import uuid
+from datetime import timezone as dt_timezone
+from django.conf import settings
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse, HttpResponse, HttpResponseNotAllowed, StreamingHttpResponse
 from django.contrib.auth import authenticate
+from django.core.handlers.asgi import ASGIRequest
 from django.core.exceptions import ObjectDoesNotExist, ValidationError
-from django.db.models import Q, Avg, Count
+from django.db import transaction, IntegrityError
+from django.db.models import Q, Count
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.views.decorators.http import etag
 from rest_framework import status
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.exceptions import TokenError
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny
-from .models import User, Skill, SwapRequest, Feedback, SystemMessage
+from .models import (
+    User, Skill, SkillTag, SwapRequest, SystemMessage, Notification, RequestProfile, DailyRatingRollup,
+    SkillTagRatingRollup, UserRatingRollup
+)
 from .serializers import (
     UserRegistrationSerializer, UserLoginSerializer, UserProfileSerializer,
     PublicUserSerializer, SkillSerializer, SkillCreateSerializer,
     SwapRequestSerializer, SwapRequestCreateSerializer, FeedbackSerializer,
     FeedbackCreateSerializer, SystemMessageSerializer, PasswordResetRequestSerializer,
-    PasswordResetSerializer, AdminUserSerializer, BanUserSerializer
+    PasswordResetSerializer, AdminUserSerializer, BanUserSerializer, CreditTransactionSerializer,
+    TokenRefreshSerializer, NotificationSerializer, SwapHistorySerializer, RequestProfileSerializer
+)
+from .decorators import (
+    jwt_required, admin_required, handle_exceptions, paginate_response, paginated_queryset, rate_limit, replica_reads
 )
-from .decorators import jwt_required, admin_required, handle_exceptions, paginate_response
+from .credits import complete_swap, credit_history
+from .feedback import FeedbackRejected, submit_feedback
+from .sync import changes_since
+from .archival import swap_history
+from .versioning import user_etag
+from .geo import parse_near, within_radius
+from .ranking import ranked_count, ranked_page
+from .taxonomy import skill_tags
+from .autocomplete import skill_suggestions
+from .tokens import (
+    issue_tokens, refresh_access_token, revoke_session, authenticate_access_token, SessionInvalid
+)
+from .notifications import notify, stream_events, hub as notification_hub
+from .verification import record_verification
+from .instrumentation import registry
+from .errors import counters as error_counters
+from .profiling import FORMATS as PROFILE_FORMATS
+from .feedback_stats import platform_rating_stats, rating_summary, summed, user_rating_stats
 
 
 # Authentication Views
@@ -27,15 +60,9 @@ def register_user(request):
     if serializer.is_valid():
         user = serializer.save()
         
-        # Generate JWT tokens
-        refresh = RefreshToken.for_user(user)
-        
         return JsonResponse({
             'user': UserProfileSerializer(user).data,
-            'tokens': {
-                'access': str(refresh.access_token),
-                'refresh': str(refresh)
-            }
+            'tokens': issue_tokens(user)
         }, status=status.HTTP_201_CREATED)
     
     return JsonResponse({'errors': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
@@ -50,20 +77,42 @@ def login_user(request):
     if serializer.is_valid():
         user = serializer.validated_data['user']
         
-        # Generate JWT tokens
-        refresh = RefreshToken.for_user(user)
-        
         return JsonResponse({
             'user': UserProfileSerializer(user).data,
-            'tokens': {
-                'access': str(refresh.access_token),
-                'refresh': str(refresh)
-            }
+            'tokens': issue_tokens(user)
         }, status=status.HTTP_200_OK)
     
     return JsonResponse({'errors': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
 
 
+@api_view(['POST'])
+@permission_classes([AllowAny])
+@handle_exceptions
+def refresh_token(request):
+    """Rotate a refresh token into a new access/refresh token pair"""
+    serializer = TokenRefreshSerializer(data=request.data)
+    if serializer.is_valid():
+        try:
+            tokens = refresh_access_token(serializer.validated_data['refresh'])
+        except (TokenError, SessionInvalid):
+            return JsonResponse({'error': 'Invalid or expired refresh token'}, status=status.HTTP_401_UNAUTHORIZED)
+        
+        return JsonResponse({'tokens': tokens}, status=status.HTTP_200_OK)
+    
+    return JsonResponse({'errors': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+
+
+@api_view(['POST'])
+@jwt_required
+@handle_exceptions
+def logout_user(request):
+    """Revoke the session of the presented token"""
+    if request.auth_session_id:
+        revoke_session(request.auth_session_id)
+    
+    return JsonResponse({'message': 'Logged out'}, status=status.HTTP_200_OK)
+
+
 @api_view(['POST'])
 @permission_classes([AllowAny])
 @handle_exceptions
@@ -99,14 +148,15 @@ def reset_password(request):
 @permission_classes([AllowAny])
 @handle_exceptions
 @paginate_response
+@replica_reads
 def get_public_user_list(request):
-    """Get list of public users with filtering"""
+    """Get list of public users with filtering, best-ranked first"""
     users = User.objects.filter(is_public=True, is_active=True, is_banned=False)
     
     # Apply filters
     search_skill = request.GET.get('search_skill')
     if search_skill:
-        users = users.filter(skills__name__icontains=search_skill, skills__type='Offered')
+        users = users.filter(skills__tag__in=skill_tags.search(search_skill), skills__type='Offered')
     
     availability = request.GET.getlist('availability')
     if availability:
@@ -120,18 +170,57 @@ def get_public_user_list(request):
     if verified_only:
         users = users.filter(skills__is_verified=True, skills__type='Offered')
     
-    # Remove duplicates and serialize
-    users = users.distinct()
-    serializer = PublicUserSerializer(users, many=True)
-    return serializer.data
+    near = request.GET.get('near')
+    if near:
+        try:
+            latitude, longitude, radius_km = parse_near(near, request.GET.get('radius_km'))
+        except ValueError:
+            return JsonResponse({'error': 'near must be lat,lon and radius_km a positive distance within range'}, status=status.HTTP_400_BAD_REQUEST)
+        users = within_radius(users, latitude, longitude, radius_km).order_by('distance_km', 'id').distinct()
+        try:
+            return paginated_queryset(request, PublicUserSerializer.optimize(users), PublicUserSerializer)
+        except ValueError:
+            return JsonResponse({'error': 'page and limit must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    # Everything else is served in ranked order, a page at a time
+    try:
+        limit = max(1, min(int(request.GET.get('limit', 10)), 100))
+        page = max(1, int(request.GET.get('page', 1)))
+        cursor = request.GET.get('cursor')
+        users = users.distinct()
+        user_ids, next_cursor = ranked_page(
+            users, cursor, limit, offset=0 if cursor else (page - 1) * limit
+        )
+    except ValueError:
+        return JsonResponse({'error': 'Invalid cursor, page or limit'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    # The last numbered page already tells the total; only count otherwise
+    if next_cursor is None and not cursor and (user_ids or page == 1):
+        total = (page - 1) * limit + len(user_ids)
+    else:
+        total = ranked_count(users)
+    
+    users_by_id = PublicUserSerializer.optimize(User.objects.filter(id__in=user_ids)).in_bulk()
+    return JsonResponse({
+        'results': PublicUserSerializer([users_by_id[i] for i in user_ids if i in users_by_id], many=True).data,
+        'pagination': {
+            'page': page,
+            'limit': limit,
+            'total': total,
+            'has_next': next_cursor is not None,
+            'has_previous': page > 1 or cursor is not None,
+            'next_cursor': next_cursor
+        }
+    })
 
 
 @api_view(['GET'])
 @jwt_required
 @handle_exceptions
 @paginate_response
+@replica_reads
 def search_users(request):
-    """Search users by skill name"""
+    """Search users by skill name (any tag with an alias word starting with q)"""
     q = request.GET.get('q', '')
     if not q:
         return JsonResponse({'error': 'Search query required'}, status=status.HTTP_400_BAD_REQUEST)
@@ -140,7 +229,7 @@ def search_users(request):
         is_public=True, 
         is_active=True, 
         is_banned=False,
-        skills__name__icontains=q,
+        skills__tag__in=skill_tags.search(q),
         skills__type='Offered'
     ).distinct()
     
@@ -157,13 +246,45 @@ def search_users(request):
     if verified_only:
         users = users.filter(skills__is_verified=True)
     
+    near = request.GET.get('near')
+    if near:
+        try:
+            latitude, longitude, radius_km = parse_near(near, request.GET.get('radius_km'))
+        except ValueError:
+            return JsonResponse({'error': 'near must be lat,lon and radius_km a positive distance within range'}, status=status.HTTP_400_BAD_REQUEST)
+        users = within_radius(users, latitude, longitude, radius_km).order_by('distance_km', 'id')
+        try:
+            return paginated_queryset(request, PublicUserSerializer.optimize(users), PublicUserSerializer)
+        except ValueError:
+            return JsonResponse({'error': 'page and limit must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+    
     serializer = PublicUserSerializer(users, many=True)
     return serializer.data
 
 
+def own_etag(variant):
+    """ETag function for views that only render the authenticated user's own data"""
+    def etag_func(request, *args, **kwargs):
+        return user_etag(request.user.id, request.user.version, variant)
+    return etag_func
+
+
+def profile_etag(request, user_id):
+    """ETag for get_user_profile_by_id from one primary-key lookup; None if not viewable"""
+    try:
+        user_id = uuid.UUID(user_id)
+    except ValueError:
+        return None
+    if user_id == request.user.id:
+        return user_etag(user_id, request.user.version, 'own')
+    version = User.objects.filter(id=user_id, is_public=True).values_list('version', flat=True).first()
+    return user_etag(user_id, version, 'public') if version is not None else None
+
+
 @api_view(['GET'])
 @jwt_required
 @handle_exceptions
+@etag(own_etag('profile'))
 def get_my_profile(request):
     """Get authenticated user's profile"""
     serializer = UserProfileSerializer(request.user)
@@ -186,6 +307,49 @@ def update_my_profile(request):
 @api_view(['GET'])
 @jwt_required
 @handle_exceptions
+def get_user_profiles_batch(request):
+    """Get several user profiles by ID in one request, in the order requested"""
+    user_ids = []
+    try:
+        for raw_id in request.GET.get('ids', '').split(','):
+            if raw_id.strip():
+                user_ids.append(uuid.UUID(raw_id.strip()))
+    except ValueError:
+        return JsonResponse({'error': 'ids must be comma-separated user IDs'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    user_ids = list(dict.fromkeys(user_ids))
+    if not user_ids or len(user_ids) > settings.USER_BATCH_MAX_IDS:
+        return JsonResponse(
+            {'error': f'Provide between 1 and {settings.USER_BATCH_MAX_IDS} ids'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    users = PublicUserSerializer.optimize(User.objects.filter(id__in=user_ids))
+    users = {user.id: user for user in users}
+    
+    results, forbidden, not_found = [], [], []
+    for user_id in user_ids:
+        user = users.get(user_id)
+        if user is None:
+            not_found.append(user_id)
+        elif user.id == request.user.id:
+            results.append(UserProfileSerializer(user).data)
+        elif not user.is_public:
+            forbidden.append(user_id)
+        else:
+            results.append(PublicUserSerializer(user).data)
+    
+    return JsonResponse({
+        'results': results,
+        'forbidden': forbidden,
+        'not_found': not_found
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@jwt_required
+@handle_exceptions
+@etag(profile_etag)
 def get_user_profile_by_id(request, user_id):
     """Get user profile by ID"""
     try:
@@ -206,6 +370,27 @@ def get_user_profile_by_id(request, user_id):
         return JsonResponse({'error': 'User not found'}, status=status.HTTP_404_NOT_FOUND)
 
 
+@api_view(['GET'])
+@jwt_required
+@handle_exceptions
+def get_user_ratings(request, user_id):
+    """Get a user's rating histogram, expectation-match ratio and monthly trend"""
+    try:
+        months = min(max(int(request.GET.get('months', 12)), 1), 36)
+    except ValueError:
+        return JsonResponse({'error': 'months must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        user = User.objects.select_related('rating_rollup').get(id=user_id)
+    except (ObjectDoesNotExist, ValidationError):
+        return JsonResponse({'error': 'User not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    if not user.is_public and user != request.user:
+        return JsonResponse({'error': 'Profile not accessible'}, status=status.HTTP_403_FORBIDDEN)
+    
+    return JsonResponse({'user_id': str(user.id), **user_rating_stats(user, months=months)}, status=status.HTTP_200_OK)
+
+
 # Skill Views
 @api_view(['POST'])
 @jwt_required
@@ -220,6 +405,38 @@ def add_skill(request):
     return JsonResponse({'errors': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
 
 
+@api_view(['GET'])
+@handle_exceptions
+def autocomplete_skills(request):
+    """Suggest skill names for a prefix, most used first, from the in-memory index"""
+    # No jwt_required: DRF's stateless JWT check is enough here and loads no user,
+    # so a keystroke costs no query
+    try:
+        limit = min(int(request.GET.get('limit', settings.SKILL_AUTOCOMPLETE['DEFAULT_LIMIT'])), settings.SKILL_AUTOCOMPLETE['MAX_LIMIT'])
+    except ValueError:
+        return JsonResponse({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    suggestions = skill_suggestions.suggest(request.GET.get('prefix', ''), max(limit, 1))
+    return JsonResponse({'results': suggestions}, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@jwt_required
+@handle_exceptions
+def get_skill_tag_ratings(request, tag_id):
+    """Get the rating histogram and expectation-match ratio of a skill across all users"""
+    try:
+        tag = SkillTag.objects.select_related('rating_rollup').get(id=tag_id)
+    except SkillTag.DoesNotExist:
+        return JsonResponse({'error': 'Skill not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    try:
+        rollup = tag.rating_rollup
+    except SkillTagRatingRollup.DoesNotExist:
+        rollup = SkillTagRatingRollup(tag=tag)
+    return JsonResponse({'tag_id': tag.id, 'name': tag.name, **rating_summary(rollup)}, status=status.HTTP_200_OK)
+
+
 @api_view(['PUT'])
 @jwt_required
 @handle_exceptions
@@ -279,9 +496,13 @@ def upload_skill_proof_file(request, skill_id):
 def mark_skill_verified(request, skill_id):
     """Mark a skill as verified by peer"""
     try:
-        skill = Skill.objects.get(id=skill_id)
-        skill.verification_count += 1
-        skill.save()
+        skill = Skill.objects.select_related('user').get(id=skill_id)
+        if skill.user_id == request.user.id:
+            return JsonResponse({'error': 'Cannot verify your own skill'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if record_verification(skill.id, request.user, source='Peer'):
+            skill.refresh_from_db(fields=['verification_count', 'is_verified'])
+        
         return JsonResponse(SkillSerializer(skill).data, status=status.HTTP_200_OK)
     
     except ObjectDoesNotExist:
@@ -291,19 +512,30 @@ def mark_skill_verified(request, skill_id):
 # Swap Request Views
 @api_view(['POST'])
 @jwt_required
+@rate_limit('swap_create')
 @handle_exceptions
 def create_swap_request(request):
     """Create a new swap request"""
     serializer = SwapRequestCreateSerializer(data=request.data, context={'request': request})
     if serializer.is_valid():
-        # Create the swap request
-        swap_request = SwapRequest.objects.create(
-            sender=request.user,
-            receiver_id=serializer.validated_data['receiver_id'],
-            offered_skill_id=serializer.validated_data['offered_skill_id'],
-            requested_skill_id=serializer.validated_data['requested_skill_id'],
-            message=serializer.validated_data.get('message', '')
-        )
+        requested_skill = serializer.validated_data['requested_skill']
+        
+        # Create the swap request; the partial unique index rejects identical pending requests
+        try:
+            with transaction.atomic():
+                swap_request = SwapRequest.objects.create(
+                    sender=request.user,
+                    receiver=requested_skill.user,
+                    offered_skill=serializer.validated_data['offered_skill'],
+                    requested_skill=requested_skill,
+                    message=serializer.validated_data.get('message', '')
+                )
+                notify(swap_request.receiver, 'SwapRequested', swap_request, actor=request.user)
+        except IntegrityError:
+            return JsonResponse(
+                {'error': 'An identical swap request is already pending'},
+                status=status.HTTP_409_CONFLICT
+            )
         
         return JsonResponse(SwapRequestSerializer(swap_request).data, status=status.HTTP_201_CREATED)
     
@@ -353,7 +585,9 @@ def accept_swap_request(request, swap_id):
             return JsonResponse({'error': 'Can only accept pending requests'}, status=status.HTTP_400_BAD_REQUEST)
         
         swap_request.status = 'Accepted'
-        swap_request.save()
+        with transaction.atomic():
+            swap_request.save()
+            notify(swap_request.sender, 'SwapAccepted', swap_request, actor=request.user)
         
         return JsonResponse(SwapRequestSerializer(swap_request).data, status=status.HTTP_200_OK)
     
@@ -372,7 +606,9 @@ def reject_swap_request(request, swap_id):
             return JsonResponse({'error': 'Can only reject pending requests'}, status=status.HTTP_400_BAD_REQUEST)
         
         swap_request.status = 'Rejected'
-        swap_request.save()
+        with transaction.atomic():
+            swap_request.save()
+            notify(swap_request.sender, 'SwapRejected', swap_request, actor=request.user)
         
         return JsonResponse(SwapRequestSerializer(swap_request).data, status=status.HTTP_200_OK)
     
@@ -395,7 +631,9 @@ def cancel_swap_request(request, swap_id):
         else:
             swap_request.status = 'Cancelled'
         
-        swap_request.save()
+        with transaction.atomic():
+            swap_request.save()
+            notify(swap_request.receiver, 'SwapCancelled', swap_request, actor=request.user)
         
         return JsonResponse(SwapRequestSerializer(swap_request).data, status=status.HTTP_200_OK)
     
@@ -403,32 +641,128 @@ def cancel_swap_request(request, swap_id):
         return JsonResponse({'error': 'Swap request not found'}, status=status.HTTP_404_NOT_FOUND)
 
 
+@api_view(['PUT'])
+@jwt_required
+@handle_exceptions
+def complete_swap_request(request, swap_id):
+    """Complete an accepted swap request and pay out credits"""
+    swap_request = complete_swap(swap_id, request.user)
+    if swap_request is None:
+        if not SwapRequest.objects.filter(
+            Q(sender=request.user) | Q(receiver=request.user), id=swap_id
+        ).exists():
+            return JsonResponse({'error': 'Swap request not found'}, status=status.HTTP_404_NOT_FOUND)
+        return JsonResponse({'error': 'Can only complete accepted requests'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    return JsonResponse(SwapRequestSerializer(swap_request).data, status=status.HTTP_200_OK)
+
+
 # Feedback Views
 @api_view(['POST'])
 @jwt_required
 @handle_exceptions
 def submit_swap_feedback(request):
-    """Submit feedback for a completed swap"""
-    serializer = FeedbackCreateSerializer(data=request.data, context={'request': request})
-    if serializer.is_valid():
-        swap_request = SwapRequest.objects.get(id=serializer.validated_data['swap_request_id'])
-        
-        # Determine who is being rated
-        rated_user = swap_request.receiver if request.user == swap_request.sender else swap_request.sender
-        
-        feedback = Feedback.objects.create(
-            swap_request=swap_request,
-            rater=request.user,
-            rated_user=rated_user,
+    """Submit feedback for a completed swap; resubmitting returns the stored feedback"""
+    serializer = FeedbackCreateSerializer(data=request.data)
+    if not serializer.is_valid():
+        return JsonResponse({'errors': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        feedback, created = submit_feedback(
+            request.user,
+            serializer.validated_data['swap_request_id'],
             rating=serializer.validated_data['rating'],
             comment=serializer.validated_data.get('comment', ''),
-            expectations_matched=serializer.validated_data['expectations_matched'],
+            expectations_matched=serializer.validated_data.get('expectations_matched', False),
             skill_verified_by_peer=serializer.validated_data.get('skill_verified_by_peer')
         )
-        
-        return JsonResponse(FeedbackSerializer(feedback).data, status=status.HTTP_201_CREATED)
+    except FeedbackRejected as e:
+        if e.conflict:
+            return JsonResponse({'error': str(e)}, status=status.HTTP_409_CONFLICT)
+        return JsonResponse({'errors': {'non_field_errors': [str(e)]}}, status=status.HTTP_400_BAD_REQUEST)
     
-    return JsonResponse({'errors': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+    return JsonResponse(
+        FeedbackSerializer(feedback).data,
+        status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
+    )
+
+
+# Notification Views
+async def stream_notifications(request):
+    """Stream the authenticated user's notifications as Server-Sent Events.
+
+    EventSource cannot set headers, so the access token may also be passed as
+    ?token=. Events after Last-Event-ID (or ?since=) are replayed first.
+    Only served under ASGI: under WSGI an open stream would pin a worker
+    thread, so it answers 501 and clients fall back to polling unread/.
+    """
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+    
+    auth_header = request.headers.get('Authorization', '')
+    raw_token = auth_header[7:] if auth_header.lower().startswith('bearer ') else request.GET.get('token', '')
+    try:
+        user, access_token = await sync_to_async(authenticate_access_token)(raw_token)
+    except (TokenError, SessionInvalid, ObjectDoesNotExist):
+        return JsonResponse({'error': 'Invalid or expired token'}, status=status.HTTP_401_UNAUTHORIZED)
+    
+    cursor = request.headers.get('Last-Event-ID') or request.GET.get('since')
+    try:
+        cursor = int(cursor) if cursor else None
+    except ValueError:
+        return JsonResponse({'error': 'Last-Event-ID and since must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse(
+            {'error': 'Notification streaming requires the ASGI server; poll /api/notifications/unread/ instead'},
+            status=status.HTTP_501_NOT_IMPLEMENTED
+        )
+    
+    response = StreamingHttpResponse(
+        stream_events(user.id, cursor, until=access_token['exp']),
+        content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@api_view(['GET'])
+@jwt_required
+@handle_exceptions
+def get_unread_notifications(request):
+    """Get user's unread notifications after a cursor, oldest first"""
+    try:
+        since = int(request.GET.get('since', 0))
+        limit = max(1, min(int(request.GET.get('limit', 50)), 100))
+    except ValueError:
+        return JsonResponse({'error': 'since and limit must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    unread = Notification.objects.filter(user=request.user, read_at__isnull=True)
+    notifications = list(unread.filter(id__gt=since).select_related('actor').order_by('id')[:limit])
+    
+    return JsonResponse({
+        'unread_count': unread.count(),
+        'results': NotificationSerializer(notifications, many=True).data,
+        'cursor': notifications[-1].id if notifications else since
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['PUT'])
+@jwt_required
+@handle_exceptions
+def mark_notifications_read(request):
+    """Mark user's notifications up to and including a cursor as read"""
+    try:
+        up_to = int(request.data['up_to'])
+    except (KeyError, TypeError, ValueError):
+        return JsonResponse({'error': 'up_to must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    marked = Notification.objects.filter(
+        user=request.user, id__lte=up_to, read_at__isnull=True
+    ).update(read_at=timezone.now())
+    
+    return JsonResponse({'marked': marked}, status=status.HTTP_200_OK)
 
 
 # Dashboard Views
@@ -450,9 +784,8 @@ def get_my_dashboard_summary(request):
         status='Pending'
     ).count()
     
-    average_rating = Feedback.objects.filter(rated_user=user).aggregate(
-        avg_rating=Avg('rating')
-    )['avg_rating'] or 0
+    ratings = UserRatingRollup.objects.filter(user=user).first()
+    average_rating = (ratings.average if ratings else None) or 0
     
     return JsonResponse({
         'credits': user.credits,
@@ -473,22 +806,87 @@ def get_my_completed_swaps(request):
     )
     
     serializer = SwapRequestSerializer(swap_requests, many=True)
-    return JsonResponse(serializer.data, status=status.HTTP_200_OK)
+    return JsonResponse(serializer.data, safe=False, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@jwt_required
+@handle_exceptions
+def get_my_swap_history(request):
+    """Get user's swap requests including archived ones, most recently updated first"""
+    try:
+        limit = max(1, min(int(request.GET.get('limit', 20)), 100))
+        entries, next_cursor = swap_history(
+            request.user, status=request.GET.get('status'), cursor=request.GET.get('cursor'), limit=limit
+        )
+    except ValueError:
+        return JsonResponse({'error': 'Invalid cursor or limit'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    return JsonResponse({
+        'results': SwapHistorySerializer(entries, many=True).data,
+        'next_cursor': next_cursor
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@jwt_required
+@handle_exceptions
+def get_my_credit_history(request):
+    """Get user's credit ledger, newest first, with running balances"""
+    try:
+        before = int(request.GET['before']) if 'before' in request.GET else None
+        limit = max(1, min(int(request.GET.get('limit', 20)), 100))
+    except ValueError:
+        return JsonResponse({'error': 'before and limit must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    entries, has_next = credit_history(request.user, before=before, limit=limit)
+    
+    return JsonResponse({
+        'credits': request.user.credits,
+        'results': CreditTransactionSerializer(entries, many=True).data,
+        'next_before': entries[-1].id if has_next else None
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@jwt_required
+@handle_exceptions
+def get_my_changes(request):
+    """Get user's skills and swap requests changed since a watermark, with deleted ids"""
+    since = None
+    if 'since' in request.GET:
+        since = parse_datetime(request.GET['since'])
+        if since is None:
+            return JsonResponse({'error': 'since must be an ISO 8601 timestamp'}, status=status.HTTP_400_BAD_REQUEST)
+        if timezone.is_naive(since):
+            since = timezone.make_aware(since, dt_timezone.utc)
+    
+    changes = changes_since(request.user, since)
+    
+    return JsonResponse({
+        'watermark': changes['watermark'],
+        'full': changes['full'],
+        'skills': SkillSerializer(changes['skills'], many=True).data,
+        'swap_requests': SwapRequestSerializer(changes['swap_requests'], many=True).data,
+        'deleted': changes['deleted']
+    }, status=status.HTTP_200_OK)
 
 
 @api_view(['GET'])
 @jwt_required
 @handle_exceptions
+@etag(own_etag('verified-skills'))
 def get_my_verified_skills(request):
     """Get user's verified skills"""
     skills = Skill.objects.filter(user=request.user, is_verified=True)
     serializer = SkillSerializer(skills, many=True)
-    return JsonResponse(serializer.data, status=status.HTTP_200_OK)
+    return JsonResponse(serializer.data, safe=False, status=status.HTTP_200_OK)
 
 
 @api_view(['GET'])
 @jwt_required
 @handle_exceptions
+@etag(own_etag('skill-proofs'))
 def get_my_skill_proofs(request):
     """Get user's skill proofs"""
     skills = Skill.objects.filter(
@@ -506,7 +904,7 @@ def get_my_skill_proofs(request):
             'proof_description': skill.proof_description
         })
     
-    return JsonResponse(proofs, status=status.HTTP_200_OK)
+    return JsonResponse(proofs, safe=False, status=status.HTTP_200_OK)
 
 
 # System Messages Views
@@ -517,7 +915,21 @@ def get_active_system_messages(request):
     """Get active system messages"""
     messages = SystemMessage.objects.filter(is_active=True)
     serializer = SystemMessageSerializer(messages, many=True)
-    return JsonResponse(serializer.data, status=status.HTTP_200_OK)
+    return JsonResponse(serializer.data, safe=False, status=status.HTTP_200_OK)
+
+
+# Monitoring Views
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def get_performance_metrics(request):
+    """Per-route latency histograms in Prometheus text format"""
+    if request.META.get('REMOTE_ADDR') not in settings.PERFORMANCE_INSTRUMENTATION['METRICS_ALLOWED_IPS']:
+        return JsonResponse({'error': 'Forbidden'}, status=status.HTTP_403_FORBIDDEN)
+    
+    return HttpResponse(
+        registry.render_prometheus() + error_counters.render_prometheus() + notification_hub.render_prometheus(),
+        content_type='text/plain; version=0.0.4'
+    )
 
 
 # Admin Views
@@ -526,6 +938,7 @@ def get_active_system_messages(request):
 @admin_required
 @handle_exceptions
 @paginate_response
+@replica_reads
 def get_all_users_admin(request):
     """Get all users (admin view)"""
     users = User.objects.all()
@@ -586,6 +999,7 @@ def unban_user(request, user_id):
 @jwt_required
 @admin_required
 @handle_exceptions
+@replica_reads
 def get_platform_statistics(request):
     """Get platform statistics"""
     total_users = User.objects.count()
@@ -593,31 +1007,101 @@ def get_platform_statistics(request):
     total_swaps = SwapRequest.objects.count()
     completed_swaps = SwapRequest.objects.filter(status='Completed').count()
     
-    # Skill popularity
-    skill_popularity = Skill.objects.filter(type='Offered').values('name').annotate(
-        count=Count('id')
-    ).order_by('-count')[:10]
+    # Skill popularity, by canonical tag
+    skill_popularity = [
+        {'tag_id': row['tag'], 'name': row['tag__name'], 'count': row['count']}
+        for row in Skill.objects.filter(type='Offered', tag__isnull=False).values('tag', 'tag__name').annotate(
+            count=Count('id')
+        ).order_by('-count')[:10]
+    ]
     
-    # Feedback statistics
-    total_feedback = Feedback.objects.count()
-    avg_rating = Feedback.objects.aggregate(avg=Avg('rating'))['avg'] or 0
+    # Feedback statistics, from the daily rating rollups
+    ratings = summed(DailyRatingRollup.objects.all(), DailyRatingRollup)
+    total_feedback = ratings.count
+    avg_rating = ratings.average or 0
     
     return JsonResponse({
         'total_users': total_users,
         'active_users': active_users,
         'total_swaps': total_swaps,
         'completed_swaps': completed_swaps,
-        'skill_popularity': list(skill_popularity),
+        'skill_popularity': skill_popularity,
         'total_feedback': total_feedback,
         'average_rating': round(avg_rating, 2)
     }, status=status.HTTP_200_OK)
 
 
+@api_view(['GET'])
+@jwt_required
+@admin_required
+@handle_exceptions
+def get_feedback_statistics(request):
+    """Get platform rating histogram, a trend series (?days=, ?bucket=day|week|month) and the most rated skills"""
+    try:
+        days = min(max(int(request.GET.get('days', 90)), 1), 3660)
+        top_tags = min(max(int(request.GET.get('tags', 10)), 0), 100)
+        stats = platform_rating_stats(days=days, bucket=request.GET.get('bucket', 'day'), top_tags=top_tags)
+    except ValueError:
+        return JsonResponse(
+            {'error': 'days and tags must be integers; bucket must be day, week or month'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    return JsonResponse(stats, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@jwt_required
+@admin_required
+@handle_exceptions
+def get_error_statistics(request):
+    """Get exception counts by view and exception class since process start"""
+    return JsonResponse({'errors': error_counters.snapshot()}, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@jwt_required
+@admin_required
+@handle_exceptions
+@paginate_response
+def get_request_profiles(request):
+    """List captured request profiles, newest first (admin view)"""
+    profiles = RequestProfile.objects.defer('summary', 'data').order_by('-created_at')
+    
+    view_name = request.GET.get('view')
+    if view_name:
+        profiles = profiles.filter(view_name=view_name)
+    
+    serializer = RequestProfileSerializer(profiles, many=True)
+    return serializer.data
+
+
+@api_view(['GET'])
+@jwt_required
+@admin_required
+@handle_exceptions
+def download_request_profile(request, profile_id):
+    """Download a captured profile, or its text summary with ?format=summary (admin view)"""
+    try:
+        profile = RequestProfile.objects.get(id=profile_id)
+    except (RequestProfile.DoesNotExist, ValidationError):
+        return JsonResponse({'error': 'Profile not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    if request.GET.get('format') == 'summary':
+        return HttpResponse(profile.summary, content_type='text/plain; charset=utf-8')
+    
+    content_type, extension = PROFILE_FORMATS[profile.engine]
+    response = HttpResponse(bytes(profile.data), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="profile-{profile.id}.{extension}"'
+    return response
+
+
 @api_view(['GET'])
 @jwt_required
 @admin_required
 @handle_exceptions
 @paginate_response
+@replica_reads
 def get_all_swap_requests_admin(request):
     """Get all swap requests (admin view)"""
     swap_requests = SwapRequest.objects.all()
@@ -660,7 +1144,7 @@ def get_all_system_messages_admin(request):
     """Get all system messages (admin view)"""
     messages = SystemMessage.objects.all()
     serializer = SystemMessageSerializer(messages, many=True)
-    return JsonResponse(serializer.data, status=status.HTTP_200_OK)
+    return JsonResponse(serializer.data, safe=False, status=status.HTTP_200_OK)
 
 
 @api_view(['PUT'])
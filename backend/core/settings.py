@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -44,6 +45,11 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.RequestIdMiddleware',
+    'api.middleware.PerformanceMiddleware',
+    'api.middleware.QueryInspectionMiddleware',
+    'api.middleware.ReadYourWritesMiddleware',
+    'api.middleware.ProfilingMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -85,6 +91,27 @@ DATABASES = {
     }
 }
 
+# Read replicas: DB_REPLICA_NAMES is a comma-separated list of database names
+# (SQLite files locally) holding copies of `default`, added as replica_1, replica_2...
+# Views decorated with @replica_reads read from one of them, except for clients
+# that wrote within the last STICKY_SECONDS (api.middleware.ReadYourWritesMiddleware).
+# All writes, and every other view, use `default`.
+for index, name in enumerate(filter(None, os.environ.get('DB_REPLICA_NAMES', '').split(',')), 1):
+    DATABASES[f'replica_{index}'] = {**DATABASES['default'], 'NAME': name.strip()}
+
+# Never routed to outside tests: ReplicaReadTests list it in READ_REPLICAS to
+# check replica reads against a test database of its own (in memory under SQLite)
+DATABASES['test_replica'] = {
+    **DATABASES['default'],
+    'TEST': {'NAME': None if DATABASES['default']['ENGINE'].endswith('sqlite3') else f"test_{DATABASES['default']['NAME']}_replica"},
+}
+
+DATABASE_ROUTERS = ['api.replicas.ReplicaRouter']
+READ_REPLICAS = {
+    'ALIASES': [alias for alias in DATABASES if alias.startswith('replica_')],
+    'STICKY_SECONDS': 5,
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -133,7 +160,8 @@ AUTH_USER_MODEL = 'api.User'
 # Django REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # Views load the user themselves in jwt_required; don't fetch it twice per request
+        'rest_framework_simplejwt.authentication.JWTStatelessUserAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
@@ -145,9 +173,9 @@ REST_FRAMEWORK = {
 # JWT Settings
 from datetime import timedelta
 SIMPLE_JWT = {
-    'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
-    'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
-    'ROTATE_REFRESH_TOKENS': False,
+    'ACCESS_TOKEN_LIFETIME': timedelta(minutes=5),
+    'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
+    'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
     'UPDATE_LAST_LOGIN': False,
 
@@ -168,6 +196,181 @@ SIMPLE_JWT = {
     'JTI_CLAIM': 'jti',
 }
 
+# Revoked sessions are pulled into each worker's in-memory index at most this often
+SESSION_REVOCATION_SYNC_SECONDS = 5
+
+# Rotated-out refresh tokens remembered per process, so replays are rejected without a query
+REFRESH_TOKEN_BLACKLIST_CACHE_SIZE = 10000
+
 # CORS settings
 CORS_ALLOW_ALL_ORIGINS = True  # Only for development
 CORS_ALLOW_CREDENTIALS = True
+# Read-your-writes marker, for clients that can't send cookies cross-origin
+from corsheaders.defaults import default_headers
+CORS_ALLOW_HEADERS = (*default_headers, 'x-db-pin-until', 'x-profile')
+CORS_EXPOSE_HEADERS = ['X-DB-Pin-Until', 'X-Profile-ID']
+
+# Credits
+SWAP_COMPLETION_CREDITS = 1  # Credits paid to each participant when a swap completes
+CREDIT_SNAPSHOT_SETTLE_SECONDS = 60  # Ledger entries younger than this are left for the next snapshot run
+
+# Skill verification
+SKILL_VERIFICATION_THRESHOLD = 3  # Distinct peer verifications needed to mark a skill verified
+
+# Caches. Rate-limit state has its own alias; set REDIS_URL to share it across workers.
+REDIS_URL = os.environ.get('REDIS_URL')
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'ratelimit': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL,
+    } if REDIS_URL else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'ratelimit',
+    },
+}
+
+# Rate limiting (DRF-style rates: '<count>/<s|m|h|d>'; a missing scope is unlimited).
+# Per-route auth limits are set with throttle() in api/urls.py.
+RATE_LIMIT_CACHE = 'ratelimit'
+RATE_LIMIT_TRUST_X_FORWARDED_FOR = False  # Enable only behind a proxy that sets the header
+RATE_LIMITS = {
+    'swap_create': '20/h',
+}
+
+# Notifications are pushed over Server-Sent Events, served only via core/asgi.py
+# (under WSGI the stream answers 501 rather than hold a worker thread per
+# client). BROKER 'redis' relays them between nodes.
+NOTIFICATIONS = {
+    'BROKER': 'redis' if REDIS_URL else 'local',
+    'REDIS_CHANNEL': 'notifications',
+    'HEARTBEAT_SECONDS': 15,
+    'RETRY_MS': 3000,  # Client reconnect delay
+    'QUEUE_SIZE': 100,  # Undelivered events per stream before it is closed
+    'REPLAY_BATCH': 100,
+}
+
+# Public directory ranking, recomputed by `manage.py rank_users`. Ratings are
+# shrunk towards RATING_PRIOR as if it had RATING_PRIOR_WEIGHT extra votes;
+# counts enter the score as log(1 + n); activity (last login or token refresh,
+# else sign-up) decays with a half-life.
+DISCOVERY_RANKING = {
+    'WEIGHTS': {
+        'rating': 3.0,
+        'feedback_count': 1.0,
+        'verified_skills': 1.5,
+        'recent_completions': 1.0,
+        'activity': 1.0,
+    },
+    'RATING_PRIOR': 3.0,
+    'RATING_PRIOR_WEIGHT': 5,
+    'RECENT_DAYS': 30,
+    'ACTIVITY_HALF_LIFE_DAYS': 14,
+}
+
+# Most user ids accepted by GET /api/users/batch/
+USER_BATCH_MAX_IDS = 200
+
+# Location search. Places are resolved offline from GAZETTEER_PATH; radius
+# filters (?near=lat,lon&radius_km=) are capped at MAX_RADIUS_KM.
+GEO_SEARCH = {
+    'GAZETTEER_PATH': BASE_DIR / 'api' / 'data' / 'gazetteer.csv',
+    'DEFAULT_RADIUS_KM': 25,
+    'MAX_RADIUS_KM': 500,
+}
+
+# Skill taxonomy. Free-text skill names resolve to canonical SkillTag ids when
+# saved; tags and aliases are seeded from PATH. Each process keeps an in-memory
+# index of the aliases, refreshed every SYNC_SECONDS. A skill search matching more
+# than SEARCH_MAX_TAGS tags filters through an alias subquery instead of an id list.
+TAXONOMY = {
+    'PATH': BASE_DIR / 'api' / 'data' / 'skill_tags.csv',
+    'SYNC_SECONDS': 30,
+    'SEARCH_MAX_TAGS': 200,
+}
+
+# Skill name suggestions (GET /api/skills/autocomplete/?prefix=) are served from
+# an in-process index rebuilt every REFRESH_SECONDS.
+SKILL_AUTOCOMPLETE = {
+    'REFRESH_SECONDS': 300,
+    'DEFAULT_LIMIT': 10,
+    'MAX_LIMIT': 25,
+}
+
+# Swap archival (`manage.py archive_swaps`). Swaps in STATUSES not updated for
+# AFTER_DAYS move to the archive table, BATCH_SIZE per transaction, so the hot
+# swap table and its indexes stay small; GET /api/swap-requests/history/ reads both.
+SWAP_ARCHIVAL = {
+    'STATUSES': ['Rejected', 'Cancelled', 'Withdrawn'],
+    'AFTER_DAYS': 90,
+    'BATCH_SIZE': 500,
+}
+
+# Delta sync (GET /api/users/me/changes/). Deletions are remembered for
+# TOMBSTONE_RETENTION_DAYS; older watermarks get a full snapshot instead.
+DELTA_SYNC = {
+    'WATERMARK_OVERLAP_SECONDS': 5,
+    'TOMBSTONE_RETENTION_DAYS': 30,
+}
+
+# Password hashing runs in a bounded pool off the request thread; work beyond
+# MAX_WORKERS + MAX_QUEUE (or waiting longer than TIMEOUT seconds) is shed with a 503.
+PASSWORD_HASHING_POOL = {
+    'MAX_WORKERS': os.cpu_count() or 1,
+    'MAX_QUEUE': 64,
+    'TIMEOUT': 5,
+}
+
+# Performance instrumentation: every request feeds the per-route latency
+# histograms at /api/metrics/; SAMPLE_RATE of them also get a query and
+# serialization breakdown in a Server-Timing header.
+PERFORMANCE_INSTRUMENTATION = {
+    'ENABLED': True,
+    'SAMPLE_RATE': 1.0 if DEBUG else 0.05,
+    'METRICS_ALLOWED_IPS': ['127.0.0.1', '::1'],
+}
+
+# Query inspection: log query shapes repeated more than REPEAT_THRESHOLD times in
+# one request (N+1 patterns) and queries slower than SLOW_QUERY_MS with their plan.
+QUERY_INSPECTION = {
+    'ENABLED': True,
+    'SAMPLE_RATE': 1.0 if DEBUG else 0.01,
+    'REPEAT_THRESHOLD': 5,
+    'SLOW_QUERY_MS': 100,
+    'EXPLAIN': True,
+}
+
+# Request profiling: an admin request carrying X-Profile (or ?profile=1) runs
+# under cProfile (or pyinstrument, if installed and asked for by name) and is
+# stored for /api/admin/profiles/. SAMPLE_RATE profiles a fraction of all
+# requests too; the newest MAX_STORED profiles are kept.
+REQUEST_PROFILING = {
+    'ENABLED': True,
+    'SAMPLE_RATE': 0.0,
+    'MAX_STORED': 200,
+    'SUMMARY_LINES': 40,
+}
+
+# Retry-After (seconds) sent with 503s for retryable failures, by error kind
+RETRY_AFTER_SECONDS = {
+    'lock_contention': 1,
+    'overload': 1,
+    'database_unavailable': 5,
+}
+
+# Logging. 'api.*' loggers emit one JSON document per line.
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler', 'formatter': 'message'},
+    },
+    'loggers': {
+        'api': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+    },
+}
@@ -0,0 +1,47 @@
+"""
+API-only settings: the JWT JSON API without the Django admin.
+
+Run API workers with DJANGO_SETTINGS_MODULE=core.settings_api. Everything
+is inherited from core.settings except what only the admin site needs:
+cookie sessions, messages, CSRF, clickjacking headers, static files and
+template context. Authentication is by bearer token in jwt_required, so
+none of it runs for API requests. Serve the admin from a separate process
+on core.settings. Compare startup cost with `manage.py bench_startup`.
+"""
+
+from .settings import *  # noqa: F401,F403
+
+ADMIN_ONLY_APPS = {
+    'django.contrib.admin',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+    'rest_framework_simplejwt',  # Token classes are imported directly; the app only adds translations
+}
+INSTALLED_APPS = [app for app in INSTALLED_APPS if app not in ADMIN_ONLY_APPS]
+
+ADMIN_ONLY_MIDDLEWARE = {
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',  # DRF views are csrf_exempt; JWT requests carry no cookies
+    'django.contrib.auth.middleware.AuthenticationMiddleware',  # jwt_required sets request.user
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+}
+MIDDLEWARE = [middleware for middleware in MIDDLEWARE if middleware not in ADMIN_ONLY_MIDDLEWARE]
+
+ROOT_URLCONF = 'core.urls_api'
+
+TEMPLATES = [
+    {
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'DIRS': [],
+        'APP_DIRS': True,
+        'OPTIONS': {'context_processors': []},
+    },
+]
+
+# JSON only: the browsable API renderer pulls in templates and forms
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+    'DEFAULT_RENDERER_CLASSES': ('rest_framework.renderers.JSONRenderer',),
+}
@@ -0,0 +1,8 @@
+"""
+URL configuration for API-only workers (core.settings_api): the API without /admin/.
+"""
+from django.urls import path, include
+
+urlpatterns = [
+    path('api/', include('api.urls')),
+]